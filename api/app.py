@@ -1,10 +1,14 @@
 import os
-import logging
 import time
 from datetime import datetime
 from flask import Flask, request, current_app
 from flask_cors import CORS
 from apps.utils.responses import error_response
+from apps.utils.database_service import commit_request_transaction, release_request_connection
+from apps.utils.query_profiler import finish_query_profile
+from apps.utils.metrics import init_metrics
+from apps.utils.structured_logging import log_request, setup_logging, start_request_log
+from apps.utils.slow_query_log import init_slow_query_log
 from config import Config, config
 
 from apps.blueprints.auth import auth_bp
@@ -24,7 +28,9 @@ class AppFactory:
         AppFactory._init_blueprints(app)
         AppFactory._setup_logging(app)
         AppFactory._log_startup_info(app)
+        AppFactory._register_metrics(app)
         AppFactory._register_request_handlers(app)
+        AppFactory._register_db_handlers(app)
         AppFactory._register_error_handlers(app)
             
         return app
@@ -39,39 +45,37 @@ class AppFactory:
 
     @staticmethod
     def _setup_logging(app):
-        file_handler = logging.FileHandler(app.config['LOG_FILE_PATH'])
-        file_handler.setLevel(app.config['LOG_LEVEL'])
-        
-        formatter = logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        )
-        file_handler.setFormatter(formatter)
-        
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(app.config['LOG_LEVEL'])
+        # 请求线程只把日志放入队列，由后台线程写入 JSON Lines 文件
+        setup_logging(app)
+        init_slow_query_log(app)
 
     @staticmethod
     def _log_startup_info(app):
         app.logger.info('Flask application starting...')
         app.logger.info(f"Database: {app.config['MYSQL_USER']}@{app.config['MYSQL_HOST']}/{app.config['MYSQL_DB']}")
 
+    @staticmethod
+    def _register_metrics(app):
+        # 最先注册，after_request 中最后执行，计时包含提交事务等其他钩子的耗时
+        init_metrics(app)
+
     @staticmethod
     def _register_request_handlers(app):
         @app.before_request
-        def log_request_info():
+        def init_request_info():
             request.start_time = time.time()
             request.request_id = f"{int(request.start_time * 1000000) % 1000000:06d}"
-            app.logger.info(f"[{request.request_id}] {request.method} {request.path} - "
-                           f"Args: {request.args.to_dict()}, Form: {request.form.to_dict()}, "
-                           f"JSON: {request.get_json(silent=True)}")
+            start_request_log()
+
+        app.after_request(log_request)
 
-        @app.after_request
-        def log_response_info(response):
-            if hasattr(request, 'start_time') and hasattr(request, 'request_id'):
-                execution_time = time.time() - request.start_time
-                app.logger.info(f"[{request.request_id}] Response: {response.status_code} - "
-                               f"Execution time: {execution_time:.2f}s")
-            return response
+    @staticmethod
+    def _register_db_handlers(app):
+        # after_request 按注册的相反顺序执行：先提交事务，再输出本请求的语句统计
+        app.after_request(finish_query_profile)
+        # 请求结束时统一提交/回滚请求级事务，并把连接归还连接池
+        app.after_request(commit_request_transaction)
+        app.teardown_appcontext(release_request_connection)
 
     @staticmethod
     def _register_error_handlers(app):
@@ -1,17 +1,28 @@
 from flask import Blueprint, request, current_app
 from apps.services.student_service import StudentService
 from apps.utils.decorators import handle_exceptions
-from apps.utils.responses import success_response, error_response
+from apps.utils.responses import success_response, error_response, stream_success_response
 from apps.utils.validation import validate_json_input
+from apps.utils.pagination import parse_page_request
 
 admin_students_bp = Blueprint('admin_students', __name__)
 
 @handle_exceptions
 def get_students():
+    page, error = parse_page_request(['class_id'])
+    if error:
+        return error
+        
     student_service = StudentService()
-    students_data = student_service.get_all_students()
+    stream = current_app.config['STREAM_RESPONSES']
+    students_data, pagination = student_service.get_all_students(page, stream=stream)
     current_app.logger.info("成功获取学生列表")
-    return success_response({'students': students_data})
+    if stream and not pagination:
+        return stream_success_response(students_data, 'students')
+    response_data = {'students': students_data}
+    if pagination:
+        response_data['pagination'] = pagination
+    return success_response(response_data)
 
 @handle_exceptions
 def create_student():
@@ -1,5 +1,8 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
+from apps.utils.cache import cache_stats
+from apps.utils.database_service import get_pool
 from apps.utils.decorators import handle_exceptions
+from apps.utils.metrics import get_registry, render_prometheus
 from apps.utils.responses import success_response, error_response
 
 common_bp = Blueprint('common', __name__)
@@ -19,6 +22,14 @@ def health_check():
     })
 
 
+def metrics():
+    if get_registry() is None:
+        return error_response('Metrics disabled', 404)
+    cache = cache_stats() if current_app.config['CACHE_ENABLED'] else None
+    return Response(render_prometheus(get_pool().stats(), cache),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @handle_exceptions
 def test_error():
     raise Exception("This is a test error for exception handling")
@@ -26,4 +37,5 @@ def test_error():
 
 common_bp.add_url_rule('/', view_func=index, methods=['GET'])
 common_bp.add_url_rule('/health', view_func=health_check, methods=['GET'])
+common_bp.add_url_rule('/metrics', view_func=metrics, methods=['GET'])
 common_bp.add_url_rule('/test_error', view_func=test_error, methods=['GET'])
\ No newline at end of file
@@ -1,11 +1,13 @@
 from flask import Blueprint, request, current_app
 from apps.utils.decorators import handle_exceptions
-from apps.utils.responses import success_response, error_response
+from apps.utils.responses import success_response, error_response, stream_success_response
 from apps.utils.validation import validate_json_input
+from apps.utils.pagination import parse_page_request
 from apps.services.teacher_service import TeacherService
 from apps.services.class_service import ClassService
 from apps.services.student_service import StudentService
 from apps.services.score_service import ScoreService
+from apps.services.score_pivot_service import ScorePivotService
 
 teacher_bp = Blueprint('teacher', __name__)
 
@@ -23,10 +25,20 @@ def get_profile(teacher_id):
 
 @handle_exceptions
 def get_my_scores(teacher_id):
+    page, error = parse_page_request(['class_id', 'subject_id', 'exam_type_id'])
+    if error:
+        return error
+        
     score_service = ScoreService()
-    scores_data = score_service.get_teacher_scores(teacher_id)
+    stream = current_app.config['STREAM_RESPONSES']
+    scores_data, pagination = score_service.get_teacher_scores(teacher_id, page, stream=stream)
     current_app.logger.info(f"Teacher {teacher_id} retrieved scores")
-    return success_response({'scores': scores_data})
+    if stream and not pagination:
+        return stream_success_response(scores_data, 'scores')
+    response_data = {'scores': scores_data}
+    if pagination:
+        response_data['pagination'] = pagination
+    return success_response(response_data)
 
 
 @handle_exceptions
@@ -76,10 +88,20 @@ def get_class(teacher_id, class_id):
 
 @handle_exceptions
 def get_teacher_students(teacher_id):
+    page, error = parse_page_request(['class_id'])
+    if error:
+        return error
+        
     student_service = StudentService()
-    students_data = student_service.get_teacher_students(teacher_id)
+    stream = current_app.config['STREAM_RESPONSES']
+    students_data, pagination = student_service.get_teacher_students(teacher_id, page=page, stream=stream)
     current_app.logger.info(f"Teacher {teacher_id} retrieved students")
-    return success_response({'students': students_data})
+    if stream and not pagination:
+        return stream_success_response(students_data, 'students')
+    response_data = {'students': students_data}
+    if pagination:
+        response_data['pagination'] = pagination
+    return success_response(response_data)
 
 
 @handle_exceptions
@@ -96,17 +118,30 @@ def get_teacher_student(teacher_id, student_id):
 @handle_exceptions
 def get_exam_scores(teacher_id, exam_id):
     score_service = ScoreService()
-    scores_data = score_service.get_exam_scores(teacher_id, exam_id)
+    stream = current_app.config['STREAM_RESPONSES']
+    scores_data = score_service.get_exam_scores(exam_id, stream=stream)
     current_app.logger.info(f"Teacher {teacher_id} retrieved scores for exam {exam_id}")
+    if stream:
+        return stream_success_response(scores_data, 'scores')
     return success_response({'scores': scores_data})
 
 
+@handle_exceptions
+def get_class_exam_results(teacher_id, class_id):
+    exam_type_id = request.args.get('exam_type_id', type=int)
+    pivot_service = ScorePivotService()
+    pivot_data = pivot_service.pivot_scores(class_id=class_id, exam_type_id=exam_type_id)
+    current_app.logger.info(f"Teacher {teacher_id} retrieved exam results for class {class_id}")
+    return success_response(pivot_data)
+
+
 teacher_bp.add_url_rule('/profile/<string:teacher_id>', view_func=get_profile, methods=['GET'])
 teacher_bp.add_url_rule('/scores/<string:teacher_id>', view_func=get_my_scores, methods=['GET'])
 teacher_bp.add_url_rule('/scores/<string:teacher_id>/<int:score_id>', view_func=update_my_score, methods=['PUT'])
 teacher_bp.add_url_rule('/classes/<string:teacher_id>', view_func=get_classes, methods=['GET'])
 teacher_bp.add_url_rule('/classes/<string:teacher_id>/<string:class_id>/students', view_func=get_class_students, methods=['GET'])
 teacher_bp.add_url_rule('/classes/<string:teacher_id>/<string:class_id>', view_func=get_class, methods=['GET'])
+teacher_bp.add_url_rule('/classes/<string:teacher_id>/<string:class_id>/exam_results', view_func=get_class_exam_results, methods=['GET'])
 teacher_bp.add_url_rule('/students/<string:teacher_id>', view_func=get_teacher_students, methods=['GET'])
 teacher_bp.add_url_rule('/students/<string:teacher_id>/<string:student_id>', view_func=get_teacher_student, methods=['GET'])
 teacher_bp.add_url_rule('/students/<string:teacher_id>/class/<string:class_id>', view_func=get_class_students, methods=['GET'])
@@ -6,6 +6,8 @@ from .subject_service import SubjectService
 from .exam_type_service import ExamTypeService
 from .teacher_class_service import TeacherClassService
 from .exam_service import ExamService
+from .exam_result_service import ExamResultService
+from .score_pivot_service import ScorePivotService
 
 __all__ = [
     'StudentService',
@@ -15,5 +17,7 @@ __all__ = [
     'SubjectService',
     'ExamTypeService',
     'TeacherClassService',
-    'ExamService'
+    'ExamService',
+    'ExamResultService',
+    'ScorePivotService'
 ]
\ No newline at end of file
@@ -1,3 +1,4 @@
+from apps.utils.cache import cached, invalidate
 from apps.utils.database_service import DatabaseService
 from flask import current_app
 
@@ -16,7 +17,7 @@ class ClassService:
                 GROUP BY c.class_id, c.class_name
                 ORDER BY c.class_id
             """
-            classes = self.db_service.execute_query(query)
+            classes = cached('classes', 'all', lambda: self.db_service.execute_query(query))
             
             return classes
             
@@ -34,7 +35,8 @@ class ClassService:
                 WHERE c.class_id = %s
                 GROUP BY c.class_id, c.class_name
             """
-            result = self.db_service.execute_query(query, (class_id,))
+            result = cached('classes', f'id:{class_id}',
+                            lambda: self.db_service.execute_query(query, (class_id,)))
             return result[0] if result else None
         except Exception as e:
             current_app.logger.error(f"Error getting class by id {class_id}: {str(e)}")
@@ -45,6 +47,7 @@ class ClassService:
             query = "INSERT INTO Classes (class_name) VALUES (%s)"
             params = (class_data.get('class_name'),)
             self.db_service.execute_update(query, params)
+            invalidate('classes')
             
             select_query = """
                 SELECT class_id, class_name
@@ -77,6 +80,7 @@ class ClassService:
             params.append(class_id)
             update_query = f"UPDATE Classes SET {', '.join(fields)} WHERE class_id = %s"
             self.db_service.execute_update(update_query, params)
+            invalidate('classes')
             
             # Get updated class
             select_query = """
@@ -107,6 +111,7 @@ class ClassService:
             
             delete_query = "DELETE FROM Classes WHERE class_id = %s"
             self.db_service.execute_update(delete_query, (class_id,))
+            invalidate('classes')
             return True, "Class deleted successfully"
         except Exception as e:
             current_app.logger.error(f"Error deleting class {class_id}: {str(e)}")
@@ -0,0 +1,129 @@
+import os
+import threading
+
+from apps.services.score_pivot_service import ScorePivotService
+from apps.utils.database_service import DatabaseService
+from flask import current_app, g
+
+
+_build_lock = threading.Lock()
+
+REFRESH_QUERY_PATH = os.path.join(os.path.dirname(__file__), 'exam_results_cache_refresh.sql')
+
+
+class ExamResultService:
+    """
+    exam_results 视图的物化表
+
+    exam_results_cache 以 (student_id, exam_type_id) 为主键保存每个学生每次考试的
+    总分和排名，各科成绩由 ScorePivotService 按 Subjects 表动态透视。
+    学生查询变成主键读取；成绩写入后只重算受影响考试类型的排名。
+    """
+
+    CREATE_TABLE_QUERY = """
+        CREATE TABLE IF NOT EXISTS exam_results_cache (
+            student_id varchar(255) NOT NULL,
+            exam_type_id int NOT NULL,
+            exam_type varchar(255) DEFAULT NULL,
+            student_name varchar(255) DEFAULT NULL,
+            total_score int DEFAULT 0,
+            ranking int DEFAULT NULL,
+            PRIMARY KEY (student_id, exam_type_id),
+            KEY idx_exam_type_ranking (exam_type_id, ranking)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+    """
+
+    # 与 db/import_school_data.py 共用同一份 SQL
+    with open(REFRESH_QUERY_PATH, encoding='utf-8') as f:
+        REFRESH_QUERY = f.read()
+
+    def __init__(self):
+        self.db_service = DatabaseService()
+        self.pivot_service = ScorePivotService()
+
+    def ensure_ready(self):
+        """
+        每个进程首次使用时建表并全量重建，覆盖导入/恢复等绕过 ScoreService 的写入
+
+        建表在独立连接上执行，避免 DDL 隐式提交当前请求事务；
+        重建并入当前请求事务，避免与本请求已持有的 Scores 行锁互相等待。
+        请求事务提交后才标记为已就绪，请求出错回滚时下一个请求会重新重建
+        """
+        app = current_app._get_current_object()
+        if app.extensions.get('exam_results_cache_ready') or g.get('_exam_results_cache_rebuilt'):
+            return
+        with _build_lock:
+            if app.extensions.get('exam_results_cache_ready'):
+                return
+            connection = self.db_service.get_connection()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(self.CREATE_TABLE_QUERY)
+            finally:
+                connection.close()
+            
+            with self.db_service.transaction():
+                self.db_service.execute_update("DELETE FROM exam_results_cache")
+                self.db_service.execute_update(self.REFRESH_QUERY.format(where=''))
+            g._exam_results_cache_rebuilt = True
+            self.db_service.on_commit(lambda: app.extensions.__setitem__('exam_results_cache_ready', True))
+            current_app.logger.info("exam_results_cache rebuilt")
+
+    def refresh_exam_types(self, exam_type_ids):
+        """在当前请求事务中重算指定考试类型的成绩和排名"""
+        exam_type_ids = sorted({exam_type_id for exam_type_id in exam_type_ids if exam_type_id is not None})
+        if not exam_type_ids:
+            return
+        try:
+            self.ensure_ready()
+            placeholders = ', '.join(['%s'] * len(exam_type_ids))
+            with self.db_service.transaction():
+                self.db_service.execute_update(
+                    f"DELETE FROM exam_results_cache WHERE exam_type_id IN ({placeholders})",
+                    exam_type_ids
+                )
+                self.db_service.execute_update(
+                    self.REFRESH_QUERY.format(where=f"WHERE sc.exam_type_id IN ({placeholders})"),
+                    exam_type_ids
+                )
+        except Exception as e:
+            current_app.logger.error(f"Failed to refresh exam results for exam types {exam_type_ids}: {str(e)}")
+            raise
+
+    def refresh_student_name(self, student_id, student_name):
+        self.ensure_ready()
+        self.db_service.execute_update(
+            "UPDATE exam_results_cache SET student_name = %s WHERE student_id = %s",
+            (student_name, student_id)
+        )
+
+    def get_student_exam_types(self, student_id):
+        query = "SELECT DISTINCT exam_type_id FROM Scores WHERE student_id = %s"
+        return [row['exam_type_id'] for row in self.db_service.execute_query(query, (student_id,))]
+
+    def get_student_results(self, student_id):
+        self.ensure_ready()
+        query = """
+            SELECT exam_type_id, exam_type as exam_name, student_name,
+                   total_score, ranking
+            FROM exam_results_cache
+            WHERE student_id = %s
+            ORDER BY exam_type
+        """
+        results = self.db_service.execute_query(query, (student_id,))
+        if not results:
+            return results
+        
+        pivot = self.pivot_service.pivot_scores(student_id=student_id)
+        subject_keys = [column['key'] for column in pivot['subjects']]
+        subject_scores = {row['exam_type_id']: row for row in pivot['rows']}
+        
+        exam_results = []
+        for result in results:
+            scores = subject_scores.get(result.pop('exam_type_id'), {})
+            exam_result = {'exam_name': result['exam_name'], 'student_name': result['student_name']}
+            exam_result.update({key: scores.get(key, 0) for key in subject_keys})
+            exam_result['total_score'] = result['total_score']
+            exam_result['ranking'] = result['ranking']
+            exam_results.append(exam_result)
+        return exam_results
@@ -0,0 +1,11 @@
+INSERT INTO exam_results_cache
+    (student_id, exam_type_id, exam_type, student_name, total_score, ranking)
+SELECT s.student_id, et.exam_type_id, et.exam_type_name, s.student_name,
+       SUM(sc.score),
+       ROW_NUMBER() OVER (PARTITION BY et.exam_type_id ORDER BY SUM(sc.score) DESC)
+FROM Students s
+JOIN Scores sc ON s.student_id = sc.student_id
+JOIN Subjects sub ON sc.subject_id = sub.subject_id
+JOIN ExamTypes et ON sc.exam_type_id = et.exam_type_id
+{where}
+GROUP BY et.exam_type_id, et.exam_type_name, s.student_id, s.student_name
@@ -1,4 +1,5 @@
 from apps.utils.database_service import DatabaseService
+from apps.utils.score_statistics import summarize_scores
 from flask import current_app
 """考试服务类"""
 
@@ -129,72 +130,75 @@ class ExamService:
         """
         return self.db_service.execute_query(query, (class_id, subject_id))
 
-    def analyze_exam_performance(self, exam_id):
+    def get_exams_by_ids(self, exam_ids):
         """
-        分析考试表现
+        批量获取考试信息
         
         Args:
-            exam_id (int): 考试ID
+            exam_ids (list): 考试ID列表
             
         Returns:
-            dict: 考试表现分析
+            dict: 考试ID到考试信息的映射
         """
-        # 获取考试基本信息
-        exam_info = self.get_exam_by_id(exam_id)
-        if not exam_info:
-            return None
+        if not exam_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(exam_ids))
+        query = f"""
+            SELECT e.exam_id, e.exam_name, e.exam_date, e.subject_id, e.teacher_id, 
+                   e.exam_type_id, s.subject_name, t.teacher_name, et.exam_type_name
+            FROM Exams e
+            JOIN Subjects s ON e.subject_id = s.subject_id
+            JOIN Teachers t ON e.teacher_id = t.teacher_id
+            JOIN ExamTypes et ON e.exam_type_id = et.exam_type_id
+            WHERE e.exam_id IN ({placeholders})
+        """
+        result = self.db_service.execute_query(query, list(exam_ids))
+        return {row['exam_id']: row for row in result}
+
+    def analyze_exams_performance(self, exam_ids, grade_bands=None):
+        """
+        批量分析考试表现，所有考试的成绩只扫描一次
+        
+        Args:
+            exam_ids (list): 考试ID列表
+            grade_bands (list): 分数段配置，默认使用 Config.GRADE_BANDS
             
-        analysis = {
-            'exam_info': exam_info
-        }
+        Returns:
+            dict: 考试ID到考试表现分析的映射，不存在的考试不出现在结果中
+        """
+        exams = self.get_exams_by_ids(exam_ids)
+        if not exams:
+            return {}
         
-        # 计算平均分
-        avg_query = """
-            SELECT AVG(score) as average_score, COUNT(*) as total_students
+        bands = grade_bands or current_app.config['GRADE_BANDS']
+        percentiles = current_app.config['SCORE_PERCENTILES']
+        
+        placeholders = ', '.join(['%s'] * len(exams))
+        score_query = f"""
+            SELECT exam_id, score
             FROM Scores 
-            WHERE exam_id = %s
+            WHERE exam_id IN ({placeholders})
         """
-        avg_result = self.db_service.execute_query(avg_query, (exam_id,))
-        analysis['average_score'] = float(avg_result[0]['average_score']) if avg_result and avg_result[0]['average_score'] else 0
-        analysis['total_students'] = avg_result[0]['total_students'] if avg_result else 0
+        scores_by_exam = {exam_id: [] for exam_id in exams}
+        for row in self.db_service.execute_query(score_query, list(exams)):
+            scores_by_exam[row['exam_id']].append(row['score'])
         
-        # 计算各分数段人数
-        grade_ranges = [
-            {'name': '优秀 (90-100)', 'min': 90, 'max': 100},
-            {'name': '良好 (80-89)', 'min': 80, 'max': 89},
-            {'name': '中等 (70-79)', 'min': 70, 'max': 79},
-            {'name': '及格 (60-69)', 'min': 60, 'max': 69},
-            {'name': '不及格 (0-59)', 'min': 0, 'max': 59}
-        ]
+        analyses = {}
+        for exam_id, exam_info in exams.items():
+            analysis = {'exam_info': exam_info}
+            analysis.update(summarize_scores(scores_by_exam[exam_id], bands, percentiles))
+            analyses[exam_id] = analysis
+        return analyses
+
+    def analyze_exam_performance(self, exam_id, grade_bands=None):
+        """
+        分析考试表现
         
-        grade_distribution = []
-        for range_info in grade_ranges:
-            count_query = """
-                SELECT COUNT(*) as count
-                FROM Scores 
-                WHERE exam_id = %s AND score >= %s AND score <= %s
-            """
-            count_result = self.db_service.execute_query(
-                count_query, 
-                (exam_id, range_info['min'], range_info['max'])
-            )
-            count = count_result[0]['count'] if count_result else 0
-            grade_distribution.append({
-                'range': range_info['name'],
-                'count': count,
-                'percentage': round((count / analysis['total_students'] * 100) if analysis['total_students'] > 0 else 0, 2)
-            })
+        Args:
+            exam_id (int): 考试ID
+            grade_bands (list): 分数段配置，默认使用 Config.GRADE_BANDS
             
-        analysis['grade_distribution'] = grade_distribution
-        
-        # 获取最高分和最低分
-        score_query = """
-            SELECT MAX(score) as max_score, MIN(score) as min_score
-            FROM Scores 
-            WHERE exam_id = %s
+        Returns:
+            dict: 考试表现分析
         """
-        score_result = self.db_service.execute_query(score_query, (exam_id,))
-        analysis['max_score'] = float(score_result[0]['max_score']) if score_result and score_result[0]['max_score'] else 0
-        analysis['min_score'] = float(score_result[0]['min_score']) if score_result and score_result[0]['min_score'] else 0
-        
-        return analysis
\ No newline at end of file
+        return self.analyze_exams_performance([exam_id], grade_bands).get(exam_id)
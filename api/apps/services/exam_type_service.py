@@ -1,3 +1,4 @@
+from apps.utils.cache import cached, invalidate
 from apps.utils.database_service import DatabaseService
 from flask import current_app
 
@@ -13,7 +14,7 @@ class ExamTypeService:
                 FROM ExamTypes
                 ORDER BY exam_type_id
             """
-            exam_types = self.db_service.execute_query(query)
+            exam_types = cached('exam_types', 'all', lambda: self.db_service.execute_query(query))
             
             return exam_types
         except Exception as e:
@@ -24,7 +25,8 @@ class ExamTypeService:
     def get_exam_type_by_id(self, exam_type_id):
         try:
             query = "SELECT exam_type_id, exam_type_name FROM ExamTypes WHERE exam_type_id = %s"
-            result = self.db_service.execute_query(query, (exam_type_id,))
+            result = cached('exam_types', f'id:{exam_type_id}',
+                            lambda: self.db_service.execute_query(query, (exam_type_id,)))
             if not result:
                 current_app.logger.warning(f"Exam type {exam_type_id} does not exist")
             return result[0] if result else None
@@ -43,6 +45,7 @@ class ExamTypeService:
             
             insert_query = "INSERT INTO ExamTypes (exam_type_name) VALUES (%s)"
             exam_type_id = self.db_service.execute_update(insert_query, (exam_type_data.get('exam_type_name'),))
+            invalidate('exam_types')
             
             return exam_type_id
         except Exception as e:
@@ -59,6 +62,7 @@ class ExamTypeService:
             
             update_query = "UPDATE ExamTypes SET exam_type_name = %s WHERE exam_type_id = %s"
             self.db_service.execute_update(update_query, (exam_type_data.get('exam_type_name'), exam_type_id))
+            invalidate('exam_types')
             
             return True
         except Exception as e:
@@ -77,6 +81,7 @@ class ExamTypeService:
             delete_query = "DELETE FROM ExamTypes WHERE exam_type_id = %s"
             # execute_update returns the number of affected rows
             affected_rows = self.db_service.execute_update(delete_query, (exam_type_id,))
+            invalidate('exam_types')
             
             # Check if any rows were affected (meaning deletion was successful)
             return affected_rows > 0
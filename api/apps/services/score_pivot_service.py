@@ -0,0 +1,101 @@
+from apps.utils.cache import cached
+from apps.utils.database_service import DatabaseService
+from flask import current_app
+
+
+class ScorePivotService:
+    """
+    成绩透视服务
+
+    按 Subjects 表中的科目动态生成“学生 × 考试类型”一行、每个科目一列的成绩表，
+    替代 exam_results 视图中写死的六个科目列。支持按班级、考试类型、学生和科目过滤，
+    只透视需要的那部分成绩。
+    """
+
+    def __init__(self):
+        self.db_service = DatabaseService()
+
+    def get_subjects(self, subject_ids=None):
+        query = "SELECT subject_id, subject_name FROM Subjects"
+        params = []
+        if subject_ids:
+            query += f" WHERE subject_id IN ({', '.join(['%s'] * len(subject_ids))})"
+            params.extend(subject_ids)
+        query += " ORDER BY subject_id"
+        key = 'pivot:' + ','.join(str(subject_id) for subject_id in sorted(subject_ids or []))
+        return cached('subjects', key, lambda: self.db_service.execute_query(query, params))
+
+    def subject_key(self, subject_name):
+        """科目列名：已有科目沿用前端使用的英文列名，新科目直接使用科目名称"""
+        return current_app.config['SUBJECT_KEYS'].get(subject_name, subject_name)
+
+    def pivot_scores(self, class_id=None, exam_type_id=None, student_id=None, subject_ids=None):
+        """
+        透视成绩
+
+        Args:
+            class_id (int): 只包含该班级的学生
+            exam_type_id (int): 只包含该考试类型
+            student_id (str): 只包含该学生
+            subject_ids (list): 只包含这些科目，默认全部科目
+
+        Returns:
+            dict: subjects 为列定义，rows 为每个学生每次考试一行的成绩
+        """
+        try:
+            subjects = self.get_subjects(subject_ids)
+            if not subjects:
+                return {'subjects': [], 'rows': []}
+
+            columns = [{
+                'subject_id': subject['subject_id'],
+                'subject_name': subject['subject_name'],
+                'key': self.subject_key(subject['subject_name'])
+            } for subject in subjects]
+            key_by_subject = {column['subject_id']: column['key'] for column in columns}
+
+            conditions = [f"sc.subject_id IN ({', '.join(['%s'] * len(columns))})"]
+            params = [column['subject_id'] for column in columns]
+            if class_id:
+                conditions.append("s.class_id = %s")
+                params.append(class_id)
+            if exam_type_id:
+                conditions.append("sc.exam_type_id = %s")
+                params.append(exam_type_id)
+            if student_id:
+                conditions.append("sc.student_id = %s")
+                params.append(student_id)
+
+            query = f"""
+                SELECT sc.student_id, s.student_name, s.class_id,
+                       sc.exam_type_id, et.exam_type_name, sc.subject_id, sc.score
+                FROM Scores sc
+                JOIN Students s ON sc.student_id = s.student_id
+                JOIN ExamTypes et ON sc.exam_type_id = et.exam_type_id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY sc.exam_type_id, sc.student_id
+            """
+
+            rows = {}
+            for record in self.db_service.execute_query(query, params):
+                row_key = (record['student_id'], record['exam_type_id'])
+                row = rows.get(row_key)
+                if row is None:
+                    row = {
+                        'student_id': record['student_id'],
+                        'student_name': record['student_name'],
+                        'class_id': record['class_id'],
+                        'exam_type_id': record['exam_type_id'],
+                        'exam_type': record['exam_type_name']
+                    }
+                    row.update({column['key']: 0 for column in columns})
+                    row['total_score'] = 0
+                    rows[row_key] = row
+                score = record['score'] or 0
+                row[key_by_subject[record['subject_id']]] += score
+                row['total_score'] += score
+
+            return {'subjects': columns, 'rows': list(rows.values())}
+        except Exception as e:
+            current_app.logger.error(f"Failed to pivot scores: {str(e)}")
+            raise
@@ -1,4 +1,6 @@
+from apps.services.exam_result_service import ExamResultService
 from apps.utils.database_service import DatabaseService
+from apps.utils.pagination import PageRequest, paginate_query
 from flask import current_app
 
 
@@ -6,6 +8,7 @@ class ScoreService:
 
     def __init__(self):
         self.db_service = DatabaseService()
+        self.exam_result_service = ExamResultService()
 
     def get_student_scores(self, student_id):
         query = """
@@ -45,41 +48,65 @@ class ScoreService:
 
     def enter_scores(self, exam_id, scores_data):
         try:
+            # 同一学生重复提交时以最后一条为准
+            scores_by_student = {}
+            for score_data in scores_data:
+                scores_by_student[score_data['student_id']] = score_data['score']
+            student_ids = list(scores_by_student)
+            batch_size = current_app.config['DB_BATCH_SIZE']
+            
             inserted_count = 0
             updated_count = 0
             
-            for score_data in scores_data:
-                student_id = score_data['student_id']
-                score = score_data['score']
+            with self.db_service.transaction():
+                subject_query = "SELECT subject_id, exam_type_id FROM Exams WHERE exam_id = %s"
+                subject_result = self.db_service.execute_query(subject_query, (exam_id,))
+                subject_id = subject_result[0]['subject_id'] if subject_result else None
+                exam_type_id = subject_result[0]['exam_type_id'] if subject_result else None
                 
-                check_query = """
-                    SELECT score_id FROM Scores 
-                    WHERE exam_id = %s AND student_id = %s
-                """
-                existing = self.db_service.execute_query(check_query, (exam_id, student_id))
-                
-                if existing:
-                    update_query = """
-                        UPDATE Scores 
-                        SET score = %s 
-                        WHERE exam_id = %s AND student_id = %s
-                    """
-                    self.db_service.execute_update(update_query, (score, exam_id, student_id))
-                    updated_count += 1
-                else:
-                    subject_query = "SELECT subject_id FROM Exams WHERE exam_id = %s"
-                    subject_result = self.db_service.execute_query(subject_query, (exam_id,))
-                    if not subject_result:
-                        continue
-                        
-                    subject_id = subject_result[0]['subject_id']
+                for start in range(0, len(student_ids), batch_size):
+                    batch = student_ids[start:start + batch_size]
+                    placeholders = ', '.join(['%s'] * len(batch))
                     
-                    insert_query = """
-                        INSERT INTO Scores (score, exam_id, subject_id, student_id)
-                        VALUES (%s, %s, %s, %s)
+                    check_query = f"""
+                        SELECT student_id FROM Scores 
+                        WHERE exam_id = %s AND student_id IN ({placeholders})
                     """
-                    self.db_service.execute_update(insert_query, (score, exam_id, subject_id, student_id))
-                    inserted_count += 1
+                    existing = {
+                        row['student_id']
+                        for row in self.db_service.execute_query(check_query, [exam_id, *batch])
+                    }
+                    
+                    to_update = [student_id for student_id in batch if student_id in existing]
+                    if to_update:
+                        cases = ' '.join(['WHEN %s THEN %s'] * len(to_update))
+                        update_query = f"""
+                            UPDATE Scores 
+                            SET score = CASE student_id {cases} END 
+                            WHERE exam_id = %s AND student_id IN ({', '.join(['%s'] * len(to_update))})
+                        """
+                        params = [value for student_id in to_update
+                                  for value in (student_id, scores_by_student[student_id])]
+                        params.append(exam_id)
+                        params.extend(to_update)
+                        self.db_service.execute_update(update_query, params)
+                        updated_count += len(to_update)
+                    
+                    to_insert = [student_id for student_id in batch if student_id not in existing]
+                    if to_insert and subject_id is not None:
+                        insert_query = """
+                            INSERT INTO Scores (score, exam_id, subject_id, student_id)
+                            VALUES (%s, %s, %s, %s)
+                        """
+                        self.db_service.execute_many(
+                            insert_query,
+                            [(scores_by_student[student_id], exam_id, subject_id, student_id)
+                             for student_id in to_insert]
+                        )
+                        inserted_count += len(to_insert)
+                
+                if inserted_count or updated_count:
+                    self.exam_result_service.refresh_exam_types([exam_type_id])
             
             return {
                 'inserted_count': inserted_count,
@@ -90,7 +117,7 @@ class ScoreService:
             current_app.logger.error(f"Error entering scores: {str(e)}")
             raise
 
-    def get_exam_scores(self, exam_id):
+    def get_exam_scores(self, exam_id, stream=False):
         query = """
             SELECT s.score_id, s.score, s.exam_id, s.subject_id, s.student_id,
                    e.exam_name, e.exam_date, sub.subject_name, st.student_name, st.student_number
@@ -101,6 +128,8 @@ class ScoreService:
             WHERE s.exam_id = %s
             ORDER BY st.student_number
         """
+        if stream:
+            return self.db_service.stream_query(query, (exam_id,))
         return self.db_service.execute_query(query, (exam_id,))
 
     def update_score(self, score_id, score_data):
@@ -112,6 +141,10 @@ class ScoreService:
         update_query = "UPDATE Scores SET score = %s WHERE score_id = %s"
         self.db_service.execute_update(update_query, (score_data['score'], score_id))
         
+        exam_type_query = "SELECT exam_type_id FROM Scores WHERE score_id = %s"
+        exam_type_result = self.db_service.execute_query(exam_type_query, (score_id,))
+        self.exam_result_service.refresh_exam_types([row['exam_type_id'] for row in exam_type_result])
+        
         query = """
             SELECT s.score_id, s.score, s.exam_type_id, s.subject_id, s.student_id,
                    et.exam_type_name as exam_name, sub.subject_name, st.student_name, st.student_id as student_number
@@ -166,18 +199,7 @@ class ScoreService:
         return self.db_service.execute_query(query, (exam_id, class_id))
 
     def get_student_exam_results(self, student_id):
-        query = """
-            SELECT er.exam_type as exam_name, er.student_name, 
-                   er.chinese, er.math, er.english, 
-                   er.physics, er.chemistry, er.politics,
-                   er.total_score, er.ranking
-            FROM exam_results er
-            WHERE er.student_name = (
-                SELECT student_name FROM Students WHERE student_id = %s
-            )
-            ORDER BY er.exam_type
-        """
-        return self.db_service.execute_query(query, (student_id,))
+        return self.exam_result_service.get_student_results(student_id)
 
     def create_score(self, score_data):
         try:
@@ -197,6 +219,7 @@ class ScoreService:
                 insert_query, 
                 (student_id, subject_id, exam_type_id, score_value)
             )
+            self.exam_result_service.refresh_exam_types([exam_type_id])
             
             return score_id
         except Exception as e:
@@ -205,31 +228,53 @@ class ScoreService:
 
     def delete_score(self, score_id):
         try:
+            exam_type_query = "SELECT exam_type_id FROM Scores WHERE score_id = %s"
+            exam_type_result = self.db_service.execute_query(exam_type_query, (score_id,))
+            
             query = "DELETE FROM Scores WHERE score_id = %s"
             self.db_service.execute_update(query, (score_id,))
+            self.exam_result_service.refresh_exam_types([row['exam_type_id'] for row in exam_type_result])
             return True
         except Exception as e:
             current_app.logger.error(f"Failed to delete score: {str(e)}")
             raise
-        finally:
-            self.db_service.close()
 
-    def get_teacher_scores(self, teacher_id):
+    def get_teacher_scores(self, teacher_id, page=None, stream=False):
+        """
+        获取教师所教班级的成绩，按 score_id 倒序
+
+        支持 class_id、subject_id、exam_type_id 过滤和按 score_id 的 keyset 分页；
+        stream 为 True 且不分页时，成绩列表为流式读取的 RowStream
+
+        Returns:
+            tuple: (成绩列表, 分页信息)，未分页时分页信息为 None
+        """
         try:
-            query = """
-                SELECT s.score_id, s.score, s.exam_type_id, s.subject_id, s.student_id,
-                       et.exam_type_name as exam_name, sub.subject_name, 
-                       st.student_name, st.student_id as student_number
-                FROM Scores s
+            page = page or PageRequest()
+            conditions = ["tc.teacher_id = %s"]
+            params = [teacher_id]
+            for name, column in (('class_id', 'st.class_id'),
+                                 ('subject_id', 's.subject_id'),
+                                 ('exam_type_id', 's.exam_type_id')):
+                if page.filters.get(name):
+                    conditions.append(f"{column} = %s")
+                    params.append(page.filters[name])
+            
+            return paginate_query(
+                self.db_service,
+                """s.score_id, s.score, s.exam_type_id, s.subject_id, s.student_id,
+                   et.exam_type_name as exam_name, sub.subject_name,
+                   st.student_name, st.student_id as student_number""",
+                """Scores s
                 JOIN Students st ON s.student_id = st.student_id
                 JOIN Subjects sub ON s.subject_id = sub.subject_id
                 JOIN ExamTypes et ON s.exam_type_id = et.exam_type_id
-                JOIN TeacherClasses tc ON st.class_id = tc.class_id
-                WHERE tc.teacher_id = %s
-                ORDER BY s.score_id DESC
-            """
-            scores = self.db_service.execute_query(query, (teacher_id,))
-            
-            return scores
+                JOIN TeacherClasses tc ON st.class_id = tc.class_id""",
+                conditions, params,
+                [("s.score_id", "score_id")],
+                page,
+                descending=True,
+                stream=stream
+            )
         except Exception as e:
             raise e
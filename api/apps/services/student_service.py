@@ -1,4 +1,7 @@
+from apps.services.exam_result_service import ExamResultService
+from apps.utils.cache import invalidate
 from apps.utils.database_service import DatabaseService
+from apps.utils.pagination import PageRequest, paginate_query
 from flask import current_app
 
 
@@ -6,6 +9,7 @@ class StudentService:
 
     def __init__(self):
         self.db_service = DatabaseService()
+        self.exam_result_service = ExamResultService()
 
     def get_student_profile(self, student_id):
         try:
@@ -24,27 +28,40 @@ class StudentService:
                 current_app.logger.error(f"Failed to get student profile for {student_id}: {str(e)}")
             raise
 
-    def get_teacher_students(self, teacher_id, class_id=None):
+    def get_teacher_students(self, teacher_id, class_id=None, page=None, stream=False):
+        """
+        获取教师所教班级的学生
+
+        stream 为 True 且不分页时，学生列表为流式读取的 RowStream
+
+        Returns:
+            tuple: (学生列表, 分页信息)，未分页时分页信息为 None
+        """
         try:
-            base_query = """
-                SELECT s.student_id, s.student_name, c.class_name
-                FROM Students s
-                JOIN Classes c ON s.class_id = c.class_id
-                JOIN TeacherClasses tc ON c.class_id = tc.class_id
-                WHERE tc.teacher_id = %s
-            """
+            page = page or PageRequest()
+            class_id = class_id or page.filters.get('class_id')
+            conditions = ["tc.teacher_id = %s"]
             params = [teacher_id]
             
             if class_id:
-                base_query += " AND c.class_id = %s"
+                conditions.append("c.class_id = %s")
                 params.append(class_id)
             
-            base_query += " ORDER BY s.student_id"
-            
-            students = self.db_service.execute_query(base_query, params)
-            current_app.logger.info(f"Retrieved {len(students)} students for teacher {teacher_id}")
+            students, pagination = paginate_query(
+                self.db_service,
+                "s.student_id, s.student_name, c.class_name",
+                """Students s
+                JOIN Classes c ON s.class_id = c.class_id
+                JOIN TeacherClasses tc ON c.class_id = tc.class_id""",
+                conditions, params,
+                [("s.student_id", "student_id")],
+                page,
+                stream=stream
+            )
+            if pagination or not stream:
+                current_app.logger.info(f"Retrieved {len(students)} students for teacher {teacher_id}")
             
-            return students
+            return students, pagination
         except Exception as e:
             if current_app:
                 current_app.logger.error(f"Failed to get teacher students: {str(e)}")
@@ -85,19 +102,36 @@ class StudentService:
                 current_app.logger.error(f"Failed to get student by name {student_name}: {str(e)}")
             raise e
 
-    def get_all_students(self):
+    def get_all_students(self, page=None, stream=False):
+        """
+        获取全部学生，可按 class_id 过滤并按学号做 keyset 分页
+
+        stream 为 True 且不分页时，学生列表为流式读取的 RowStream
+
+        Returns:
+            tuple: (学生列表, 分页信息)，未分页时分页信息为 None
+        """
         try:
-            base_query = """
-                SELECT s.student_id, s.student_name, c.class_name
-                FROM Students s
-                JOIN Classes c ON s.class_id = c.class_id
-                ORDER BY s.student_id
-            """
+            page = page or PageRequest()
+            conditions = []
+            params = []
+            if page.filters.get('class_id'):
+                conditions.append("s.class_id = %s")
+                params.append(page.filters['class_id'])
             
-            students = self.db_service.execute_query(base_query)
-            current_app.logger.info(f"Retrieved {len(students)} students")
+            students, pagination = paginate_query(
+                self.db_service,
+                "s.student_id, s.student_name, c.class_name",
+                "Students s JOIN Classes c ON s.class_id = c.class_id",
+                conditions, params,
+                [("s.student_id", "student_id")],
+                page,
+                stream=stream
+            )
+            if pagination or not stream:
+                current_app.logger.info(f"Retrieved {len(students)} students")
             
-            return students
+            return students, pagination
         except Exception as e:
             if current_app:
                 current_app.logger.error(f"Failed to get all students: {str(e)}")
@@ -108,6 +142,7 @@ class StudentService:
             query = "UPDATE Students SET student_name = %s WHERE student_id = %s"
             params = (student_name, student_id)
             self.db_service.execute_update(query, params)
+            self.exam_result_service.refresh_student_name(student_id, student_name)
             return True
         except Exception as e:
             if current_app:
@@ -128,6 +163,8 @@ class StudentService:
             )
             
             self.db_service.execute_update(student_query, student_params)
+            # 班级列表中的学生人数随之变化
+            invalidate('classes')
             
             current_app.logger.info(f"Student {student_data['student_id']} created successfully")
             return {"student_id": student_data['student_id']}
@@ -154,6 +191,10 @@ class StudentService:
             params.append(student_id)
             
             result = self.db_service.execute_update(query, params)
+            if result > 0 and 'class_id' in update_data:
+                invalidate('classes')
+            if result > 0 and 'student_name' in update_data:
+                self.exam_result_service.refresh_student_name(student_id, update_data['student_name'])
             return result > 0
             
         except Exception as e:
@@ -171,14 +212,20 @@ class StudentService:
                     current_app.logger.warning(f"Student {student_id} not found for deletion")
                 return False
             
-            scores_query = "DELETE FROM Scores WHERE student_id = %s"
-            scores_result = self.db_service.execute_update(scores_query, (student_id,))
+            exam_type_ids = self.exam_result_service.get_student_exam_types(student_id)
             
-            if current_app:
-                current_app.logger.info(f"Deleted {scores_result} score records for student {student_id}")
-            
-            student_query = "DELETE FROM Students WHERE student_id = %s"
-            student_result = self.db_service.execute_update(student_query, (student_id,))
+            # 成绩和学生记录在同一事务中删除，避免只删掉一半
+            with self.db_service.transaction():
+                scores_query = "DELETE FROM Scores WHERE student_id = %s"
+                scores_result = self.db_service.execute_update(scores_query, (student_id,))
+                
+                if current_app:
+                    current_app.logger.info(f"Deleted {scores_result} score records for student {student_id}")
+                
+                student_query = "DELETE FROM Students WHERE student_id = %s"
+                student_result = self.db_service.execute_update(student_query, (student_id,))
+                invalidate('classes')
+                self.exam_result_service.refresh_exam_types(exam_type_ids)
             
             if current_app:
                 current_app.logger.info(f"Delete student {student_id} result: {student_result}")
@@ -1,3 +1,4 @@
+from apps.utils.cache import cached, invalidate
 from apps.utils.database_service import DatabaseService
 from flask import current_app
 
@@ -9,7 +10,7 @@ class SubjectService:
     def get_all_subjects(self):
         try:
             query = "SELECT subject_id, subject_name FROM Subjects ORDER BY subject_id"
-            subjects = self.db_service.execute_query(query)
+            subjects = cached('subjects', 'all', lambda: self.db_service.execute_query(query))
             
             return subjects
         except Exception as e:
@@ -19,7 +20,8 @@ class SubjectService:
     def get_subject_by_id(self, subject_id):
         try:
             query = "SELECT subject_id, subject_name FROM Subjects WHERE subject_id = %s"
-            result = self.db_service.execute_query(query, (subject_id,))
+            result = cached('subjects', f'id:{subject_id}',
+                            lambda: self.db_service.execute_query(query, (subject_id,)))
             return result[0] if result else None
         except Exception as e:
             current_app.logger.error(f"Failed to get subject by id {subject_id}: {str(e)}")
@@ -34,6 +36,7 @@ class SubjectService:
             
             insert_query = "INSERT INTO Subjects (subject_name) VALUES (%s)"
             subject_id = self.db_service.execute_update(insert_query, (subject_data['subject_name'],))
+            invalidate('subjects')
             
             return subject_id
         except Exception as e:
@@ -47,6 +50,8 @@ class SubjectService:
                 
             update_query = "UPDATE Subjects SET subject_name = %s WHERE subject_id = %s"
             self.db_service.execute_update(update_query, (subject_data['subject_name'], subject_id))
+            # 教师列表中带有科目名称
+            invalidate('subjects', 'teachers')
             
             return True
         except Exception as e:
@@ -60,6 +65,7 @@ class SubjectService:
             
             delete_query = "DELETE FROM Subjects WHERE subject_id = %s"
             self.db_service.execute_update(delete_query, (subject_id,))
+            invalidate('subjects', 'teachers')
             
             return True
         except Exception as e:
@@ -1,4 +1,5 @@
 from apps.services.class_service import ClassService
+from apps.utils.cache import cached, invalidate
 from apps.utils.database_service import DatabaseService
 from flask import current_app
 
@@ -79,7 +80,7 @@ class TeacherService:
                 LEFT JOIN Subjects s ON t.subject_id = s.subject_id
                 ORDER BY t.teacher_id
             """
-            teachers = self.db_service.execute_query(query)
+            teachers = cached('teachers', 'all', lambda: self.db_service.execute_query(query))
             
             return teachers
         except Exception as e:
@@ -95,7 +96,8 @@ class TeacherService:
                 LEFT JOIN Subjects s ON t.subject_id = s.subject_id
                 WHERE t.teacher_id = %s
             """
-            result = self.db_service.execute_query(query, (teacher_id,))
+            result = cached('teachers', f'id:{teacher_id}',
+                            lambda: self.db_service.execute_query(query, (teacher_id,)))
             return result[0] if result else None
         except Exception as e:
             if current_app:
@@ -116,6 +118,7 @@ class TeacherService:
                 insert_query, 
                 (teacher_data['teacher_name'], teacher_data['subject_id'], teacher_data.get('password', 'pass123'))
             )
+            invalidate('teachers')
             
             # Get the created teacher
             select_query = """
@@ -153,6 +156,7 @@ class TeacherService:
             params.append(teacher_id)
             update_query = f"UPDATE Teachers SET {', '.join(fields)} WHERE teacher_id = %s"
             self.db_service.execute_update(update_query, params)
+            invalidate('teachers')
             
             return True
         except Exception as e:
@@ -161,46 +165,37 @@ class TeacherService:
             return False
     
     def delete_teacher(self, teacher_id):
-        connection = None
         try:
-            connection = self.db_service.get_connection()
-            connection.autocommit(False)
-            
-            with connection.cursor() as cursor:
-                # 检查教师是否存在
-                check_query = "SELECT COUNT(*) as count FROM Teachers WHERE teacher_id = %s"
-                cursor.execute(check_query, (teacher_id,))
-                check_result = cursor.fetchone()
-                
-                if not check_result or check_result['count'] == 0:
-                    connection.rollback()
-                    current_app.logger.warning(f"Teacher {teacher_id} does not exist")
-                    return False
-                
-                # 删除与该教师相关的考试记录（如果表存在）
-                try:
-                    delete_exams_query = "DELETE FROM Exams WHERE teacher_id = %s"
-                    cursor.execute(delete_exams_query, (teacher_id,))
-                except Exception as e:
-                    current_app.logger.warning(f"Could not delete exams for teacher {teacher_id}: {str(e)}")
-                
-                # 删除教师班级关联记录
-                delete_tc_query = "DELETE FROM TeacherClasses WHERE teacher_id = %s"
-                cursor.execute(delete_tc_query, (teacher_id,))
-                
-                # 删除教师本身
-                delete_teacher_query = "DELETE FROM Teachers WHERE teacher_id = %s"
-                affected_rows = cursor.execute(delete_teacher_query, (teacher_id,))
-                
-                connection.commit()
-                return affected_rows > 0
+            with self.db_service.transaction() as connection:
+                with connection.cursor() as cursor:
+                    # 检查教师是否存在
+                    check_query = "SELECT COUNT(*) as count FROM Teachers WHERE teacher_id = %s"
+                    cursor.execute(check_query, (teacher_id,))
+                    check_result = cursor.fetchone()
+                    
+                    if not check_result or check_result['count'] == 0:
+                        current_app.logger.warning(f"Teacher {teacher_id} does not exist")
+                        return False
+                    
+                    # 删除与该教师相关的考试记录（如果表存在）
+                    try:
+                        delete_exams_query = "DELETE FROM Exams WHERE teacher_id = %s"
+                        cursor.execute(delete_exams_query, (teacher_id,))
+                    except Exception as e:
+                        current_app.logger.warning(f"Could not delete exams for teacher {teacher_id}: {str(e)}")
+                    
+                    # 删除教师班级关联记录
+                    delete_tc_query = "DELETE FROM TeacherClasses WHERE teacher_id = %s"
+                    cursor.execute(delete_tc_query, (teacher_id,))
+                    
+                    # 删除教师本身
+                    delete_teacher_query = "DELETE FROM Teachers WHERE teacher_id = %s"
+                    affected_rows = cursor.execute(delete_teacher_query, (teacher_id,))
+                    invalidate('teachers')
+                    
+                    return affected_rows > 0
                 
         except Exception as e:
-            if connection:
-                connection.rollback()
             if current_app:
                 current_app.logger.error(f"Failed to delete teacher {teacher_id}: {str(e)}")
             raise e
-        finally:
-            if connection:
-                connection.autocommit(True)
@@ -0,0 +1,183 @@
+import copy
+import importlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app
+
+from apps.utils.database_service import in_transaction, on_commit
+
+
+_cache_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+
+class CacheBackend:
+    """
+    缓存后端接口
+
+    多个 API 进程共享缓存时实现该接口（例如基于 Redis），
+    并在 Config.CACHE_BACKEND 中配置为 'module.path:ClassName'。
+    """
+
+    def get(self, key):
+        """返回 (是否命中, 值)"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class MemoryCache(CacheBackend):
+    """进程内 TTL + LRU 缓存，读取时返回副本，调用方修改结果不会污染缓存"""
+
+    def __init__(self, default_ttl=300, max_entries=1024):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self._expirations += 1
+                return False, None
+            self._entries.move_to_end(key)
+        return True, copy.deepcopy(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
+
+
+def _create_backend(config):
+    backend = config['CACHE_BACKEND']
+    options = dict(config['CACHE_OPTIONS'])
+    options.setdefault('default_ttl', config['CACHE_DEFAULT_TTL'])
+    options.setdefault('max_entries', config['CACHE_MAX_ENTRIES'])
+    if backend == 'memory':
+        return MemoryCache(**options)
+    module_name, class_name = backend.split(':')
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    return backend_class(**options)
+
+
+def get_cache(app=None):
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('cache')
+    if cache is None:
+        with _cache_lock:
+            cache = app.extensions.get('cache')
+            if cache is None:
+                cache = _create_backend(app.config)
+                app.extensions['cache'] = cache
+    return cache
+
+
+def _record(namespace, hit):
+    counters = current_app.extensions.setdefault('cache_counters', {})
+    with _stats_lock:
+        namespace_counters = counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+        namespace_counters['hits' if hit else 'misses'] += 1
+
+
+def _namespace_version(cache, namespace):
+    # 命名空间版本号：失效时换一个版本号即可让整个命名空间的旧键失效，共享后端无需按前缀删除
+    found, version = cache.get(f"ns:{namespace}")
+    if not found:
+        version = uuid.uuid4().hex
+        cache.set(f"ns:{namespace}", version, ttl=0)
+    return version
+
+
+def cached(namespace, key, loader, ttl=None):
+    """
+    读穿缓存：命中直接返回，未命中时调用 loader 并写入缓存
+
+    事务中直接读库：既要读到本事务自己的写入，也不能把未提交的数据写进缓存
+    """
+    if not current_app.config['CACHE_ENABLED'] or in_transaction():
+        return loader()
+    cache = get_cache()
+    full_key = f"{namespace}:{_namespace_version(cache, namespace)}:{key}"
+    found, value = cache.get(full_key)
+    _record(namespace, found)
+    if found:
+        return value
+    value = loader()
+    cache.set(full_key, value, ttl)
+    return value
+
+
+def invalidate(*namespaces):
+    """使命名空间失效；处于请求事务中时推迟到提交之后，避免并发请求把旧数据重新缓存"""
+    def _invalidate():
+        cache = get_cache()
+        for namespace in namespaces:
+            cache.set(f"ns:{namespace}", uuid.uuid4().hex, ttl=0)
+    on_commit(_invalidate)
+
+
+def cache_stats():
+    """命中/未命中按命名空间统计，后端统计（条目数、淘汰数等）放在 backend 下"""
+    with _stats_lock:
+        namespaces = {
+            namespace: dict(counters)
+            for namespace, counters in current_app.extensions.get('cache_counters', {}).items()
+        }
+    hits = sum(counters['hits'] for counters in namespaces.values())
+    misses = sum(counters['misses'] for counters in namespaces.values())
+    for counters in namespaces.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        'namespaces': namespaces,
+        'backend': get_cache().stats()
+    }
@@ -0,0 +1,232 @@
+import threading
+import time
+from collections import deque
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeoutError(TimeoutError):
+    """连接池已满且在等待超时内没有可用连接"""
+
+
+class PooledConnection:
+    """连接池中的连接代理，close() 时归还连接池而不是断开"""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = created_at
+        self.last_used = time.monotonic()
+        self._checked_out = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self):
+        if self._checked_out:
+            self._pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    有界 MySQL 连接池
+
+    - 最多 max_size 个物理连接，满时调用方在等待队列中等待 timeout 秒
+    - 借出时对空闲超过 ping_interval 的连接做健康检查
+    - 超过 recycle 秒的老连接和空闲超过 idle_timeout 秒的连接会被回收
+    """
+
+    def __init__(self, connect_kwargs, max_size=10, timeout=5.0, recycle=3600,
+                 idle_timeout=300, ping_interval=30, logger=None):
+        self._connect_kwargs = dict(connect_kwargs)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self._logger = logger
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self._total_checkouts = 0
+        self._total_created = 0
+        self._total_discarded = 0
+        self._total_timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _log(self, level, message):
+        if self._logger:
+            getattr(self._logger, level)(message)
+
+    def _is_expired(self, conn, now):
+        if self.recycle and now - conn.created_at > self.recycle:
+            return True
+        if self.idle_timeout and now - conn.last_used > self.idle_timeout:
+            return True
+        return False
+
+    def _create(self):
+        raw = pymysql.connect(**self._connect_kwargs)
+        with self._cond:
+            self._total_created += 1
+        self._log('info', f"Database connection established: {self._connect_kwargs.get('database')} "
+                          f"on {self._connect_kwargs.get('host')} as {self._connect_kwargs.get('user')}")
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _close_raw(self, conn):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn):
+        """丢弃一个已被计入 size 的连接并唤醒等待者"""
+        self._close_raw(conn)
+        with self._cond:
+            self._size -= 1
+            self._total_discarded += 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn, now):
+        if not self.ping_interval or now - conn.last_used < self.ping_interval:
+            return True
+        try:
+            conn.raw.ping(reconnect=False)
+            return True
+        except Exception as e:
+            self._log('warning', f"Discarding unhealthy pooled connection: {str(e)}")
+            return False
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            conn = None
+            expired = []
+            create = False
+
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    while self._idle:
+                        candidate = self._idle.pop()
+                        if self._is_expired(candidate, now):
+                            self._size -= 1
+                            self._total_discarded += 1
+                            expired.append(candidate)
+                            continue
+                        conn = candidate
+                        break
+                    if conn is None and self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                    if conn is not None or create:
+                        self._in_use += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._total_timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool size {self.max_size})")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            for stale in expired:
+                self._close_raw(stale)
+
+            if create:
+                try:
+                    conn = self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, time.monotonic()):
+                with self._cond:
+                    self._in_use -= 1
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._total_checkouts += 1
+                self._wait_time_total += waited
+                if waited > self._wait_time_max:
+                    self._wait_time_max = waited
+            conn._checked_out = True
+            return conn
+
+    def release(self, conn):
+        conn._checked_out = False
+        healthy = True
+        try:
+            # 未提交的事务不能带回池中，同时恢复自动提交避免长期持有读快照
+            in_trans = conn.raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS
+            if in_trans or not conn.raw.get_autocommit():
+                conn.raw.rollback()
+            if not conn.raw.get_autocommit():
+                conn.raw.autocommit(True)
+        except Exception as e:
+            self._log('warning', f"Discarding pooled connection on release: {str(e)}")
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+        if not healthy or not conn.raw.open:
+            self._discard(conn)
+            return
+
+        conn.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_raw(conn)
+
+    def stats(self):
+        with self._cond:
+            checkouts = self._total_checkouts
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'total_checkouts': checkouts,
+                'total_created': self._total_created,
+                'total_discarded': self._total_discarded,
+                'total_timeouts': self._total_timeouts,
+                'wait_time_total': round(self._wait_time_total, 6),
+                'wait_time_avg': round(self._wait_time_total / checkouts, 6) if checkouts else 0.0,
+                'wait_time_max': round(self._wait_time_max, 6)
+            }
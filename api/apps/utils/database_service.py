@@ -1,68 +1,298 @@
-from flask import current_app
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, make_response
 import pymysql
 
+from apps.utils.connection_pool import ConnectionPool
+from apps.utils.query_profiler import record_connect, record_statement
+from apps.utils.responses import error_response
+from apps.utils.slow_query_log import record_slow_query
+
+
+_pool_lock = threading.Lock()
+
+
+def get_pool(app=None):
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get('db_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = app.extensions.get('db_pool')
+            if pool is None:
+                config = app.config
+                db_config = {
+                    'host': config['MYSQL_HOST'],
+                    'user': config['MYSQL_USER'],
+                    'password': config['MYSQL_PASSWORD'],
+                    'database': config['MYSQL_DB'],
+                    'charset': 'utf8mb4',
+                    'cursorclass': pymysql.cursors.DictCursor,
+                    'autocommit': True
+                }
+                pool = ConnectionPool(
+                    db_config,
+                    max_size=config['DB_POOL_SIZE'],
+                    timeout=config['DB_POOL_TIMEOUT'],
+                    recycle=config['DB_POOL_RECYCLE'],
+                    idle_timeout=config['DB_POOL_IDLE_TIMEOUT'],
+                    ping_interval=config['DB_POOL_PING_INTERVAL'],
+                    logger=app.logger
+                )
+                app.extensions['db_pool'] = pool
+    return pool
+
 
 def get_db_connection():
     try:
-        config = current_app.config
-        db_config = {
-            'host': config['MYSQL_HOST'],
-            'user': config['MYSQL_USER'],
-            'password': config['MYSQL_PASSWORD'],
-            'database': config['MYSQL_DB'],
-            'charset': 'utf8mb4',
-            'cursorclass': pymysql.cursors.DictCursor
-        }
-        
-        connection = pymysql.connect(**db_config)
-        current_app.logger.info("Database connection established")
-        current_app.logger.info(f"Connected to database: {config['MYSQL_DB']} on {config['MYSQL_HOST']} as {config['MYSQL_USER']}")
+        start = time.perf_counter()
+        connection = get_pool().acquire()
+        record_connect(time.perf_counter() - start)
         return connection
     except Exception as e:
         current_app.logger.error(f"Failed to establish database connection: {str(e)}")
         raise
 
 
+def _check_slow_query(connection, query, params, rows, seconds, batch_size=None):
+    """耗时达到 SLOW_QUERY_SECONDS 时写慢查询日志，写日志失败不影响查询结果"""
+    threshold = current_app.config['SLOW_QUERY_SECONDS']
+    if threshold is not None and seconds >= threshold:
+        try:
+            record_slow_query(connection, query, params, rows, seconds, batch_size)
+        except Exception as e:
+            current_app.logger.warning(f"Failed to record slow query: {str(e)}")
+
+
+def _record_statement(connection, query, params, rows, seconds):
+    record_statement(query, params, rows, seconds)
+    _check_slow_query(connection, query, params, rows, seconds)
+
+
+class _UnitOfWork:
+    """请求级工作单元：整个请求共用一个连接，写操作在一个事务内提交"""
+
+    def __init__(self):
+        self.connection = None
+        self.in_transaction = False
+        self.failed = False
+        self.after_commit = []
+
+
+def _get_unit_of_work():
+    uow = g.get('_db_unit_of_work')
+    if uow is None:
+        uow = _UnitOfWork()
+        g._db_unit_of_work = uow
+    if uow.connection is None:
+        uow.connection = get_db_connection()
+    return uow
+
+
+def _begin(uow):
+    if not uow.in_transaction:
+        uow.connection.begin()
+        uow.in_transaction = True
+
+
+def _finish(uow, commit):
+    if not uow.in_transaction:
+        return
+    uow.in_transaction = False
+    failed, uow.failed = uow.failed, False
+    callbacks, uow.after_commit = uow.after_commit, []
+    if commit and not failed:
+        uow.connection.commit()
+        for callback in callbacks:
+            callback()
+    else:
+        uow.connection.rollback()
+
+
+def in_transaction():
+    uow = g.get('_db_unit_of_work')
+    return bool(uow and uow.in_transaction)
+
+
+def on_commit(callback):
+    """事务提交后执行回调（如缓存失效）；当前没有事务时立即执行，回滚时丢弃"""
+    uow = g.get('_db_unit_of_work')
+    if uow and uow.in_transaction:
+        uow.after_commit.append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def transaction():
+    uow = _get_unit_of_work()
+    if uow.in_transaction:
+        # 已处于事务中时并入外层事务，由外层决定提交或回滚
+        try:
+            yield uow.connection
+        except Exception:
+            uow.failed = True
+            raise
+        return
+
+    _begin(uow)
+    try:
+        yield uow.connection
+    except Exception:
+        _finish(uow, commit=False)
+        raise
+    _finish(uow, commit=True)
+
+
+def commit_request_transaction(response):
+    uow = g.get('_db_unit_of_work')
+    if uow is None or not uow.in_transaction:
+        return response
+    try:
+        _finish(uow, commit=response.status_code < 400)
+    except Exception as e:
+        current_app.logger.error(f"Failed to commit request transaction: {str(e)}")
+        return make_response(error_response('Internal server error', 500))
+    return response
+
+
+def release_request_connection(exc=None):
+    uow = g.pop('_db_unit_of_work', None)
+    if uow is None or uow.connection is None:
+        return
+    try:
+        _finish(uow, commit=exc is None)
+    except Exception as e:
+        current_app.logger.error(f"Failed to finish request transaction: {str(e)}")
+    finally:
+        uow.connection.close()
+
+
 def execute_query(query, params=None):
-    connection = None
     try:
-        connection = get_db_connection()
+        connection = _get_unit_of_work().connection
         with connection.cursor() as cursor:
+            start = time.perf_counter()
             cursor.execute(query, params)
             result = cursor.fetchall()
+            _record_statement(connection, query, params, len(result), time.perf_counter() - start)
             return result
     except Exception as e:
         current_app.logger.error(f"Database query error: {str(e)}")
         current_app.logger.error(f"Query: {query}")
         current_app.logger.error(f"Params: {params}")
         raise
-    finally:
-        if connection:
-            connection.close()
 
 
 def execute_update(query, params=None):
-    connection = None
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
+        uow = _get_unit_of_work()
+        _begin(uow)
+        with uow.connection.cursor() as cursor:
+            start = time.perf_counter()
             result = cursor.execute(query, params)
-            connection.commit()
+            _record_statement(uow.connection, query, params, result, time.perf_counter() - start)
             
             if query.strip().upper().startswith('INSERT'):
                 return cursor.lastrowid
             else:
                 return result
     except Exception as e:
-        if connection:
-            connection.rollback()
         current_app.logger.error(f"Database update error: {str(e)}")
         current_app.logger.error(f"Query: {query}")
         current_app.logger.error(f"Params: {params}")
         raise
-    finally:
-        if connection:
-            connection.close()
+
+
+def execute_many(query, seq_of_params):
+    try:
+        uow = _get_unit_of_work()
+        _begin(uow)
+        with uow.connection.cursor() as cursor:
+            # INSERT ... VALUES 语句会被 PyMySQL 合并成多行插入
+            start = time.perf_counter()
+            result = cursor.executemany(query, seq_of_params)
+            seconds = time.perf_counter() - start
+            record_statement(query, seq_of_params, result, seconds)
+            _check_slow_query(uow.connection, query, seq_of_params[0] if seq_of_params else None,
+                              result, seconds, len(seq_of_params))
+            return result
+    except Exception as e:
+        current_app.logger.error(f"Database batch update error: {str(e)}")
+        current_app.logger.error(f"Query: {query}")
+        current_app.logger.error(f"Batch size: {len(seq_of_params)}")
+        raise
+
+
+class RowStream:
+    """
+    服务端游标结果的迭代器
+
+    逐批 fetchmany 读取，读完或调用 close()（如客户端断开）时关闭游标并归还连接。
+    未读完就关闭时直接断开物理连接（连接池随之丢弃它），避免为关闭游标读完剩余结果。
+    """
+
+    def __init__(self, connection, cursor, fetch_size, logger):
+        self._connection = connection
+        self._cursor = cursor
+        self._fetch_size = fetch_size
+        self._logger = logger
+        self._exhausted = False
+
+    def __iter__(self):
+        try:
+            while self._cursor is not None:
+                rows = self._cursor.fetchmany(self._fetch_size)
+                if not rows:
+                    self._exhausted = True
+                    break
+                yield from rows
+        except Exception as e:
+            self._logger.error(f"Database stream read error: {str(e)}")
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        cursor, self._cursor = self._cursor, None
+        if cursor is None:
+            return
+        try:
+            if self._exhausted:
+                cursor.close()
+            else:
+                self._connection.raw.close()
+        except Exception as e:
+            self._logger.warning(f"Failed to close stream cursor: {str(e)}")
+        finally:
+            self._connection.close()
+
+
+def stream_query(query, params=None, fetch_size=None):
+    """
+    用服务端（非缓冲）游标执行查询，返回 RowStream
+
+    查询在调用时立即执行，SQL 错误仍由调用方按普通异常处理；
+    结果集在独立的连接上读取，不占用请求工作单元的连接，也不受其事务影响。
+    """
+    fetch_size = fetch_size or current_app.config['STREAM_FETCH_SIZE']
+    connection = get_db_connection()
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        # 结果在响应输出时才读取，这里只记录执行耗时，行数未知
+        # 流式连接正在读取结果，慢查询不做 EXPLAIN
+        _record_statement(None, query, params, None, time.perf_counter() - start)
+    except Exception as e:
+        current_app.logger.error(f"Database stream query error: {str(e)}")
+        current_app.logger.error(f"Query: {query}")
+        current_app.logger.error(f"Params: {params}")
+        cursor.close()
+        connection.close()
+        raise
+    return RowStream(connection, cursor, fetch_size, current_app.logger)
 
 
 class DatabaseService:
@@ -76,4 +306,20 @@ class DatabaseService:
     def execute_update(self, query, params=None):
         return execute_update(query, params)
 
+    def execute_many(self, query, seq_of_params):
+        return execute_many(query, seq_of_params)
+
+    def stream_query(self, query, params=None, fetch_size=None):
+        return stream_query(query, params, fetch_size)
+
+    def transaction(self):
+        return transaction()
+
+    def in_transaction(self):
+        return in_transaction()
+
+    def on_commit(self, callback):
+        on_commit(callback)
 
+    def get_pool_stats(self):
+        return get_pool().stats()
@@ -5,6 +5,7 @@ import time
 from flask import request, current_app, session
 
 from apps.utils.responses import error_response
+from apps.utils.structured_logging import get_exception_limiter
 
 
 def auth_required(f):
@@ -55,10 +56,14 @@ def _generate_request_id():
 
 
 def _log_exception(e, request_id, func_name):
-    """Log the exception"""
-    error_msg = f"[{request_id}] {type(e).__name__}: {str(e)}"
-    current_app.logger.error(error_msg)
-    current_app.logger.exception(f"[{request_id}] Exception in {func_name}")
+    """Log the exception; identical exceptions within LOG_EXCEPTION_WINDOW are logged once"""
+    allowed, suppressed = get_exception_limiter().allow((type(e).__name__, func_name, str(e)))
+    if not allowed:
+        return
+    error_msg = f"[{request_id}] {type(e).__name__} in {func_name}: {str(e)}"
+    if suppressed:
+        error_msg += f" ({suppressed} identical exceptions suppressed)"
+    current_app.logger.error(error_msg, exc_info=e)
 
 
 def _handle_specific_exception(e):
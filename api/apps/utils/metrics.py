@@ -0,0 +1,230 @@
+import itertools
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+
+class MetricsRegistry:
+    """
+    计数器和直方图
+
+    线程第一次记录时按顺序轮流分到固定数量的分片，每个分片一把锁：并发的线程落在不同分片上，记录时几乎没有锁竞争；
+    分片数量固定，开发服务器每个请求一个线程时也不会随线程数增长。导出时逐个分片复制后合并。
+    """
+
+    def __init__(self, buckets, shards=16):
+        self.buckets = tuple(sorted(buckets))
+        self._shards = [(threading.Lock(), {}, {}) for _ in range(shards)]
+        self._local = threading.local()
+        # next() 在 GIL 下是原子的，多个线程同时分配时不会拿到同一个序号
+        self._next_shard = itertools.count()
+
+    def _shard(self):
+        # 线程编号是对齐的地址，直接取模会全部落在同一个分片上，因此按线程轮流分配
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._shards[next(self._next_shard) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        lock, counters, _ = self._shard()
+        key = (name, labels)
+        with lock:
+            counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """直方图：各桶（最后一个为 +Inf）的计数，末尾两项为总和与次数"""
+        lock, _, histograms = self._shard()
+        key = (name, labels)
+        index = bisect_left(self.buckets, value)
+        with lock:
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = [0] * (len(self.buckets) + 3)
+                histograms[key] = histogram
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def collect(self):
+        """合并所有分片，返回 (计数器, 直方图)"""
+        counters = {}
+        histograms = {}
+        for lock, shard_counters, shard_histograms in self._shards:
+            with lock:
+                shard_counters = dict(shard_counters)
+                shard_histograms = {key: list(values) for key, values in shard_histograms.items()}
+            for key, value in shard_counters.items():
+                counters[key] = counters.get(key, 0) + value
+            for key, values in shard_histograms.items():
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+        return counters, histograms
+
+
+# 指标名称、类型和说明
+METRICS = {
+    'http_requests_total': ('counter', '请求数（按路由、方法和状态码）'),
+    'http_request_duration_seconds': ('histogram', '请求处理耗时（不含流式响应的输出时间）'),
+    'db_queries_total': ('counter', '执行的 SQL 语句数（按路由）'),
+    'db_query_duration_seconds': ('histogram', 'SQL 语句执行耗时（按路由）'),
+    'db_connection_acquire_seconds': ('histogram', '从连接池取得连接的耗时'),
+}
+
+
+def get_registry(app=None):
+    app = app or current_app._get_current_object()
+    return app.extensions.get('metrics')
+
+
+def _route_label():
+    if not has_request_context():
+        return 'none'
+    rule = request.url_rule
+    # 使用路由模板而不是实际路径，避免学号等参数导致标签无限增长
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def start_request_timer():
+    g._metrics_start = time.perf_counter()
+
+
+def record_request(response):
+    registry = get_registry()
+    start = g.pop('_metrics_start', None)
+    if registry is None or start is None:
+        return response
+    route = _route_label()
+    registry.inc('http_requests_total', (route, request.method, str(response.status_code)))
+    registry.observe('http_request_duration_seconds', (route, request.method), time.perf_counter() - start)
+    return response
+
+
+def record_query(seconds):
+    if not has_app_context():
+        return
+    registry = get_registry()
+    if registry is not None:
+        route = _route_label()
+        registry.inc('db_queries_total', (route,))
+        registry.observe('db_query_duration_seconds', (route,), seconds)
+
+
+def record_connection_acquire(seconds):
+    if not has_app_context():
+        return
+    registry = get_registry()
+    if registry is not None:
+        registry.observe('db_connection_acquire_seconds', (), seconds)
+
+
+LABEL_NAMES = {
+    'http_requests_total': ('route', 'method', 'status'),
+    'http_request_duration_seconds': ('route', 'method'),
+    'db_queries_total': ('route',),
+    'db_query_duration_seconds': ('route',),
+    'db_connection_acquire_seconds': (),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _gauges(lines, name, help_text, values):
+    """values 为 [(标签字符串, 值)]"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, value in values:
+        lines.append(f"{name}{labels} {_format_value(value)}")
+
+
+def render_prometheus(pool_stats=None, cache=None):
+    """
+    以 Prometheus 文本格式导出全部指标
+
+    Args:
+        pool_stats (dict): 连接池统计（ConnectionPool.stats()）
+        cache (dict): 缓存统计（cache_stats()）
+    """
+    registry = get_registry()
+    counters, histograms = registry.collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        names = LABEL_NAMES[name]
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(names, labels)} {_format_value(value)}")
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(registry.buckets + ('+Inf',), values):
+                cumulative += count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                bucket_labels = _labels(names, labels, 'le="' + le + '"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_format_value(float(values[-2]))}")
+            lines.append(f"{name}_count{_labels(names, labels)} {values[-1]}")
+
+    if pool_stats is not None:
+        for key in ('max_size', 'size', 'in_use', 'idle', 'waiting'):
+            _gauges(lines, f"db_pool_{key}", f"连接池 {key}", [('', pool_stats[key])])
+        for key in ('total_checkouts', 'total_created', 'total_discarded', 'total_timeouts'):
+            name = f"db_pool_{key[len('total_'):]}_total"
+            lines.append(f"# HELP {name} 连接池累计 {key[len('total_'):]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {pool_stats[key]}")
+        lines.append("# HELP db_pool_wait_seconds_total 等待空闲连接的累计耗时")
+        lines.append("# TYPE db_pool_wait_seconds_total counter")
+        lines.append(f"db_pool_wait_seconds_total {_format_value(float(pool_stats['wait_time_total']))}")
+
+    if cache is not None:
+        namespaces = sorted(cache['namespaces'].items())
+        for key, kind in (('hits', 'counter'), ('misses', 'counter')):
+            name = f"cache_{key}_total"
+            lines.append(f"# HELP {name} 缓存{'命中' if key == 'hits' else '未命中'}次数（按命名空间）")
+            lines.append(f"# TYPE {name} {kind}")
+            for namespace, counters_by_namespace in namespaces:
+                lines.append(f'{name}{{namespace="{_escape(namespace)}"}} {counters_by_namespace[key]}')
+        _gauges(lines, 'cache_hit_ratio', '缓存命中率（按命名空间）',
+                [(f'{{namespace="{_escape(namespace)}"}}', item['hit_ratio']) for namespace, item in namespaces])
+        backend = cache['backend']
+        if 'entries' in backend:
+            _gauges(lines, 'cache_entries', '缓存条目数', [('', backend['entries'])])
+        for key in ('evictions', 'expirations'):
+            if key in backend:
+                lines.append(f"# HELP cache_{key}_total 缓存后端累计 {key}")
+                lines.append(f"# TYPE cache_{key}_total counter")
+                lines.append(f"cache_{key}_total {backend[key]}")
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """创建指标注册表并注册请求计时钩子"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.extensions['metrics'] = MetricsRegistry(app.config['METRICS_LATENCY_BUCKETS'])
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
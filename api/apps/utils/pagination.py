@@ -0,0 +1,150 @@
+import base64
+import json
+
+from flask import current_app, request
+
+from apps.utils.responses import error_response
+
+
+class PageRequest:
+    """
+    分页参数
+
+    limit 为 None 表示不分页（兼容旧接口一次返回全部数据的行为）；
+    cursor 是上一页最后一行排序键的值，用于 keyset 分页。
+    """
+
+    def __init__(self, limit=None, cursor=None, include_total=False, filters=None):
+        self.limit = limit
+        self.cursor = cursor
+        self.include_total = include_total
+        self.filters = filters or {}
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_page_request(filter_names=()):
+    """
+    从查询参数解析分页和过滤条件
+
+    支持 limit、cursor、include_total 以及 filter_names 中列出的整数过滤参数。
+    只有传了 limit 或 cursor 才分页。
+
+    Returns:
+        tuple: (PageRequest, error_response)
+    """
+    args = request.args
+    filters = {}
+    for name in filter_names:
+        if args.get(name) in (None, ''):
+            continue
+        value = args.get(name, type=int)
+        if value is None:
+            return None, error_response(f"参数 {name} 必须是整数", 400)
+        filters[name] = value
+
+    limit = None
+    cursor = None
+    if 'limit' in args or 'cursor' in args:
+        limit = args.get('limit', current_app.config['PAGE_DEFAULT_LIMIT'], type=int)
+        if limit is None or limit <= 0:
+            return None, error_response("参数 limit 必须是正整数", 400)
+        limit = min(limit, current_app.config['PAGE_MAX_LIMIT'])
+        if args.get('cursor'):
+            try:
+                cursor = decode_cursor(args['cursor'])
+            except ValueError:
+                return None, error_response("无效的分页游标", 400)
+
+    include_total = args.get('include_total', '').lower() in ('1', 'true', 'yes')
+    return PageRequest(limit, cursor, include_total, filters), None
+
+
+def _keyset_condition(columns, descending):
+    """(a, b) > (x, y) 展开为 a > x OR (a = x AND b > y)，便于 MySQL 使用索引做范围扫描"""
+    operator = '<' if descending else '>'
+    clauses = []
+    for i, column in enumerate(columns):
+        parts = [f"{previous} = %s" for previous in columns[:i]]
+        parts.append(f"{column} {operator} %s")
+        clauses.append(f"({' AND '.join(parts)})")
+    return f"({' OR '.join(clauses)})"
+
+
+def _keyset_params(values):
+    params = []
+    for i in range(len(values)):
+        params.extend(values[:i + 1])
+    return params
+
+
+def paginate_query(db_service, select, from_clause, conditions, params, order_by, page,
+                   descending=False, stream=False):
+    """
+    执行 keyset 分页查询
+
+    Args:
+        db_service (DatabaseService): 数据库服务
+        select (str): SELECT 列表
+        from_clause (str): FROM 及 JOIN 部分
+        conditions (list): WHERE 条件，AND 连接
+        params (list): 条件参数
+        order_by (list): 排序键 [(列表达式, 结果中的字段名)]，需唯一确定一行
+        page (PageRequest): 分页参数
+        descending (bool): 是否按排序键倒序
+        stream (bool): 不分页时用服务端游标流式读取，数据返回 RowStream
+
+    Returns:
+        tuple: (当前页数据, 分页信息)；不分页时分页信息为 None
+    """
+    conditions = list(conditions)
+    params = list(params)
+    columns = [column for column, _ in order_by]
+
+    pagination = None
+    if page.paginated:
+        pagination = {'limit': page.limit}
+        if page.include_total:
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            count_query = f"SELECT COUNT(*) AS total FROM {from_clause} {where}"
+            pagination['total'] = db_service.execute_query(count_query, params)[0]['total']
+        if page.cursor is not None:
+            if len(page.cursor) != len(columns):
+                raise ValueError("Invalid cursor")
+            conditions.append(_keyset_condition(columns, descending))
+            params.extend(_keyset_params(page.cursor))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = ' DESC' if descending else ''
+    query = f"SELECT {select} FROM {from_clause} {where} ORDER BY {', '.join(column + direction for column in columns)}"
+    if not page.paginated:
+        if stream:
+            return db_service.stream_query(query, params), None
+        return db_service.execute_query(query, params), None
+
+    # 多取一行判断是否还有下一页
+    query += " LIMIT %s"
+    rows = db_service.execute_query(query, params + [page.limit + 1])
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+    pagination['has_more'] = has_more
+    pagination['next_cursor'] = encode_cursor([rows[-1][key] for _, key in order_by]) if has_more else None
+    return rows, pagination
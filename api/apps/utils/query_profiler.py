@@ -0,0 +1,159 @@
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+
+from flask import current_app, g, has_request_context, request
+
+from apps.utils.metrics import record_connection_acquire, record_query
+from apps.utils.structured_logging import request_sampled
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """
+    语句指纹：参数占位符、字面量统一为 ?，IN 列表合并为 (?+)，空白压缩为一个空格
+
+    只相差参数或 IN 列表长度的语句得到相同的指纹
+    """
+    text = ' '.join(query.split())
+    text = text.replace('%s', '?')
+    text = _STRING_LITERAL.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    return _PLACEHOLDER_LIST.sub('(?+)', text)
+
+
+class QueryProfile:
+    """一个请求内执行的全部语句"""
+
+    def __init__(self):
+        self.statements = []
+        self.connect_seconds = 0.0
+        self.connects = 0
+
+    def add_statement(self, query, params, rows, seconds):
+        self.statements.append({
+            'fingerprint': fingerprint(query),
+            'params': params,
+            'rows': rows,
+            'seconds': seconds
+        })
+
+    def repeated(self, threshold):
+        """
+        执行次数达到 threshold 的指纹
+
+        Returns:
+            list: [(指纹, 次数, 不同参数的组数)]，参数完全相同说明同一查询执行了多次，
+            参数各不相同通常是循环中逐条查询（N+1）
+        """
+        counts = Counter(item['fingerprint'] for item in self.statements)
+        result = []
+        for text, count in counts.most_common():
+            if count < threshold:
+                break
+            distinct = {repr(item['params']) for item in self.statements if item['fingerprint'] == text}
+            result.append((text, count, len(distinct)))
+        return result
+
+    def summary(self):
+        return {
+            'queries': len(self.statements),
+            'distinct': len({item['fingerprint'] for item in self.statements}),
+            'rows': sum(item['rows'] or 0 for item in self.statements),
+            'execute_ms': sum(item['seconds'] for item in self.statements) * 1000,
+            'connects': self.connects,
+            'connect_ms': self.connect_seconds * 1000
+        }
+
+
+def _current_profile():
+    if not has_request_context() or not current_app.config['QUERY_PROFILING']:
+        return None
+    profile = g.get('_query_profile')
+    if profile is None:
+        profile = QueryProfile()
+        g._query_profile = profile
+    return profile
+
+
+def record_connect(seconds):
+    """记录从连接池取得连接的耗时（包括新建连接和健康检查）"""
+    record_connection_acquire(seconds)
+    profile = _current_profile()
+    if profile is not None:
+        profile.connects += 1
+        profile.connect_seconds += seconds
+
+
+def record_statement(query, params, rows, seconds):
+    """
+    记录一条语句
+
+    Args:
+        query (str): SQL
+        params: 参数（用于判断重复执行的语句参数是否相同）
+        rows (int): 返回或影响的行数，流式查询为 None
+        seconds (float): 执行（含读取结果）耗时
+    """
+    record_query(seconds)
+    profile = _current_profile()
+    if profile is not None:
+        profile.add_statement(query, params, rows, seconds)
+
+
+def _params_count(params):
+    if params is None:
+        return 0
+    if isinstance(params, (list, tuple, dict)):
+        return len(params)
+    return 1
+
+
+def finish_query_profile(response):
+    """
+    请求结束时写请求日志并添加 Server-Timing 响应头
+
+    汇总和逐条语句的日志随请求日志一起采样，重复语句的 warning 始终记录
+
+    db 为语句执行总耗时，db-connect 为取连接耗时；同一指纹重复执行达到
+    QUERY_REPEAT_THRESHOLD 次时以 warning 记录，便于发现重复查询和 N+1
+    """
+    profile = g.pop('_query_profile', None)
+    if profile is None:
+        return response
+    summary = profile.summary()
+    request_id = getattr(request, 'request_id', '-')
+    if request_sampled():
+        current_app.logger.info(
+            f"[{request_id}] DB: {summary['queries']} queries ({summary['distinct']} distinct), "
+            f"{summary['rows']} rows, execute {summary['execute_ms']:.2f}ms, "
+            f"connect {summary['connect_ms']:.2f}ms ({summary['connects']} acquires)",
+            extra={'fields': {'db': summary}}
+        )
+        for item in profile.statements:
+            current_app.logger.debug(
+                f"[{request_id}] SQL {item['seconds'] * 1000:.2f}ms rows={item['rows']} "
+                f"params={_params_count(item['params'])}: {item['fingerprint']}"
+            )
+    for text, count, distinct in profile.repeated(current_app.config['QUERY_REPEAT_THRESHOLD']):
+        kind = 'duplicate' if distinct == 1 else 'N+1'
+        current_app.logger.warning(
+            f"[{request_id}] Repeated statement ({kind}): {count} executions, "
+            f"{distinct} distinct params: {text}"
+        )
+
+    timings = [
+        f'db;dur={summary["execute_ms"]:.2f};desc="{summary["queries"]} queries"',
+        f'db-connect;dur={summary["connect_ms"]:.2f}'
+    ]
+    start_time = getattr(request, 'start_time', None)
+    if start_time is not None:
+        timings.append(f'app;dur={(time.time() - start_time) * 1000:.2f}')
+    response.headers.add('Server-Timing', ', '.join(timings))
+    return response
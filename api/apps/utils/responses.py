@@ -1,5 +1,5 @@
 from datetime import datetime
-from flask import jsonify
+from flask import current_app, jsonify
 
 
 def success_response(data=None, message="Success"):
@@ -37,4 +37,37 @@ def error_response(message="Error", status_code=400):
         'message': message,
         'timestamp': datetime.now().isoformat()
     }
-    return jsonify(response), status_code
\ No newline at end of file
+    return jsonify(response), status_code
+
+def stream_success_response(rows, key, data=None, message="Success"):
+    """
+    流式返回成功响应
+
+    与 success_response 的结构相同，rows 逐行序列化后分块写出，放在 data[key] 中，
+    内存占用与结果行数无关。rows 带有 close() 时（如 RowStream），响应结束后会被调用。
+    """
+    json_provider = current_app.json
+    chunk_size = current_app.config['STREAM_FETCH_SIZE']
+    extra = json_provider.dumps(data)[1:-1] + ',' if data else ''
+    head = '{"data":{' + extra + json_provider.dumps(key) + ':['
+    tail = ']},"message":' + json_provider.dumps(message) + ',"success":true,"timestamp":' + \
+        json_provider.dumps(datetime.now().isoformat()) + '}'
+
+    def generate():
+        yield head
+        separator = ''
+        chunk = []
+        for row in rows:
+            chunk.append(json_provider.dumps(row))
+            if len(chunk) >= chunk_size:
+                yield separator + ','.join(chunk)
+                separator = ','
+                chunk = []
+        if chunk:
+            yield separator + ','.join(chunk)
+        yield tail + '\n'
+
+    response = current_app.response_class(generate(), mimetype=json_provider.mimetype)
+    if hasattr(rows, 'close'):
+        response.call_on_close(rows.close)
+    return response
@@ -0,0 +1,63 @@
+import math
+from bisect import bisect_left, bisect_right
+
+
+def _percentile(sorted_scores, p):
+    """线性插值百分位数（与 numpy 默认算法一致）"""
+    if not sorted_scores:
+        return 0
+    position = (len(sorted_scores) - 1) * p / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return float(sorted_scores[lower])
+    weight = position - lower
+    return float(sorted_scores[lower] * (1 - weight) + sorted_scores[upper] * weight)
+
+
+def summarize_scores(scores, grade_bands, percentiles=()):
+    """
+    一次遍历计算成绩统计
+
+    Args:
+        scores (list): 成绩列表，None（缺考）计入人数，不参与其余统计，与 COUNT(*) 和 AVG(score) 一致
+        grade_bands (list): 分数段配置，形如 {'name': ..., 'min': ..., 'max': ...}，闭区间；
+            各分数段分别计数，允许重叠（如“及格”与“优秀”）和重名
+        percentiles (iterable): 需要计算的百分位，如 (25, 75, 90)
+
+    Returns:
+        dict: 人数、平均分、最高/最低分、中位数、标准差、百分位和分数段分布
+    """
+    total_students = len(scores)
+    values = sorted(float(score) for score in scores if score is not None)
+    count = len(values)
+
+    total = 0.0
+    total_sq = 0.0
+    for value in values:
+        total += value
+        total_sq += value * value
+
+    mean = total / count if count else 0
+    variance = max(total_sq / count - mean * mean, 0) if count else 0
+
+    grade_distribution = []
+    for band in grade_bands:
+        # 成绩已排序，每个分数段的人数是两次二分查找的下标差
+        band_count = bisect_right(values, band['max']) - bisect_left(values, band['min'])
+        grade_distribution.append({
+            'range': band['name'],
+            'count': band_count,
+            'percentage': round((band_count / total_students * 100) if total_students > 0 else 0, 2)
+        })
+
+    return {
+        'total_students': total_students,
+        'average_score': mean,
+        'max_score': values[-1] if values else 0,
+        'min_score': values[0] if values else 0,
+        'median_score': _percentile(values, 50),
+        'std_dev': round(math.sqrt(variance), 4),
+        'percentiles': {f'p{p}': _percentile(values, p) for p in percentiles},
+        'grade_distribution': grade_distribution
+    }
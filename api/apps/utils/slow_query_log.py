@@ -0,0 +1,122 @@
+import json
+import logging
+import sys
+import threading
+
+from flask import current_app, has_request_context, request
+
+from apps.utils.query_profiler import fingerprint
+from apps.utils.structured_logging import create_log_writer
+
+"""
+慢查询日志
+
+执行耗时达到 SLOW_QUERY_SECONDS 的语句写入 SLOW_QUERY_LOG_PATH（JSON Lines）：指纹、SQL、参数、耗时、
+调用方（服务类.方法）和路由；每个指纹的前 SLOW_QUERY_EXPLAIN_LIMIT 次附带 EXPLAIN FORMAT=JSON 的执行计划。
+汇总报告见 slow_query_report.py。
+"""
+
+
+# 可以 EXPLAIN 的语句
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+
+class SlowQueryLog:
+    """写慢查询日志，并记录每个指纹已捕获执行计划的次数"""
+
+    def __init__(self, logger, explain_limit):
+        self.logger = logger
+        self.explain_limit = explain_limit
+        self._explained = {}
+        self._lock = threading.Lock()
+
+    def should_explain(self, text):
+        with self._lock:
+            count = self._explained.get(text, 0)
+            if count >= self.explain_limit:
+                return False
+            self._explained[text] = count + 1
+            return True
+
+
+def init_slow_query_log(app):
+    if app.config['SLOW_QUERY_SECONDS'] is None:
+        return
+    logger = logging.getLogger('scout.slow_query')
+    # logger 是进程内全局的，多次 create_app（如测试）时只创建一个写日志的后台线程
+    if not logger.handlers:
+        logger.addHandler(create_log_writer(app, app.config['SLOW_QUERY_LOG_PATH']))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    app.extensions['slow_query_log'] = SlowQueryLog(logger, app.config['SLOW_QUERY_EXPLAIN_LIMIT'])
+
+
+def find_caller():
+    """
+    调用方：调用栈中第一个服务类方法（apps.services 中以 self 调用的函数），
+    没有时取第一个不属于 apps.utils 的函数
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        # 跳过服务方法内的 lambda、推导式等，取外层的方法名
+        if not module.startswith('apps.utils.') and not frame.f_code.co_name.startswith('<'):
+            owner = frame.f_locals.get('self')
+            if owner is not None and module.startswith('apps.services.'):
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            if fallback is None:
+                fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+def _explain(connection, query, params):
+    """在给定连接上执行 EXPLAIN FORMAT=JSON，返回解析后的执行计划"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN FORMAT=JSON {query}", params)
+        row = cursor.fetchone()
+    value = next(iter(row.values())) if isinstance(row, dict) else row[0]
+    return json.loads(value)
+
+
+def record_slow_query(connection, query, params, rows, seconds, batch_size=None):
+    """
+    记录一条慢查询
+
+    Args:
+        connection: 执行语句的连接，用于 EXPLAIN；流式查询的连接正在读取结果，传 None 时不 EXPLAIN，
+            避免请求线程再占用一个连接池连接（连接池繁忙时会在输出第一行前阻塞）
+        params: 语句参数，批量执行时为第一组参数
+        rows (int): 返回或影响的行数，流式查询为 None
+        seconds (float): 执行耗时
+        batch_size (int): 批量执行的参数组数
+    """
+    slow_log = current_app.extensions.get('slow_query_log')
+    if slow_log is None:
+        return
+    text = fingerprint(query)
+    fields = {
+        'fingerprint': text,
+        'sql': ' '.join(query.split()),
+        'params': params,
+        'duration_ms': round(seconds * 1000, 2),
+        'rows': rows,
+        'caller': find_caller()
+    }
+    if batch_size is not None:
+        fields['batch_size'] = batch_size
+    if has_request_context():
+        fields['route'] = request.url_rule.rule if request.url_rule is not None else None
+        fields['request_id'] = getattr(request, 'request_id', None)
+
+    if connection is None:
+        fields['explain_skipped'] = 'stream'
+    elif query.lstrip().split(None, 1)[0].upper() in EXPLAINABLE and slow_log.should_explain(text):
+        try:
+            fields['explain'] = _explain(connection, query, params)
+        except Exception as e:
+            fields['explain_error'] = str(e)
+
+    slow_log.logger.warning(f"{fields['duration_ms']:.2f}ms {fields['caller']}: {text}", extra={'fields': fields})
+    current_app.logger.warning(f"Slow query {fields['duration_ms']:.2f}ms in {fields['caller']}: {text}")
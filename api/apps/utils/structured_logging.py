@@ -0,0 +1,194 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import current_app, g, has_request_context, request
+
+
+class JsonLineFormatter(logging.Formatter):
+    """每条记录输出一行 JSON；extra={'fields': {...}} 传入的字段合并到记录中"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'module': record.module,
+            'message': record.getMessage()
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['traceback'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """文件超过 max_bytes 或距上次轮转超过 interval 秒时轮转，保留 backup_count 个旧文件"""
+
+    def __init__(self, filename, max_bytes, interval, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at and os.path.getsize(self.baseFilename) > 0:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    请求线程只格式化消息并放入有界队列，文件写入由 QueueListener 的后台线程完成；
+    队列已满时丢弃记录并计数，不阻塞请求
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 参数和异常堆栈必须在请求线程中转成文本，之后记录才能跨线程传递
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, 'request_id') and has_request_context():
+            record.request_id = getattr(request, 'request_id', None)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def create_log_writer(app, path, level=logging.NOTSET):
+    """
+    创建写入 path 的队列 handler：文件由后台线程写入（JSON Lines），按大小和时间轮转，
+    进程退出时停止后台线程并写完队列中的记录
+    """
+    file_handler = SizeAndTimeRotatingFileHandler(
+        path,
+        max_bytes=app.config['LOG_MAX_BYTES'],
+        interval=app.config['LOG_ROTATE_INTERVAL'],
+        backup_count=app.config['LOG_BACKUP_COUNT']
+    )
+    file_handler.setLevel(level)
+    file_handler.setFormatter(JsonLineFormatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(app.config['LOG_QUEUE_SIZE']))
+    listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler
+
+
+def setup_logging(app):
+    """应用日志写入 LOG_FILE_PATH"""
+    # app.logger 按应用名称全局共享，多次 create_app（如测试）时复用已有的 handler，
+    # 避免重复写入同一条日志，也避免多个后台线程轮转同一个文件
+    queue_handler = next((handler for handler in app.logger.handlers
+                          if isinstance(handler, NonBlockingQueueHandler)), None)
+    if queue_handler is None:
+        queue_handler = create_log_writer(app, app.config['LOG_FILE_PATH'], app.config['LOG_LEVEL'])
+        app.logger.addHandler(queue_handler)
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    app.extensions['log_queue_handler'] = queue_handler
+    app.extensions['exception_limiter'] = ExceptionRateLimiter(app.config['LOG_EXCEPTION_WINDOW'])
+
+
+def _sample_rate():
+    rule = request.url_rule
+    route = rule.rule if rule is not None else None
+    return current_app.config['LOG_SAMPLE_RATES'].get(route, current_app.config['LOG_SAMPLE_RATE'])
+
+
+def start_request_log():
+    """请求开始时决定本请求的日志是否被采样"""
+    g.log_sampled = random.random() < _sample_rate()
+
+
+def request_sampled():
+    """本请求的明细日志（请求日志、语句统计）是否输出"""
+    return g.get('log_sampled', True)
+
+
+def log_request(response):
+    """
+    每个请求一条访问日志
+
+    只记录方法、路径、路由、状态码和耗时，不记录参数和请求体；未被采样的请求只在出错
+    （状态码 >= 400）或耗时超过 LOG_SLOW_REQUEST_SECONDS 时记录
+    """
+    start_time = getattr(request, 'start_time', None)
+    duration = time.time() - start_time if start_time is not None else 0.0
+    if not (request_sampled() or response.status_code >= 400
+            or duration >= current_app.config['LOG_SLOW_REQUEST_SECONDS']):
+        return response
+    rule = request.url_rule
+    current_app.logger.info(
+        f"{request.method} {request.path} {response.status_code} {duration * 1000:.2f}ms",
+        extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'route': rule.rule if rule is not None else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'remote_addr': request.remote_addr
+        }}
+    )
+    return response
+
+
+class ExceptionRateLimiter:
+    """
+    相同异常（类型、位置、消息相同）在 window 秒内只允许记录一次；
+    窗口结束后再次出现时返回期间被抑制的次数
+    """
+
+    def __init__(self, window, max_keys=1024):
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def allow(self, key):
+        """
+        Returns:
+            tuple: (是否记录, 上次记录后被抑制的次数)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                return False, 0
+            suppressed = entry[1] if entry is not None else 0
+            if entry is None and len(self._entries) >= self.max_keys:
+                # 清理已过期的条目，避免不同消息的异常使字典无限增长
+                self._entries = {k: v for k, v in self._entries.items() if now - v[0] < self.window}
+            self._entries[key] = [now, 0]
+            return True, suppressed
+
+
+def get_exception_limiter(app=None):
+    app = app or current_app._get_current_object()
+    return app.extensions['exception_limiter']
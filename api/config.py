@@ -10,6 +10,60 @@ class Config:
     MYSQL_PASSWORD = 'Newuser1'
     MYSQL_DB = 'school_management'
     
+    # 数据库连接池
+    DB_POOL_SIZE = 10
+    DB_POOL_TIMEOUT = 5.0
+    DB_POOL_RECYCLE = 3600
+    DB_POOL_IDLE_TIMEOUT = 300
+    DB_POOL_PING_INTERVAL = 30
+    
+    # 批量写入每批行数
+    DB_BATCH_SIZE = 1000
+    
+    # 列表接口分页：传 limit 或 cursor 时启用，limit 不超过 PAGE_MAX_LIMIT
+    PAGE_DEFAULT_LIMIT = 100
+    PAGE_MAX_LIMIT = 1000
+    
+    # 不分页的大列表（成绩、学生）用服务端游标流式输出，每批读取 STREAM_FETCH_SIZE 行
+    STREAM_RESPONSES = True
+    STREAM_FETCH_SIZE = 500
+    
+    # 记录每个请求执行的语句：请求日志中输出汇总，响应头 Server-Timing 输出数据库耗时；
+    # 同一语句指纹在一个请求中执行达到 QUERY_REPEAT_THRESHOLD 次时记录 warning（重复查询或 N+1）
+    QUERY_PROFILING = True
+    QUERY_REPEAT_THRESHOLD = 2
+    
+    # /api/metrics 以 Prometheus 文本格式输出各路由请求数、状态码、延迟直方图以及数据库、连接池和缓存指标
+    METRICS_ENABLED = True
+    METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    
+    # 参考数据（科目、考试类型、班级、教师）读缓存
+    CACHE_ENABLED = True
+    CACHE_BACKEND = 'memory'  # 或 'module.path:ClassName'，用于多进程共享的缓存后端
+    CACHE_OPTIONS = {}
+    CACHE_DEFAULT_TTL = 300
+    CACHE_MAX_ENTRIES = 1024
+    
+    # 成绩分析：分数段（闭区间）和需要计算的百分位
+    GRADE_BANDS = [
+        {'name': '优秀 (90-100)', 'min': 90, 'max': 100},
+        {'name': '良好 (80-89)', 'min': 80, 'max': 89},
+        {'name': '中等 (70-79)', 'min': 70, 'max': 79},
+        {'name': '及格 (60-69)', 'min': 60, 'max': 69},
+        {'name': '不及格 (0-59)', 'min': 0, 'max': 59}
+    ]
+    SCORE_PERCENTILES = (25, 75, 90)
+    
+    # 成绩透视：科目名称到结果列名的映射，未配置的科目直接使用科目名称作为列名
+    SUBJECT_KEYS = {
+        '语文': 'chinese',
+        '数学': 'math',
+        '英语': 'english',
+        '物理': 'physics',
+        '化学': 'chemistry',
+        '政治': 'politics'
+    }
+    
     SESSION_TYPE = 'filesystem'
     SESSION_FILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions')
     SESSION_PERMANENT = False
@@ -20,8 +74,29 @@ class Config:
     LOGS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'logs'))
     LOG_FILE_PATH = os.path.join(LOGS_DIR, 'app.log')
     LOG_LEVEL = 'DEBUG'
+    # 日志由后台线程以 JSON Lines 写入，队列满时丢弃；文件超过 LOG_MAX_BYTES 或每 LOG_ROTATE_INTERVAL 秒轮转
+    LOG_QUEUE_SIZE = 10000
+    LOG_MAX_BYTES = 50 * 1024 * 1024
+    LOG_ROTATE_INTERVAL = 24 * 3600
+    LOG_BACKUP_COUNT = 10
+    # 请求日志采样比例，LOG_SAMPLE_RATES 按路由模板覆盖（如 {'/api/student/exam_results/<student_id>': 0.1}）；
+    # 出错和超过 LOG_SLOW_REQUEST_SECONDS 的请求始终记录
+    LOG_SAMPLE_RATE = 1.0
+    LOG_SAMPLE_RATES = {}
+    LOG_SLOW_REQUEST_SECONDS = 1.0
+    # 相同异常在 LOG_EXCEPTION_WINDOW 秒内只记录一次完整堆栈
+    LOG_EXCEPTION_WINDOW = 60
+    # 执行耗时达到 SLOW_QUERY_SECONDS 的语句写入慢查询日志（None 为关闭），每个指纹的前
+    # SLOW_QUERY_EXPLAIN_LIMIT 次附带 EXPLAIN FORMAT=JSON；汇总: python slow_query_report.py
+    SLOW_QUERY_SECONDS = 0.2
+    SLOW_QUERY_LOG_PATH = os.path.join(LOGS_DIR, 'slow_query.log')
+    SLOW_QUERY_EXPLAIN_LIMIT = 3
     
     TEST_DIR = os.path.join(LOGS_DIR, 'test')
+    # 压测结果（tests/load_test.py）单独保存，测试会话开始时清理 TEST_DIR 不会删除用于 --compare 的基线
+    LOAD_TEST_DIR = os.path.join(LOGS_DIR, 'load_test')
+    # 接口测试的执行方式：'inprocess' 用 Flask 测试客户端在进程内执行，'curl' 对 HOST:PORT 上运行的服务执行 curl
+    TEST_CLIENT = 'inprocess'
     
     TESTING = False
     DEBUG = True
@@ -31,6 +106,7 @@ class Config:
     ensure_dir_exists(SESSION_FILE_DIR)
     ensure_dir_exists(LOGS_DIR)
     ensure_dir_exists(TEST_DIR)
+    ensure_dir_exists(LOAD_TEST_DIR)
 
 
 config = {
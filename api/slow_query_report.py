@@ -0,0 +1,155 @@
+import argparse
+import glob
+import json
+import os
+import sys
+
+from config import Config
+
+"""
+慢查询报告
+
+按指纹汇总慢查询日志（Config.SLOW_QUERY_LOG_PATH 及其轮转出的旧文件）：次数、总耗时、平均/最大耗时、
+调用方、路由，以及捕获到的执行计划中耗时最长的一次。在 api 目录下运行:
+
+    python slow_query_report.py --top 10
+    python slow_query_report.py --sort max_ms --plan
+"""
+
+
+def _plan_tables(node, result):
+    """收集执行计划中各表的访问方式"""
+    if isinstance(node, dict):
+        table = node.get('table')
+        if isinstance(table, dict) and 'table_name' in table:
+            result.append(table)
+        for value in node.values():
+            _plan_tables(value, result)
+    elif isinstance(node, list):
+        for value in node:
+            _plan_tables(value, result)
+    return result
+
+
+def _plan_flags(node, flags):
+    if isinstance(node, dict):
+        for key in ('using_filesort', 'using_temporary_table'):
+            if node.get(key):
+                flags.add(key)
+        for value in node.values():
+            _plan_flags(value, flags)
+    elif isinstance(node, list):
+        for value in node:
+            _plan_flags(value, flags)
+    return flags
+
+
+def summarize_plan(plan):
+    """执行计划摘要：查询成本、各表的访问类型、使用的索引、每次扫描的行数以及文件排序/临时表"""
+    lines = []
+    cost = plan.get('query_block', {}).get('cost_info', {}).get('query_cost')
+    if cost is not None:
+        lines.append(f"query_cost={cost}")
+    for table in _plan_tables(plan, []):
+        lines.append(
+            f"{table['table_name']}: access={table.get('access_type')} key={table.get('key')} "
+            f"rows={table.get('rows_examined_per_scan')} filtered={table.get('filtered')}"
+        )
+    flags = _plan_flags(plan, set())
+    if flags:
+        lines.append(', '.join(sorted(flags)))
+    return lines
+
+
+def read_entries(paths):
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def aggregate(entries):
+    """
+    按指纹汇总
+
+    Returns:
+        list: 每个指纹的次数、总耗时、平均/最大耗时、调用方、路由和最慢一次的执行计划
+    """
+    groups = {}
+    for entry in entries:
+        text = entry.get('fingerprint')
+        if not text:
+            continue
+        group = groups.setdefault(text, {
+            'fingerprint': text, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'callers': set(), 'routes': set(), 'plan': None, 'plan_ms': None
+        })
+        duration = entry.get('duration_ms', 0.0)
+        group['count'] += 1
+        group['total_ms'] += duration
+        group['max_ms'] = max(group['max_ms'], duration)
+        if entry.get('caller'):
+            group['callers'].add(entry['caller'])
+        if entry.get('route'):
+            group['routes'].add(entry['route'])
+        # 执行计划只在每个指纹的前几次捕获，取其中耗时最长的一次
+        if entry.get('explain') and (group['plan_ms'] is None or duration > group['plan_ms']):
+            group['plan'] = entry['explain']
+            group['plan_ms'] = duration
+    for group in groups.values():
+        group['avg_ms'] = group['total_ms'] / group['count']
+    return list(groups.values())
+
+
+def log_files(path):
+    """慢查询日志及其轮转出的旧文件"""
+    return [file for file in [path] + sorted(glob.glob(f"{path}.*")) if os.path.isfile(file)]
+
+
+def print_report(groups, sort, top, show_plan):
+    groups = sorted(groups, key=lambda group: group[sort], reverse=True)[:top]
+    print(f"{'总耗时(ms)':>12}{'次数':>8}{'平均(ms)':>12}{'最大(ms)':>12}  调用方 / 指纹")
+    for group in groups:
+        print(f"{group['total_ms']:>12.1f}{group['count']:>8}{group['avg_ms']:>12.1f}{group['max_ms']:>12.1f}  "
+              f"{', '.join(sorted(group['callers'])) or '-'}")
+        print(f"{'':>44}  {group['fingerprint']}")
+        if group['routes']:
+            print(f"{'':>44}  路由: {', '.join(sorted(group['routes']))}")
+        if group['plan'] is not None:
+            print(f"{'':>44}  最慢的执行计划（{group['plan_ms']:.1f}ms）:")
+            if show_plan:
+                for line in json.dumps(group['plan'], ensure_ascii=False, indent=2).splitlines():
+                    print(f"{'':>46}{line}")
+            else:
+                for line in summarize_plan(group['plan']):
+                    print(f"{'':>46}{line}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按指纹汇总慢查询日志')
+    parser.add_argument('path', nargs='?', default=Config.SLOW_QUERY_LOG_PATH,
+                        help='慢查询日志（默认 Config.SLOW_QUERY_LOG_PATH，包括轮转出的旧文件）')
+    parser.add_argument('--sort', choices=['total_ms', 'count', 'max_ms', 'avg_ms'], default='total_ms',
+                        help='排序字段（默认 total_ms）')
+    parser.add_argument('--top', type=int, default=20, help='显示的指纹数（默认 20）')
+    parser.add_argument('--plan', action='store_true', help='输出完整的 EXPLAIN JSON，而不是摘要')
+    args = parser.parse_args()
+
+    files = log_files(args.path)
+    if not files:
+        print(f"没有找到慢查询日志 {args.path}")
+        sys.exit(1)
+    groups = aggregate(read_entries(files))
+    print(f"{len(files)} 个日志文件，{sum(group['count'] for group in groups)} 条慢查询，{len(groups)} 个指纹\n")
+    print_report(groups, args.sort, args.top, args.plan)
+
+
+if __name__ == '__main__':
+    main()
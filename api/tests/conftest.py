@@ -4,6 +4,9 @@ import subprocess
 import pytest
 import shutil
 
+from .db_manager import TemplateDatabaseManager
+from .test_curl_base import reset_test_app_state
+
 """
 test_curl测试模块的配置文件
 只保留数据库恢复功能
@@ -46,25 +49,32 @@ def cleanup_logs():
         os.makedirs(test_logs_dir, exist_ok=True)
 
 
-@pytest.fixture(scope="session", autouse=True)
+@pytest.fixture(scope="session")
 def restore_database():
-    """在测试会话开始前恢复数据库"""
-    # 等待 cleanup_logs fixture 执行完成后再执行数据库恢复
-    # 数据库恢复逻辑
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    db_restore_script = os.path.abspath(os.path.join(current_dir, "..", "..", "db", "restore_db.sh"))
-    
-    # 检查恢复脚本是否存在
-    if not os.path.exists(db_restore_script):
-        raise FileNotFoundError(f"数据库恢复脚本 {db_restore_script} 不存在")
-    
-    # 执行数据库恢复脚本，使用--latest和--auto参数自动恢复最新的备份到school_management数据库
+    """
+    在测试会话开始前准备模板库
+
+    模板库由最新备份恢复而来并记录备份的哈希，备份未变化时直接复用，不再重放备份文件
+    """
+    manager = TemplateDatabaseManager()
     try:
-        result = subprocess.run([db_restore_script, "--latest", "school_management", "--auto"], 
-                                capture_output=True, 
-                                text=True, 
-                                check=True)
-        print("数据库恢复成功完成")
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"数据库恢复失败: {e.stderr}")
\ No newline at end of file
+        if manager.ensure_template():
+            print(f"已从最新备份构建模板库 {manager.template}")
+    except (FileNotFoundError, RuntimeError, subprocess.CalledProcessError) as e:
+        raise RuntimeError(f"数据库恢复失败: {e}")
+    return manager
+
+
+@pytest.fixture(scope="module", autouse=True)
+def reset_database(request):
+    """
+    每个测试模块开始前把数据库重置为模板库的数据，模块之间互不影响
+
+    模块设置了 pytestmark = pytest.mark.unit 时不访问数据库，也不准备模板库
+    """
+    if request.node.get_closest_marker('unit') is not None:
+        return
+    restore_database = request.getfixturevalue('restore_database')
+    seconds = restore_database.reset()
+    reset_test_app_state()
+    print(f"数据库已重置为模板数据，耗时 {seconds:.3f} 秒")
@@ -0,0 +1,174 @@
+import glob
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+import pymysql
+
+from apps.services.exam_result_service import ExamResultService
+from config import Config
+
+"""
+测试数据库管理
+
+首次使用时把最新备份恢复到模板库 <库名>_template，并在模板库中记录备份文件的哈希；
+备份不变时后续测试会话直接复用模板库。每次重置只在一个事务中把模板库各表的数据复制回测试库，
+小数据量下耗时远低于重放整个 SQL 备份。
+"""
+
+
+DB_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db"))
+BACKUP_DIRECTORY = os.path.join(DB_DIRECTORY, "backup")
+TEMPLATE_INFO_TABLE = "_template_info"
+
+
+class TemplateDatabaseManager:
+    """维护模板库并把测试库重置为模板库的数据"""
+
+    def __init__(self, database=None):
+        self.database = database or Config.MYSQL_DB
+        self.template = f"{self.database}_template"
+
+    def _connect(self, database=None):
+        return pymysql.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=database,
+            charset='utf8mb4',
+            autocommit=True
+        )
+
+    def latest_backup(self):
+        """
+        返回最新备份的恢复命令和哈希
+
+        优先使用 backup_db.py 生成的按表备份（哈希取 manifest.json，其中已包含各表数据的 sha256），
+        否则使用 backup_db.sh 生成的 .sql 文件
+        """
+        manifests = sorted(glob.glob(os.path.join(BACKUP_DIRECTORY, "*", "manifest.json")), key=os.path.getmtime)
+        if manifests:
+            path = os.path.dirname(manifests[-1])
+            command = [sys.executable, os.path.join(DB_DIRECTORY, "restore_db.py"), path,
+                       "--database", self.template, "--auto"]
+            return command, self._file_hash(manifests[-1])
+
+        dumps = sorted(glob.glob(os.path.join(BACKUP_DIRECTORY, "*.sql")), key=os.path.getmtime)
+        if not dumps:
+            raise FileNotFoundError(f"备份目录 {BACKUP_DIRECTORY} 中没有备份")
+        command = [os.path.join(DB_DIRECTORY, "restore_db.sh"), os.path.basename(dumps[-1]),
+                   self.template, "--auto"]
+        return command, self._file_hash(dumps[-1])
+
+    @staticmethod
+    def _file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _template_hash(self, cursor):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (self.template, TEMPLATE_INFO_TABLE)
+        )
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute(f"SELECT source_hash FROM `{self.template}`.`{TEMPLATE_INFO_TABLE}`")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def ensure_template(self):
+        """
+        备份变化或模板库不存在时重建模板库
+
+        Returns:
+            bool: 是否重建了模板库
+        """
+        command, source_hash = self.latest_backup()
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                if self._template_hash(cursor) == source_hash:
+                    return False
+                cursor.execute(f"DROP DATABASE IF EXISTS `{self.template}`")
+                cursor.execute(f"CREATE DATABASE `{self.template}`")
+
+            result = subprocess.run(command, cwd=DB_DIRECTORY, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"构建模板库失败: {result.stderr or result.stdout}")
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE TABLE `{self.template}`.`{TEMPLATE_INFO_TABLE}` (source_hash char(64) NOT NULL)")
+                cursor.execute(f"INSERT INTO `{self.template}`.`{TEMPLATE_INFO_TABLE}` VALUES (%s)", (source_hash,))
+            return True
+        finally:
+            connection.close()
+
+    def _objects(self, cursor, schema, table_type):
+        cursor.execute(
+            "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = %s",
+            (schema, table_type)
+        )
+        return [row[0] for row in cursor.fetchall() if row[0] != TEMPLATE_INFO_TABLE]
+
+    def _retarget(self, statement):
+        # 在测试库中查看模板库对象的定义时，引用会带上模板库名
+        return statement.replace(f"`{self.template}`.", f"`{self.database}`.")
+
+    def reset(self):
+        """
+        把测试库重置为模板库的数据
+
+        测试库缺少的表和视图按模板库的定义创建；各表的数据在一个事务中先删后复制，
+        外键检查关闭，不受表之间的依赖顺序影响。最后重建 API 的 exam_results_cache 物化表。
+
+        Returns:
+            float: 耗时（秒）
+        """
+        start = time.perf_counter()
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{self.database}`")
+                cursor.execute(f"USE `{self.database}`")
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+                tables = self._objects(cursor, self.template, 'BASE TABLE')
+                existing = set(self._objects(cursor, self.database, 'BASE TABLE'))
+                for table in tables:
+                    if table not in existing:
+                        cursor.execute(f"SHOW CREATE TABLE `{self.template}`.`{table}`")
+                        cursor.execute(self._retarget(cursor.fetchone()[1]))
+                existing_views = set(self._objects(cursor, self.database, 'VIEW'))
+                for view in self._objects(cursor, self.template, 'VIEW'):
+                    if view not in existing_views:
+                        cursor.execute(f"SHOW CREATE VIEW `{self.template}`.`{view}`")
+                        cursor.execute(self._retarget(cursor.fetchone()[1]))
+
+                connection.begin()
+                for table in tables:
+                    cursor.execute(f"DELETE FROM `{table}`")
+                    cursor.execute(f"INSERT INTO `{table}` SELECT * FROM `{self.template}`.`{table}`")
+                if 'exam_results_cache' in existing and 'exam_results_cache' not in tables:
+                    cursor.execute("DELETE FROM exam_results_cache")
+                    cursor.execute(ExamResultService.REFRESH_QUERY.format(where=''))
+                connection.commit()
+
+                # DELETE 不会回退自增计数器，重置为当前最大值 + 1，与恢复后的新库一致
+                cursor.execute(
+                    "SELECT TABLE_NAME FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = %s AND AUTO_INCREMENT IS NOT NULL",
+                    (self.template,)
+                )
+                for (table,) in cursor.fetchall():
+                    cursor.execute(f"ALTER TABLE `{table}` AUTO_INCREMENT = 1")
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return time.perf_counter() - start
@@ -0,0 +1,277 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from config import Config
+
+"""
+接口压测
+
+按设定的用户比例模拟并发访问：学生查询考试结果、教师查询成绩、管理员查看学生列表。
+每个并发级别持续一段时间，输出各路由的 p50/p95/p99 延迟、每秒请求数和错误率，
+结果保存为 JSON，可以用 --compare 与之前的结果对比。
+
+需要先启动服务（python app.py）并准备好数据库数据（如 restore_db.sh --latest --auto，或加 --reset
+从测试模板库重置）。在 api 目录下运行:
+
+    python -m tests.load_test --levels 1 5 10 20 --duration 10
+"""
+
+
+# 各类用户访问的路由；{id} 由启动时从管理接口读取的学生/教师编号填充
+SCENARIOS = {
+    'student': ('student_exam_results', '/api/student/exam_results/{id}'),
+    'teacher': ('teacher_scores', '/api/teacher/scores/{id}'),
+    'admin': ('admin_students', '/api/admin/students/')
+}
+DEFAULT_MIX = {'student': 6, 'teacher': 3, 'admin': 1}
+DEFAULT_LEVELS = [1, 5, 10, 20]
+DEFAULT_DURATION = 10
+PERCENTILES = (50, 95, 99)
+
+
+class HttpClient:
+    """每个压测线程一个保持连接的 HTTP 客户端，服务端关闭连接时自动重连"""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def get(self, path):
+        """返回 (状态码, 响应正文)"""
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request('GET', path)
+                response = self.connection.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, body
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # 复用的连接已被服务端关闭，重连后重试一次
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def load_user_ids(base_url):
+    """从管理接口读取学生和教师编号"""
+    client = HttpClient(base_url)
+    try:
+        ids = {}
+        for role, path, key, field in (('student', '/api/admin/students/', 'students', 'student_id'),
+                                       ('teacher', '/api/admin/teachers/', 'teachers', 'teacher_id')):
+            status, body = client.get(path)
+            if status != 200:
+                raise RuntimeError(f"读取{key}失败: HTTP {status}")
+            ids[role] = [str(item[field]) for item in json.loads(body)['data'][key]]
+            if not ids[role]:
+                raise RuntimeError(f"数据库中没有{key}数据，请先导入或恢复数据")
+        return ids
+    finally:
+        client.close()
+
+
+def percentile(sorted_values, p):
+    """最近秩法百分位"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, seconds):
+    """
+    汇总一个并发级别的采样
+
+    Args:
+        samples (dict): {路由: [(延迟秒数, 是否出错)]}
+        seconds (float): 实际持续时间
+
+    Returns:
+        dict: 总请求数、每秒请求数、错误率以及各路由的统计
+    """
+    routes = {}
+    for route, items in sorted(samples.items()):
+        latencies = sorted(latency for latency, _ in items)
+        errors = sum(1 for _, error in items if error)
+        stats = {
+            'requests': len(items),
+            'errors': errors,
+            'error_rate': round(errors / len(items), 4) if items else 0.0,
+            'rps': round(len(items) / seconds, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+        }
+        for p in PERCENTILES:
+            stats[f'p{p}_ms'] = round(percentile(latencies, p) * 1000, 2)
+        routes[route] = stats
+    total = sum(stats['requests'] for stats in routes.values())
+    errors = sum(stats['errors'] for stats in routes.values())
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'rps': round(total / seconds, 2),
+        'routes': routes
+    }
+
+
+def run_level(base_url, concurrency, duration, mix, user_ids, seed=None):
+    """以 concurrency 个线程持续压测 duration 秒"""
+    samples = {route: [] for route, _ in SCENARIOS.values()}
+    lock = threading.Lock()
+    roles = list(mix)
+    weights = [mix[role] for role in roles]
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(None if seed is None else seed + index)
+        client = HttpClient(base_url)
+        local = {route: [] for route in samples}
+        try:
+            while time.perf_counter() < deadline:
+                role = rng.choices(roles, weights)[0]
+                route, template = SCENARIOS[role]
+                path = template.format(id=rng.choice(user_ids[role])) if role in user_ids else template
+                start = time.perf_counter()
+                try:
+                    status, body = client.get(path)
+                    error = status >= 400 or not json.loads(body).get('success', False)
+                except Exception:
+                    client.close()
+                    error = True
+                local[route].append((time.perf_counter() - start, error))
+        finally:
+            client.close()
+            with lock:
+                for route, items in local.items():
+                    samples[route].extend(items)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = summarize(samples, time.perf_counter() - start)
+    result['concurrency'] = concurrency
+    result['duration'] = duration
+    return result
+
+
+def print_level(result):
+    print(f"\n并发 {result['concurrency']}: {result['requests']} 个请求，{result['rps']:.1f} 请求/秒，"
+          f"错误率 {result['error_rate'] * 100:.2f}%")
+    print(f"{'路由':<24}{'请求数':>8}{'请求/秒':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'错误率':>9}")
+    for route, stats in result['routes'].items():
+        print(f"{route:<24}{stats['requests']:>8}{stats['rps']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['error_rate'] * 100:>8.2f}%")
+
+
+def print_comparison(baseline, current):
+    """按并发级别和路由对比 p95 延迟和每秒请求数"""
+    previous = {level['concurrency']: level for level in baseline['levels']}
+    print(f"\n与 {baseline['created_at']} 的结果对比:")
+    print(f"{'并发':>6}  {'路由':<24}{'p95(ms)':>20}{'请求/秒':>20}")
+    for level in current['levels']:
+        old_level = previous.get(level['concurrency'])
+        if old_level is None:
+            continue
+        for route, stats in level['routes'].items():
+            old = old_level['routes'].get(route)
+            if old is None:
+                continue
+            print(f"{level['concurrency']:>6}  {route:<24}"
+                  f"{old['p95_ms']:>9.1f} → {stats['p95_ms']:<8.1f}"
+                  f"{old['rps']:>9.1f} → {stats['rps']:<8.1f}")
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        role, _, weight = item.partition('=')
+        if role not in SCENARIOS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"无效的用户比例: {item}（格式如 student=6,teacher=3,admin=1）")
+        mix[role] = int(weight)
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='接口压测')
+    parser.add_argument('--base-url', default=f"http://{Config.HOST}:{Config.PORT}",
+                        help='服务地址（默认 Config.HOST:Config.PORT）')
+    parser.add_argument('--levels', type=int, nargs='+', default=DEFAULT_LEVELS,
+                        help=f"依次压测的并发数（默认 {' '.join(map(str, DEFAULT_LEVELS))}）")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help=f'每个并发级别持续的秒数（默认 {DEFAULT_DURATION}）')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='各类用户的请求比例（默认 student=6,teacher=3,admin=1）')
+    parser.add_argument('--seed', type=int, help='随机种子，固定后每次选择的用户序列相同')
+    parser.add_argument('--output', help='结果文件（默认 logs/load_test/load_test_<时间戳>.json）')
+    parser.add_argument('--compare', help='与之前保存的结果文件对比')
+    parser.add_argument('--reset', action='store_true', help='压测前把数据库重置为测试模板库的数据')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = None
+    if args.compare:
+        # 先读入对比基线，--output 与 --compare 是同一文件时也能正确对比
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.reset:
+        from tests.db_manager import TemplateDatabaseManager
+        manager = TemplateDatabaseManager()
+        manager.ensure_template()
+        print(f"数据库已重置为模板数据，耗时 {manager.reset():.3f} 秒")
+
+    try:
+        user_ids = load_user_ids(args.base_url)
+    except (OSError, RuntimeError, ValueError, KeyError) as e:
+        print(f"无法从 {args.base_url} 读取用户数据，请确认服务已启动且数据库已有数据: {e}")
+        sys.exit(1)
+    print(f"压测 {args.base_url}：{len(user_ids['student'])} 个学生，{len(user_ids['teacher'])} 个教师，"
+          f"用户比例 {args.mix}")
+
+    result = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'base_url': args.base_url,
+        'mix': args.mix,
+        'duration': args.duration,
+        'levels': []
+    }
+    for concurrency in args.levels:
+        level = run_level(args.base_url, concurrency, args.duration, args.mix, user_ids, args.seed)
+        result['levels'].append(level)
+        print_level(level)
+
+    output = args.output or os.path.join(Config.LOAD_TEST_DIR, f"load_test_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if baseline is not None:
+        print_comparison(baseline, result)
+
+
+if __name__ == '__main__':
+    main()
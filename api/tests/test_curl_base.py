@@ -6,9 +6,84 @@ import time
 import pytest
 import shlex
 import tempfile
+from urllib.parse import urlsplit
 from config import Config
 
 
+_test_clients = {}
+
+
+def get_test_app():
+    """进程内的 API 应用，首次使用时才导入"""
+    from app import app
+    return app
+
+
+def get_test_client(cookie_file=None):
+    """
+    返回测试客户端
+
+    带 -b/-c 的命令按 cookie 文件共用一个保存 cookie 的客户端，与 curl 读写同一个 cookie 文件的效果一致；
+    其他命令使用不保存 cookie 的客户端
+    """
+    client = _test_clients.get(cookie_file)
+    if client is None:
+        client = get_test_app().test_client(use_cookies=cookie_file is not None)
+        _test_clients[cookie_file] = client
+    return client
+
+
+def reset_test_app_state():
+    """数据库重置后清空进程内应用的读缓存，避免读到重置前的数据"""
+    if 'app' not in sys.modules:
+        return
+    from apps.utils.cache import get_cache
+    app = get_test_app()
+    with app.app_context():
+        get_cache().clear()
+
+
+def parse_curl_command(command):
+    """
+    把测试用例中的 curl 参数解析为请求描述
+
+    支持用例中使用的 -s、-X、-H、-d、-b、-c，'|' 之后的部分（jq）忽略
+    """
+    if '|' in command:
+        command = command[:command.index('|')]
+    method = None
+    url = None
+    headers = {}
+    data = None
+    cookie_file = None
+    args = iter(command[1:])
+    for arg in args:
+        if arg == '-s':
+            continue
+        elif arg == '-X':
+            method = next(args)
+        elif arg == '-H':
+            name, _, value = next(args).partition(':')
+            headers[name.strip()] = value.strip()
+        elif arg == '-d':
+            data = next(args)
+        elif arg in ('-b', '-c'):
+            cookie_file = next(args)
+        elif arg.startswith('-'):
+            raise ValueError(f"不支持的 curl 参数: {arg}")
+        else:
+            url = arg
+    if url is None:
+        raise ValueError(f"curl 命令缺少 URL: {' '.join(command)}")
+    if data is not None:
+        # 与 curl 一致：-d 默认使用 POST 和表单编码
+        method = method or 'POST'
+        headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    return {'method': method or 'GET', 'path': path, 'headers': headers, 'data': data, 'cookie_file': cookie_file}
+
+
 class CurlTestBase:
     @classmethod
     def setup_class(cls):
@@ -19,6 +94,32 @@ class CurlTestBase:
         # 确保测试结果目录存在
         os.makedirs(Config.TEST_DIR, exist_ok=True)
 
+    def _execute(self, command):
+        """
+        执行 curl 命令，返回响应正文
+
+        默认用进程内的 Flask 测试客户端执行命令描述的请求，不启动子进程，也不需要外部服务；
+        Config.TEST_CLIENT 为 'curl' 时对 Config.PORT 上运行的服务执行真实的 curl 命令
+        """
+        if Config.TEST_CLIENT == 'curl':
+            # 使用shlex.join来正确处理命令参数中的引号
+            if '|' not in ' '.join(command):
+                # 如果命令中没有管道符，添加jq处理
+                full_command = shlex.join(command) + ' | jq'
+            else:
+                # 如果已经有管道符，直接使用原命令
+                full_command = shlex.join(command)
+            return subprocess.run(full_command, shell=True, capture_output=True, text=True).stdout
+
+        spec = parse_curl_command(command)
+        client = get_test_client(spec['cookie_file'])
+        response = client.open(spec['path'], method=spec['method'], headers=spec['headers'], data=spec['data'])
+        try:
+            return response.get_data(as_text=True)
+        finally:
+            # 关闭响应才会执行 call_on_close，流式响应借此归还数据库连接
+            response.close()
+
     def _record_curl_command(self, test_number, description, command):
         """记录curl命令到文件"""
         with open(self.curl_commands_file, 'a') as f:
@@ -33,22 +134,14 @@ class CurlTestBase:
         # 记录curl命令
         self._record_curl_command(test_number, description, command)
 
-        # 使用shlex.join来正确处理命令参数中的引号
-        if '|' not in ' '.join(command):
-            # 如果命令中没有管道符，添加jq处理
-            full_command = shlex.join(command) + ' | jq'
-        else:
-            # 如果已经有管道符，直接使用原命令
-            full_command = shlex.join(command)
-
         # 执行测试命令
-        result = subprocess.run(full_command, shell=True, capture_output=True, text=True)
+        output = self._execute(command)
 
         # 保存结果
         output_path = os.path.join(test_setup['result_dir'], output_file)
         try:
             # 尝试解析为JSON
-            json_data = json.loads(result.stdout)
+            json_data = json.loads(output)
             with open(output_path, 'w') as f:
                 json.dump(json_data, f, indent=2, ensure_ascii=False)
 
@@ -80,7 +173,7 @@ class CurlTestBase:
         except json.JSONDecodeError:
             # 如果不是JSON格式，直接保存原始输出
             with open(output_path, 'w') as f:
-                f.write(result.stdout)
+                f.write(output)
             
             if expect_error:
                 print(f"测试 {test_number} 成功（预期错误，非JSON响应）")
@@ -122,23 +215,15 @@ class CurlTestBase:
         else:
             # 如果没有提供会话文件，则不使用cookie
             cookie_command = command
-
-        # 使用shlex.join来正确处理命令参数中的引号
-        if '|' not in ' '.join(cookie_command):
-            # 如果命令中没有管道符，添加jq处理
-            full_command = shlex.join(cookie_command) + ' | jq'
-        else:
-            # 如果已经有管道符，直接使用原命令
-            full_command = shlex.join(cookie_command)
         
         # 执行测试命令
-        result = subprocess.run(full_command, shell=True, capture_output=True, text=True)
+        output = self._execute(cookie_command)
         
         # 保存结果
         output_path = os.path.join(test_setup['result_dir'], output_file)
         try:
             # 尝试解析为JSON
-            json_data = json.loads(result.stdout)
+            json_data = json.loads(output)
             with open(output_path, 'w') as f:
                 json.dump(json_data, f, indent=2, ensure_ascii=False)
             
@@ -161,7 +246,7 @@ class CurlTestBase:
         except json.JSONDecodeError:
             # 如果不是JSON格式，直接保存原始输出
             with open(output_path, 'w') as f:
-                f.write(result.stdout)
+                f.write(output)
             print(f"测试 {test_number} 成功（非JSON响应）")
             sys.stdout.flush()
             return True
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from apps.utils.metrics import MetricsRegistry
+
+pytestmark = pytest.mark.unit
+
+
+class TestMetricsRegistry:
+    """指标注册表的分片和合并"""
+
+    def run_threads(self, count, target):
+        # 所有线程都记录完再退出，避免先结束的线程编号被后面的线程复用
+        barrier = threading.Barrier(count)
+
+        def worker():
+            target()
+            barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_threads_spread_across_shards(self):
+        registry = MetricsRegistry([0.1, 1.0], shards=4)
+        self.run_threads(8, lambda: registry.inc('db_queries_total', ('/api/x',)))
+
+        used = [counters for _, counters, _ in registry._shards if counters]
+        assert len(used) == 4
+        assert all(counters[('db_queries_total', ('/api/x',))] == 2 for counters in used)
+
+    def test_collect_merges_shards(self):
+        registry = MetricsRegistry([0.1, 1.0], shards=4)
+
+        def record():
+            registry.inc('http_requests_total', ('/api/x', 'GET', '200'))
+            registry.observe('http_request_duration_seconds', ('/api/x', 'GET'), 0.5)
+
+        self.run_threads(6, record)
+        counters, histograms = registry.collect()
+
+        assert counters == {('http_requests_total', ('/api/x', 'GET', '200')): 6}
+        # 桶 0.1、1.0、+Inf 的计数，总和，次数
+        assert histograms == {('http_request_duration_seconds', ('/api/x', 'GET')): [0, 6, 0, 3.0, 6]}
+
+    def test_thread_keeps_its_shard(self):
+        registry = MetricsRegistry([0.1], shards=4)
+        for _ in range(3):
+            registry.inc('db_queries_total', ('/api/x',))
+
+        used = [counters for _, counters, _ in registry._shards if counters]
+        assert used == [{('db_queries_total', ('/api/x',)): 3}]
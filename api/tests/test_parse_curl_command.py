@@ -0,0 +1,84 @@
+import pytest
+
+from . import test_curl_base
+from .test_curl_base import get_test_client, parse_curl_command
+
+pytestmark = pytest.mark.unit
+
+
+class TestParseCurlCommand:
+    """进程内执行 curl 用例时的命令解析规则，需与 curl 的行为一致"""
+
+    base_url = "http://127.0.0.1:5000"
+
+    def test_defaults_to_get_without_body(self):
+        """没有 -X 和 -d 时为 GET，查询字符串保留在路径中"""
+        spec = parse_curl_command(['curl', '-s', f'{self.base_url}/api/student/scores?exam_type_id=1'])
+        assert spec == {
+            'method': 'GET',
+            'path': '/api/student/scores?exam_type_id=1',
+            'headers': {},
+            'data': None,
+            'cookie_file': None
+        }
+
+    def test_explicit_method_and_headers(self):
+        """-X 指定方法，-H 按第一个冒号拆分并去掉空白"""
+        spec = parse_curl_command(['curl', '-s', '-X', 'DELETE', f'{self.base_url}/api/admin/classes/3',
+                                   '-H', 'Content-Type: application/json'])
+        assert spec['method'] == 'DELETE'
+        assert spec['path'] == '/api/admin/classes/3'
+        assert spec['headers'] == {'Content-Type': 'application/json'}
+
+    def test_data_defaults_to_post_with_form_content_type(self):
+        """与 curl 一致：只有 -d 时使用 POST 和表单编码"""
+        spec = parse_curl_command(['curl', '-s', f'{self.base_url}/api/auth/login', '-d', 'user_id=S0101'])
+        assert spec['method'] == 'POST'
+        assert spec['data'] == 'user_id=S0101'
+        assert spec['headers'] == {'Content-Type': 'application/x-www-form-urlencoded'}
+
+    def test_data_keeps_explicit_method_and_content_type(self):
+        """-d 不覆盖 -X 指定的方法和 -H 指定的 Content-Type"""
+        spec = parse_curl_command(['curl', '-s', '-X', 'PUT', f'{self.base_url}/api/admin/classes/3',
+                                   '-H', 'Content-Type: application/json', '-d', '{"class_name": "1班"}'])
+        assert spec['method'] == 'PUT'
+        assert spec['headers'] == {'Content-Type': 'application/json'}
+        assert spec['data'] == '{"class_name": "1班"}'
+
+    def test_ignores_everything_after_pipe(self):
+        """'|' 之后的 jq 部分不参与解析"""
+        spec = parse_curl_command(['curl', '-s', f'{self.base_url}/api/health', '|', 'jq', '-r', '.status'])
+        assert spec['method'] == 'GET'
+        assert spec['path'] == '/api/health'
+
+    @pytest.mark.parametrize('option', ['-b', '-c'])
+    def test_cookie_file(self, option):
+        """-b 和 -c 都记录 cookie 文件"""
+        spec = parse_curl_command(['curl', '-s', f'{self.base_url}/api/student/profile', option, 'student.cookie'])
+        assert spec['cookie_file'] == 'student.cookie'
+
+    def test_rejects_unsupported_option_and_missing_url(self):
+        with pytest.raises(ValueError, match='-F'):
+            parse_curl_command(['curl', '-s', '-F', 'file=@a.txt', f'{self.base_url}/api/upload'])
+        with pytest.raises(ValueError, match='URL'):
+            parse_curl_command(['curl', '-s', '-X', 'GET'])
+
+
+class TestCookieFileSharing:
+    """同一 cookie 文件的命令共用一个客户端，与 curl 读写同一个 cookie 文件的效果一致"""
+
+    @pytest.fixture(autouse=True)
+    def isolated_clients(self, monkeypatch):
+        monkeypatch.setattr(test_curl_base, '_test_clients', {})
+
+    def test_same_cookie_file_shares_client(self):
+        client = get_test_client('student.cookie')
+        assert get_test_client('student.cookie') is client
+        assert get_test_client('teacher.cookie') is not client
+        assert get_test_client(None) is not client
+
+    def test_cookies_do_not_leak_between_files(self):
+        get_test_client('student.cookie').set_cookie('session', 'student-session')
+        assert get_test_client('student.cookie').get_cookie('session').value == 'student-session'
+        assert get_test_client('teacher.cookie').get_cookie('session') is None
+
@@ -0,0 +1,30 @@
+import pytest
+
+from apps.utils.score_statistics import summarize_scores
+
+pytestmark = pytest.mark.unit
+
+
+class TestSummarizeScores:
+    """成绩统计与原来逐个分数段 COUNT(*) 的结果一致"""
+
+    def test_overlapping_and_duplicate_bands_are_counted_independently(self):
+        bands = [
+            {'name': '优秀', 'min': 90, 'max': 100},
+            {'name': '及格', 'min': 60, 'max': 100},
+            {'name': '及格', 'min': 60, 'max': 69},
+        ]
+        result = summarize_scores([95, 100, 60, 69, 59], bands)
+
+        assert [(band['range'], band['count']) for band in result['grade_distribution']] == [
+            ('优秀', 2), ('及格', 4), ('及格', 2)
+        ]
+
+    def test_null_scores_count_as_students_only(self):
+        bands = [{'name': '不及格 (0-59)', 'min': 0, 'max': 59}]
+        result = summarize_scores([50, None, 70, None], bands)
+
+        assert result['total_students'] == 4
+        assert result['average_score'] == 60
+        assert result['min_score'] == 50
+        assert result['grade_distribution'] == [{'range': '不及格 (0-59)', 'count': 1, 'percentage': 25.0}]
@@ -116,6 +116,15 @@ class TestTeacherEndpoints(CurlTestBase):
             expect_error=True
         )
 
+    def test_classes_04_get_class_exam_results(self):
+        """测试用例classes_04: 教师获取班级某次考试的各科成绩透视表"""
+        self.run_api_test(
+            "classes_04", "教师获取班级考试成绩透视表",
+            ['curl', '-s', f'{self.base_url}/api/teacher/classes/1/6/exam_results?exam_type_id=1', '|', 'jq'],
+            "teacher_classes_04_get_class_exam_results.json",
+            self.test_setup
+        )
+
     # ==================== 学生管理相关测试 ====================
     
     def test_students_01_get_students(self):
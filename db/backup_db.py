@@ -0,0 +1,358 @@
+"""
+数据库逻辑备份
+
+每个表导出为一个压缩文件，多个连接并行导出：
+- 协调连接先执行 FLUSH TABLES WITH READ LOCK，读取定义并让各工作连接开启一致性快照事务后立即解锁，
+  所有表读到的是同一时刻的数据，锁只持有建立快照的一瞬间
+- 数据文件为 gzip 压缩的 TSV（LOAD DATA 默认格式：\\N 表示空值，反斜杠转义制表符和换行）
+- 表结构、视图、存储过程/函数和触发器的定义分别保存为 .sql 文件，不删除、不修改数据库中的任何对象
+- manifest.json 记录各表的列、行数、未压缩数据的 sha256 和压缩后大小，供恢复时校验
+
+用法: python backup_db.py [备份目录名] [--workers 4] [--tables Students Scores] [--no-lock]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import mysql.connector
+from mysql.connector import Error
+
+# 数据库连接配置
+db_config = {
+    'host': 'localhost',
+    'database': 'school_management',
+    'user': 'root',
+    'password': 'Newuser1'
+}
+
+backup_directory = os.path.join(os.path.dirname(__file__), 'backup')
+
+BACKUP_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# 并行导出的连接数、每次从服务端读取的行数和 gzip 压缩级别
+DEFAULT_WORKERS = 4
+FETCH_SIZE = 5000
+COMPRESS_LEVEL = 6
+
+# 导入脚本遗留的暂存表不备份
+EXCLUDED_SUFFIXES = ('_staging',)
+
+def create_connection():
+    """创建数据库连接"""
+    try:
+        connection = mysql.connector.connect(**db_config)
+        if connection.is_connected():
+            return connection
+    except Error as e:
+        print(f"连接MySQL时出错: {e}")
+        return None
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    text = value if isinstance(value, str) else str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            .replace('\r', '\\r').replace('\0', '\\0'))
+
+def list_tables(connection, names=None):
+    """返回要备份的基表，数据量大的在前，使并行导出时各连接的负载更均衡"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY DATA_LENGTH DESC, TABLE_NAME
+    """)
+    tables = [row[0] for row in cursor.fetchall() if not row[0].endswith(EXCLUDED_SUFFIXES)]
+    cursor.close()
+    if names:
+        missing = set(names) - set(tables)
+        if missing:
+            raise ValueError(f"数据库中不存在这些表: {', '.join(sorted(missing))}")
+        tables = [table for table in tables if table in names]
+    return tables
+
+def capture_definitions(connection, tables, path):
+    """
+    保存表结构、视图、存储过程/函数和触发器的定义
+
+    视图按 information_schema 中的依赖关系排序，被引用的视图在前，恢复时按顺序创建即可。
+
+    Returns:
+        dict: 写入 manifest 的各类对象列表
+    """
+    cursor = connection.cursor()
+    definitions = {'views': [], 'routines': [], 'triggers': []}
+
+    os.makedirs(os.path.join(path, 'schema'))
+    for table in tables:
+        cursor.execute(f"SHOW CREATE TABLE `{table}`")
+        _write_sql(os.path.join(path, 'schema', f"{table}.sql"), cursor.fetchone()[1])
+
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.VIEWS WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    views = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT VIEW_NAME, TABLE_NAME FROM information_schema.VIEW_TABLE_USAGE
+        WHERE VIEW_SCHEMA = DATABASE() AND TABLE_SCHEMA = DATABASE()
+    """)
+    view_dependencies = {}
+    for view, referenced in cursor.fetchall():
+        if referenced in views and referenced != view:
+            view_dependencies.setdefault(view, set()).add(referenced)
+    if views:
+        os.makedirs(os.path.join(path, 'views'))
+    for view in _dependency_order(views, view_dependencies):
+        cursor.execute(f"SHOW CREATE VIEW `{view}`")
+        _write_sql(os.path.join(path, 'views', f"{view}.sql"), cursor.fetchone()[1])
+        definitions['views'].append(view)
+
+    cursor.execute("""
+        SELECT ROUTINE_NAME, ROUTINE_TYPE FROM information_schema.ROUTINES
+        WHERE ROUTINE_SCHEMA = DATABASE() ORDER BY ROUTINE_TYPE, ROUTINE_NAME
+    """)
+    routines = cursor.fetchall()
+    if routines:
+        os.makedirs(os.path.join(path, 'routines'))
+    for name, routine_type in routines:
+        cursor.execute(f"SHOW CREATE {routine_type} `{name}`")
+        # 第 3 列为创建语句，存储过程和函数的结果列位置相同
+        _write_sql(os.path.join(path, 'routines', f"{name}.sql"), cursor.fetchone()[2])
+        definitions['routines'].append({'name': name, 'type': routine_type})
+
+    cursor.execute("""
+        SELECT TRIGGER_NAME, EVENT_OBJECT_TABLE FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() ORDER BY EVENT_OBJECT_TABLE, ACTION_ORDER
+    """)
+    triggers = cursor.fetchall()
+    if triggers:
+        os.makedirs(os.path.join(path, 'triggers'))
+    for name, table in triggers:
+        cursor.execute(f"SHOW CREATE TRIGGER `{name}`")
+        _write_sql(os.path.join(path, 'triggers', f"{name}.sql"), cursor.fetchone()[2])
+        definitions['triggers'].append({'name': name, 'table': table})
+
+    cursor.close()
+    return definitions
+
+def _write_sql(path, statement):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(statement.rstrip(';') + ';\n')
+
+def _dependency_order(names, dependencies):
+    order = []
+    remaining = {name: set(dependencies.get(name, ())) for name in names}
+    while remaining:
+        ready = sorted(name for name, pending in remaining.items() if not pending)
+        if not ready:
+            raise ValueError(f"视图之间存在循环依赖: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+            order.append(name)
+        for pending in remaining.values():
+            pending.difference_update(ready)
+    return order
+
+def open_snapshot_connections(workers):
+    """
+    打开 workers 个处于一致性快照事务中的连接
+
+    调用方持有全局读锁时，所有连接看到的是同一时刻的数据。
+    """
+    connections = []
+    try:
+        for _ in range(workers):
+            connection = mysql.connector.connect(**db_config)
+            cursor = connection.cursor()
+            cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+            cursor.close()
+            connections.append(connection)
+    except Exception:
+        for connection in connections:
+            connection.close()
+        raise
+    return connections
+
+def dump_table(table, connection, path, fetch_size=FETCH_SIZE, compress_level=COMPRESS_LEVEL):
+    """
+    用非缓冲游标分批读取一个表，写入 data/<表名>.tsv.gz
+
+    Returns:
+        dict: 列、行数、未压缩数据的 sha256、压缩后大小和耗时
+    """
+    start = time.perf_counter()
+    file_path = os.path.join(path, 'data', f"{table}.tsv.gz")
+    digest = hashlib.sha256()
+    count = 0
+
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT * FROM `{table}`")
+    columns = list(cursor.column_names)
+    with gzip.open(file_path, 'wb', compresslevel=compress_level) as f:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            chunk = ''.join('\t'.join(_tsv_field(value) for value in row) + '\n' for row in rows).encode('utf-8')
+            digest.update(chunk)
+            f.write(chunk)
+            count += len(rows)
+    cursor.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'file': os.path.relpath(file_path, path),
+        'columns': columns,
+        'rows': count,
+        'sha256': digest.hexdigest(),
+        'bytes': os.path.getsize(file_path),
+        'seconds': seconds
+    }
+
+def backup(path, tables=None, workers=DEFAULT_WORKERS, lock=True, fetch_size=FETCH_SIZE,
+           compress_level=COMPRESS_LEVEL):
+    """
+    备份到 path 目录
+
+    先写到 <path>.tmp，全部表导出成功并写入 manifest 后再改名，失败时不会留下不完整的备份。
+
+    Returns:
+        dict: manifest
+    """
+    coordinator = create_connection()
+    if not coordinator:
+        raise RuntimeError("无法连接数据库")
+
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(os.path.join(tmp_path, 'data'))
+    start = time.perf_counter()
+    connections = []
+    try:
+        tables = list_tables(coordinator, tables)
+        workers = max(1, min(workers, len(tables)))
+        # 全局读锁内读取定义并开启各连接的快照，解锁后导出数据不再阻塞写入；
+        # 没有 RELOAD 权限时可以不加锁，此时各连接分别开启快照，表之间可能不一致
+        cursor = coordinator.cursor()
+        if lock:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+        try:
+            definitions = capture_definitions(coordinator, tables, tmp_path)
+            connections = open_snapshot_connections(workers)
+        finally:
+            if lock:
+                cursor.execute("UNLOCK TABLES")
+            cursor.close()
+        print(f"已在 {workers} 个连接上开启一致性快照，开始导出 {len(tables)} 个表")
+
+        available = queue.Queue()
+        for connection in connections:
+            available.put(connection)
+
+        def task(table):
+            connection = available.get()
+            try:
+                return dump_table(table, connection, tmp_path, fetch_size, compress_level)
+            finally:
+                available.put(connection)
+
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(task, table): table for table in tables}
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    results[table] = future.result()
+                    item = results[table]
+                    print(f"[{len(results) + len(errors)}/{len(tables)}] {table} 完成: {item['rows']} 行，"
+                          f"{item['bytes'] / 1024:.1f} KB，{item['seconds']:.3f} 秒")
+                except Exception as e:
+                    errors[table] = e
+                    print(f"[{len(results) + len(errors)}/{len(tables)}] {table} 导出失败: {e}")
+        if errors:
+            raise RuntimeError(f"{len(errors)} 个表导出失败: {', '.join(errors)}")
+
+        manifest = {
+            'version': BACKUP_FORMAT_VERSION,
+            'database': db_config['database'],
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'consistent': lock,
+            'tables': {table: results[table] for table in tables},
+            **definitions,
+            'seconds': time.perf_counter() - start
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.rename(tmp_path, path)
+        return manifest
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    finally:
+        for connection in connections:
+            connection.close()
+        coordinator.close()
+
+def print_backup_report(path, manifest):
+    print("\n备份报告:")
+    print("-" * 72)
+    print(f"{'表名':<20}{'行数':>10}{'大小(KB)':>12}{'耗时(秒)':>12}  sha256")
+    print("-" * 72)
+    for table, item in manifest['tables'].items():
+        print(f"{table:<20}{item['rows']:>10}{item['bytes'] / 1024:>12.1f}{item['seconds']:>12.3f}  "
+              f"{item['sha256'][:12]}")
+    print("-" * 72)
+    print(f"视图: {len(manifest['views'])} 个，存储过程/函数: {len(manifest['routines'])} 个，"
+          f"触发器: {len(manifest['triggers'])} 个")
+    print(f"一致性快照: {'是' if manifest['consistent'] else '否（各连接分别开启快照）'}")
+    print(f"总耗时: {manifest['seconds']:.3f} 秒")
+    print(f"备份目录: {path}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='并行逻辑备份数据库')
+    parser.add_argument('name', nargs='?',
+                        help='备份目录名（默认 school_management_backup_<时间戳>），保存在 db/backup/ 下')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'并行导出的连接数（默认 {DEFAULT_WORKERS}）')
+    parser.add_argument('--tables', nargs='+', help='只备份这些表（默认全部基表）')
+    parser.add_argument('--no-lock', action='store_true',
+                        help='不加全局读锁（没有 RELOAD 权限时使用），各表之间不保证一致')
+    parser.add_argument('--fetch-size', type=int, default=FETCH_SIZE,
+                        help=f'每次从服务端读取的行数（默认 {FETCH_SIZE}）')
+    parser.add_argument('--compress-level', type=int, choices=range(1, 10), default=COMPRESS_LEVEL,
+                        metavar='1-9', help=f'gzip 压缩级别（默认 {COMPRESS_LEVEL}）')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    name = args.name or f"school_management_backup_{time.strftime('%Y%m%d_%H%M%S')}"
+    path = os.path.abspath(os.path.join(backup_directory, name))
+    if os.path.exists(path):
+        print(f"备份目录已存在: {path}")
+        sys.exit(1)
+
+    print(f"正在备份数据库 {db_config['database']}...")
+    try:
+        manifest = backup(path, args.tables, args.workers, not args.no_lock, args.fetch_size,
+                          args.compress_level)
+    except Exception as e:
+        print(f"数据库备份失败: {e}")
+        sys.exit(1)
+    print("数据库备份成功完成!")
+    print_backup_report(path, manifest)
+
+if __name__ == "__main__":
+    main()
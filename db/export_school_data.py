@@ -1,7 +1,14 @@
+import argparse
+import csv
+import os
+import time
+
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
-import os
+from openpyxl import Workbook
+
+from snapshot import SnapshotWriter, snapshot_size
 
 # 数据库连接配置
 db_config = {
@@ -15,6 +22,22 @@ db_config = {
 db_directory = os.path.dirname(__file__)
 excel_file = os.path.join(db_directory, 'school_management.xlsx')
 views_excel_file = os.path.join(db_directory, 'school_management_views.xlsx')
+csv_directory = os.path.join(db_directory, 'csv')
+snapshot_directory = os.path.join(db_directory, 'snapshot')
+
+# 导出的表及查询
+TABLE_QUERIES = [
+    ('Classes', 'SELECT class_id, class_name FROM Classes'),
+    ('Students', 'SELECT student_id, student_name, class_id, password FROM Students'),
+    ('Teachers', 'SELECT teacher_id, teacher_name, subject_id, password FROM Teachers'),
+    ('Subjects', 'SELECT subject_id, subject_name FROM Subjects'),
+    ('Scores', 'SELECT score_id, student_id, subject_id, exam_type_id, score FROM Scores'),
+    ('ExamTypes', 'SELECT exam_type_id, exam_type_name FROM ExamTypes'),
+    ('TeacherClasses', 'SELECT teacher_id, class_id FROM TeacherClasses')
+]
+
+# 流式导出每次从服务端读取的行数
+DEFAULT_CHUNK_SIZE = 5000
 
 def create_connection():
     """创建数据库连接"""
@@ -56,6 +79,222 @@ def export_view_to_excel(view_name, connection, excel_writer):
         traceback.print_exc()
         return -1
 
+class XlsxSink:
+    """只写模式的工作簿：行直接写入临时文件，不在内存中保留单元格对象"""
+
+    def __init__(self, path):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+
+    def open_sheet(self, name, columns):
+        sheet = self.workbook.create_sheet(title=name)
+        sheet.append(columns)
+        return sheet.append, None
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class CsvSink:
+    """每个表一个 CSV 文件（UTF-8 BOM，Excel 可直接打开）"""
+
+    def __init__(self, directory, prefix):
+        self.directory = directory
+        self.prefix = prefix
+        os.makedirs(directory, exist_ok=True)
+
+    def open_sheet(self, name, columns):
+        f = open(os.path.join(self.directory, f"{self.prefix}_{name}.csv"), 'w', newline='', encoding='utf-8-sig')
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        return writer.writerow, f.close
+
+    def close(self):
+        pass
+
+
+def stream_query_to_sink(name, query, connection, sink, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    用非缓冲游标逐批读取查询结果并写入 sink
+
+    内存占用只与 chunk_size 有关，与表的行数无关。
+
+    Returns:
+        tuple: (行数, 耗时秒数)
+    """
+    start = time.perf_counter()
+    cursor = connection.cursor(buffered=False)
+    close_sheet = None
+    count = 0
+    try:
+        cursor.execute(query)
+        append, close_sheet = sink.open_sheet(name, list(cursor.column_names))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                append(row)
+            count += len(rows)
+    finally:
+        if close_sheet:
+            close_sheet()
+        try:
+            cursor.close()
+        except Error:
+            # 中途出错时丢弃未读完的结果，连接可以继续导出下一个表
+            connection.consume_results()
+    return count, time.perf_counter() - start
+
+def fetch_chunks(connection, query, chunk_size=DEFAULT_CHUNK_SIZE):
+    """非缓冲游标执行查询，返回 (列名, 分批行迭代器)"""
+    cursor = connection.cursor(buffered=False)
+    cursor.execute(query)
+    columns = list(cursor.column_names)
+
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            try:
+                cursor.close()
+            except Error:
+                connection.consume_results()
+
+    return columns, chunks()
+
+def snapshot_export(connection, path=snapshot_directory, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    导出列式快照：7 个表和所有视图，每列一个 .npy 文件，附 manifest.json
+
+    Returns:
+        dict: {表名: 导出行数}，导出失败的表为 -1
+    """
+    print(f"\n开始导出列式快照到 {path}...")
+    writer = SnapshotWriter(path)
+    counts = {}
+    timings = {}
+    sources = [(name, query, 'table') for name, query in TABLE_QUERIES]
+    sources += [(view, f"SELECT * FROM {view}", 'view') for view in get_view_list(connection)]
+    try:
+        for name, query, kind in sources:
+            start = time.perf_counter()
+            columns, chunks = fetch_chunks(connection, query, chunk_size)
+            count = writer.write_table(name, columns, chunks, kind)
+            timings[name] = (count, time.perf_counter() - start)
+            if kind == 'table':
+                counts[name] = count
+            print(f"成功导出 {name}，共 {count} 行数据，耗时 {timings[name][1]:.3f} 秒")
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    
+    print_timing_report(timings)
+    size = snapshot_size(path)
+    message = f"快照大小: {size / 1024:.1f} KB"
+    if os.path.exists(excel_file):
+        message += f"（{os.path.basename(excel_file)} 为 {os.path.getsize(excel_file) / 1024:.1f} KB）"
+    print(message)
+    return counts
+
+def print_timing_report(timings):
+    """打印每个表的导出行数和耗时"""
+    print("\n导出耗时:")
+    print("-" * 50)
+    print(f"{'名称':<20} {'行数':<10} {'耗时(秒)':<10} {'行/秒':<10}")
+    print("-" * 50)
+    for name, (count, seconds) in timings.items():
+        rate = count / seconds if seconds > 0 else 0
+        print(f"{name:<20} {count:<10} {seconds:<10.3f} {rate:<10.0f}")
+    print("-" * 50)
+
+def create_sink(output_format, path, prefix):
+    if output_format == 'csv':
+        return CsvSink(csv_directory, prefix)
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"\n已删除现有的 {os.path.basename(path)} 文件")
+    return XlsxSink(path)
+
+def stream_export(connection, output_format='xlsx', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式导出：表和视图逐批从服务端读取后直接写出
+
+    Returns:
+        dict: {表名: 导出行数}，导出失败的表为 -1
+    """
+    target = csv_directory if output_format == 'csv' else excel_file
+    print(f"\n开始流式导出数据到 {target}...")
+    sink = create_sink(output_format, excel_file, 'school_management')
+    counts = {}
+    timings = {}
+    for table_name, query in TABLE_QUERIES:
+        try:
+            print(f"正在导出 {table_name} 表...")
+            count, seconds = stream_query_to_sink(table_name, query, connection, sink, chunk_size)
+            counts[table_name] = count
+            timings[table_name] = (count, seconds)
+            print(f"成功导出 {table_name} 表，共 {count} 行数据，耗时 {seconds:.3f} 秒")
+        except Exception as e:
+            print(f"导出 {table_name} 表时出错: {e}")
+            counts[table_name] = -1
+    sink.close()
+    
+    views = get_view_list(connection)
+    if views:
+        print(f"\n找到 {len(views)} 个视图: {', '.join(views)}")
+        sink = create_sink(output_format, views_excel_file, 'school_management_views')
+        for view_name in views:
+            try:
+                count, seconds = stream_query_to_sink(view_name, f"SELECT * FROM {view_name}", connection, sink, chunk_size)
+                timings[view_name] = (count, seconds)
+                print(f"成功导出 {view_name} 视图，共 {count} 行数据，耗时 {seconds:.3f} 秒")
+            except Exception as e:
+                print(f"导出 {view_name} 视图时出错: {e}")
+        sink.close()
+    
+    print_timing_report(timings)
+    return counts
+
+def print_count_comparison(db_counts, excel_counts):
+    """比较数据库和导出文件的记录数"""
+    print("\n记录数比较结果:")
+    print("-" * 50)
+    print(f"{'表名':<15} {'数据库记录数':<15} {'导出记录数':<15} {'一致性':<10}")
+    print("-" * 50)
+    all_consistent = True
+    for table in db_counts.keys():
+        db_count = db_counts.get(table, 0)
+        export_count = excel_counts.get(table, 0)
+        if db_count != export_count:
+            all_consistent = False
+        print(f"{table:<15} {db_count:<15} {export_count:<15} {'是' if db_count == export_count else '否':<10}")
+    print("-" * 50)
+    if all_consistent:
+        print("所有表的记录数一致，数据导出成功！")
+    else:
+        print("部分表的记录数不一致，请检查数据。")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='导出学校数据')
+    parser.add_argument('--mode', choices=['stream', 'pandas'], default='stream',
+                        help='stream: 非缓冲游标分批读取并流式写出（默认）；pandas: 整表读入内存后写出')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'snapshot'], default='xlsx',
+                        help=f'流式导出的文件格式：csv 输出到 {os.path.basename(csv_directory)}/ 目录，'
+                             f'snapshot 输出列式快照到 {os.path.basename(snapshot_directory)}/ 目录')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'流式导出每批读取的行数（默认 {DEFAULT_CHUNK_SIZE}）')
+    args = parser.parse_args()
+    # pandas 模式只实现了 Excel 导出
+    if args.mode == 'pandas' and args.format != 'xlsx':
+        parser.error(f'--mode pandas 只支持 --format xlsx，导出 {args.format} 请使用 --mode stream')
+    return args
+
 def get_database_counts(connection):
     """从数据库获取每个表的记录数"""
     table_counts = {}
@@ -86,6 +325,8 @@ def get_view_list(connection):
         return []
 
 def main():
+    args = parse_args()
+    
     # 创建数据库连接
     connection = create_connection()
     if not connection:
@@ -98,6 +339,16 @@ def main():
         for table, count in db_counts.items():
             print(f"{table}: {count}")
         
+        if args.mode == 'stream' and args.format == 'snapshot':
+            export_counts = snapshot_export(connection, snapshot_directory, args.chunk_size)
+            print_count_comparison(db_counts, export_counts)
+            return
+        
+        if args.mode == 'stream':
+            export_counts = stream_export(connection, args.format, args.chunk_size)
+            print_count_comparison(db_counts, export_counts)
+            return
+        
         # 删除现有的Excel文件
         if os.path.exists(excel_file):
             os.remove(excel_file)
@@ -107,19 +358,9 @@ def main():
         print(f"\n开始导出数据到Excel文件 {excel_file}...")
         with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
             # 导出每个表到Excel的不同工作表
-            tables = [
-                ('Classes', 'SELECT class_id, class_name FROM Classes'),
-                ('Students', 'SELECT student_id, student_name, class_id, password FROM Students'),
-                ('Teachers', 'SELECT teacher_id, teacher_name, subject_id, password FROM Teachers'),
-                ('Subjects', 'SELECT subject_id, subject_name FROM Subjects'),
-                ('Scores', 'SELECT score_id, student_id, subject_id, exam_type_id, score FROM Scores'),
-                ('ExamTypes', 'SELECT type_id, exam_type_name FROM ExamTypes'),
-                ('TeacherClasses', 'SELECT teacher_id, class_id FROM TeacherClasses')
-            ]
-            
             excel_counts = {}
             success_count = 0
-            for table_name, query in tables:
+            for table_name, query in TABLE_QUERIES:
                 count = export_table_to_excel(table_name, query, connection, writer)
                 if count >= 0:
                     excel_counts[table_name] = count
@@ -129,27 +370,7 @@ def main():
         print(f"文件保存位置: {excel_file}")
         
         # 比较记录数
-        print("\n记录数比较结果:")
-        print("-" * 50)
-        print(f"{'表名':<15} {'数据库记录数':<15} {'Excel记录数':<15} {'一致性':<10}")
-        print("-" * 50)
-        
-        all_consistent = True
-        for table in db_counts.keys():
-            db_count = db_counts.get(table, 0)
-            excel_count = excel_counts.get(table, 0)
-            consistent = "是" if db_count == excel_count else "否"
-            
-            if db_count != excel_count:
-                all_consistent = False
-                
-            print(f"{table:<15} {db_count:<15} {excel_count:<15} {consistent:<10}")
-        
-        print("-" * 50)
-        if all_consistent:
-            print("所有表的记录数一致，数据导出成功！")
-        else:
-            print("部分表的记录数不一致，请检查数据。")
+        print_count_comparison(db_counts, excel_counts)
             
         # 导出视图到单独的Excel文件
         print(f"\n开始导出视图到Excel文件 {views_excel_file}...")
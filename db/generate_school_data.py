@@ -0,0 +1,271 @@
+"""
+生成用于规模测试的学校数据
+
+按比例放大现有数据（12 个班、每班 30 名学生、20 名教师、6 个科目、4 次考试），
+同一 --seed 每次生成的数据完全相同：
+- 每个班每个科目分配一名该科目的教师（TeacherClasses）
+- 成绩 = 学生能力 + 班级水平 + 科目难度 + 考试难度 + 随机波动，取整后限制在 0-100，
+  整体近似正态分布，同一学生各科各次考试的成绩相关
+
+输出到 MySQL（复用 import_school_data.py 的暂存表批量导入）、Excel 工作簿或列式快照，
+后两者可以用 import_school_data.py 导入。
+
+用法: python generate_school_data.py --scale 100 --target mysql
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from openpyxl import Workbook
+
+from import_school_data import DEFAULT_WORKERS, TABLE_SPECS, bulk_import, create_connection
+from snapshot import SnapshotWriter, snapshot_size
+
+db_directory = os.path.dirname(__file__)
+
+# 1 倍规模与现有备份数据一致
+BASE_CLASSES = 12
+BASE_TEACHERS = 20
+STUDENTS_PER_CLASS = 30
+
+SUBJECTS = ['语文', '数学', '英语', '物理', '化学', '政治']
+EXAM_TYPES = ['第一次月考', '期中考', '第二次月考', '期末考']
+STUDENT_PASSWORD = 'pass123'
+TEACHER_PASSWORD = '123456'
+
+# 成绩模型参数：学生能力均值/标准差、班级水平标准差、各科难度（加到成绩上）、考试难度标准差、单次考试波动
+ABILITY_MEAN = 74
+ABILITY_STD = 10
+CLASS_STD = 3
+SUBJECT_OFFSETS = [2, -4, 0, -5, -3, 3]
+EXAM_STD = 2
+NOISE_STD = 7
+
+SURNAMES = list('王李张刘陈杨赵黄周吴徐孙胡朱高林何郭马罗梁宋郑谢韩唐冯于董萧程曹袁邓许傅沈曾彭吕苏卢蒋蔡贾丁魏薛叶阎余潘杜戴夏钟汪田任姜范方石姚谭廖邹熊金陆郝孔白崔康毛邱秦江史顾侯邵孟龙万段雷钱汤尹黎易常武乔贺赖龚文')
+GIVEN_CHARS = list('伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红娥玲芬燕彬鹏辉浩宇轩雪波铭龙晨阳欣怡婷博文思佳子涵睿琪')
+
+# 计算成绩时每块的学生数
+SCORE_BLOCK_STUDENTS = 10000
+
+# Excel 工作表的行数上限（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+
+class ScoreRows:
+    """
+    Scores 表的行
+
+    分数以 (学生, 科目, 考试) 三维 int8 数组保存，切片时才生成行元组，
+    1000 倍规模（约 864 万行）也只占几 MB，score_id 按学生、科目、考试的顺序从 1 编号。
+    支持 len()、切片和迭代，可以直接交给 load_staging_table。
+    """
+
+    def __init__(self, student_ids, subject_ids, exam_type_ids, scores):
+        self.student_ids = student_ids
+        self.subject_ids = subject_ids
+        self.exam_type_ids = exam_type_ids
+        self.scores = scores
+        self.per_student = len(subject_ids) * len(exam_type_ids)
+
+    def __len__(self):
+        return self.scores.size
+
+    def _row(self, index, score):
+        student, rest = divmod(index, self.per_student)
+        subject, exam = divmod(rest, len(self.exam_type_ids))
+        return (index + 1, self.student_ids[student], self.subject_ids[subject], self.exam_type_ids[exam], score)
+
+    def __getitem__(self, index):
+        flat = self.scores.reshape(-1)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return [self._row(i, score) for i, score in zip(range(start, stop, step), flat[index].tolist())]
+        if index < 0:
+            index += len(self)
+        return self._row(index, int(flat[index]))
+
+    def __iter__(self):
+        for start in range(0, len(self), 100000):
+            yield from self[start:start + 100000]
+
+    def column_chunks(self, chunk_size=100000):
+        """
+        按 TABLE_SPECS 列顺序分批返回列数组，供 SnapshotWriter.write_arrays 直接写入，不构造行元组
+
+        学号列为 (学生下标, 学号列表) 的字典编码，其余列由行号 divmod 计算
+        """
+        flat = self.scores.reshape(-1)
+        subject_ids = np.asarray(self.subject_ids)
+        exam_type_ids = np.asarray(self.exam_type_ids)
+        for start in range(0, len(self), chunk_size):
+            index = np.arange(start, min(start + chunk_size, len(self)), dtype=np.int64)
+            student, rest = np.divmod(index, self.per_student)
+            subject, exam = np.divmod(rest, len(self.exam_type_ids))
+            yield [index + 1, (student, self.student_ids), subject_ids[subject], exam_type_ids[exam],
+                   flat[start:start + len(index)]]
+
+
+def _names(rng, count, length_choices=(1, 2)):
+    surnames = rng.integers(len(SURNAMES), size=count)
+    lengths = rng.choice(length_choices, size=count)
+    given = rng.integers(len(GIVEN_CHARS), size=(count, max(length_choices)))
+    return [SURNAMES[surnames[i]] + ''.join(GIVEN_CHARS[c] for c in given[i, :lengths[i]]) for i in range(count)]
+
+
+def generate(scale, seed=42, students_per_class=STUDENTS_PER_CLASS):
+    """
+    生成各表数据
+
+    Returns:
+        dict: {表名: 按 TABLE_SPECS 列顺序的行}，Scores 为 ScoreRows
+    """
+    rng = np.random.default_rng(seed)
+    class_count = max(1, round(BASE_CLASSES * scale))
+    teacher_count = max(len(SUBJECTS), round(BASE_TEACHERS * scale))
+    student_count = class_count * students_per_class
+
+    subjects = [(i + 1, name) for i, name in enumerate(SUBJECTS)]
+    exam_types = [(i + 1, name) for i, name in enumerate(EXAM_TYPES)]
+    classes = [(i + 1, f"高三{i + 1}班") for i in range(class_count)]
+
+    # 教师按科目轮流分配，每个班每科由该科的一名教师任教
+    teacher_surnames = rng.integers(len(SURNAMES), size=teacher_count)
+    teachers = [(i + 1, f"{SURNAMES[teacher_surnames[i]]}老师", i % len(SUBJECTS) + 1, TEACHER_PASSWORD)
+                for i in range(teacher_count)]
+    teachers_by_subject = {subject_id: [] for subject_id, _ in subjects}
+    for teacher_id, _, subject_id, _ in teachers:
+        teachers_by_subject[subject_id].append(teacher_id)
+    teacher_classes = sorted({
+        (teachers_by_subject[subject_id][index % len(teachers_by_subject[subject_id])], class_id)
+        for index, (class_id, _) in enumerate(classes)
+        for subject_id, _ in subjects
+    })
+
+    # 学号沿用 S + 班号 + 班内序号的格式，1 倍规模时为 S0101..S1230
+    class_width = max(2, len(str(class_count)))
+    seq_width = max(2, len(str(students_per_class)))
+    student_names = _names(rng, student_count)
+    students = []
+    for index in range(student_count):
+        class_index, seq = divmod(index, students_per_class)
+        student_id = f"S{class_index + 1:0{class_width}d}{seq + 1:0{seq_width}d}"
+        students.append((student_id, student_names[index], class_index + 1, STUDENT_PASSWORD))
+
+    ability = rng.normal(ABILITY_MEAN, ABILITY_STD, size=student_count)
+    ability += np.repeat(rng.normal(0, CLASS_STD, size=class_count), students_per_class)
+    exam_offsets = rng.normal(0, EXAM_STD, size=len(EXAM_TYPES))
+    offsets = np.asarray(SUBJECT_OFFSETS, dtype=float)[:, None] + exam_offsets[None, :]
+    # 按学生分块计算，浮点中间数组只占一块的大小；分块依次抽取的随机数与一次抽取的序列相同
+    scores = np.empty((student_count, len(SUBJECTS), len(EXAM_TYPES)), dtype=np.int8)
+    for start in range(0, student_count, SCORE_BLOCK_STUDENTS):
+        stop = min(start + SCORE_BLOCK_STUDENTS, student_count)
+        block = ability[start:stop, None, None] + offsets[None, :, :]
+        block += rng.normal(0, NOISE_STD, size=block.shape)
+        scores[start:stop] = np.clip(np.rint(block), 0, 100)
+
+    return {
+        'Subjects': subjects,
+        'ExamTypes': exam_types,
+        'Classes': classes,
+        'Students': students,
+        'Teachers': teachers,
+        'Scores': ScoreRows([student[0] for student in students], [subject_id for subject_id, _ in subjects],
+                            [exam_type_id for exam_type_id, _ in exam_types], scores),
+        'TeacherClasses': teacher_classes
+    }
+
+
+def write_excel(tables, path):
+    """写入与 import_school_data.py 读取格式一致的工作簿（只写模式，逐行写出）"""
+    too_large = [name for name, rows in tables.items() if len(rows) + 1 > EXCEL_MAX_ROWS]
+    if too_large:
+        raise ValueError(f"{', '.join(too_large)} 超过 Excel 工作表的行数上限，请使用 --target snapshot 或 mysql")
+    workbook = Workbook(write_only=True)
+    for name, spec in TABLE_SPECS.items():
+        sheet = workbook.create_sheet(name)
+        sheet.append(spec['columns'])
+        for row in tables[name]:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def write_snapshot(tables, path):
+    writer = SnapshotWriter(path)
+    try:
+        for name, spec in TABLE_SPECS.items():
+            rows = tables[name]
+            if isinstance(rows, ScoreRows):
+                # 成绩直接从 int8 数组按列写出，内存占用不随规模增长为行元组
+                writer.write_arrays(name, spec['columns'], rows.column_chunks())
+                continue
+            chunks = (rows[start:start + 100000] for start in range(0, len(rows), 100000))
+            writer.write_table(name, spec['columns'], chunks)
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def print_summary(tables, seconds):
+    print("\n生成的数据:")
+    print("-" * 30)
+    print(f"{'表名':<15} {'记录数':<10}")
+    print("-" * 30)
+    for name in TABLE_SPECS:
+        print(f"{name:<15} {len(tables[name]):<10}")
+    print("-" * 30)
+    scores = tables['Scores'].scores
+    print(f"成绩均值 {scores.mean():.1f}，标准差 {scores.std():.1f}，不及格比例 {(scores < 60).mean() * 100:.1f}%")
+    print(f"生成耗时: {seconds:.3f} 秒")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='生成用于规模测试的学校数据')
+    parser.add_argument('--scale', type=float, default=1,
+                        help=f'数据规模倍数，1 倍为 {BASE_CLASSES} 个班、{BASE_CLASSES * STUDENTS_PER_CLASS} 名学生（默认 1）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子（默认 42）')
+    parser.add_argument('--students-per-class', type=int, default=STUDENTS_PER_CLASS,
+                        help=f'每班学生数（默认 {STUDENTS_PER_CLASS}）')
+    parser.add_argument('--target', choices=['mysql', 'excel', 'snapshot'], default='snapshot',
+                        help='mysql: 批量导入数据库（替换现有数据）；excel/snapshot: 写入文件，之后用 import_school_data.py 导入')
+    parser.add_argument('--output', help='excel/snapshot 的输出路径（默认 db/generated_<倍数>x.xlsx 或 db/snapshot_<倍数>x/）')
+    parser.add_argument('--load-data', action='store_true',
+                        help='mysql 模式下用 LOAD DATA LOCAL INFILE 装载暂存表')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'mysql 模式下并行装载的连接数（默认 {DEFAULT_WORKERS}）')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    tables = generate(args.scale, args.seed, args.students_per_class)
+    print_summary(tables, time.perf_counter() - start)
+
+    label = f"{args.scale:g}x"
+    start = time.perf_counter()
+    if args.target == 'mysql':
+        connection = create_connection(allow_local_infile=True) if args.load_data else create_connection()
+        if not connection:
+            return
+        try:
+            bulk_import(connection, lambda table_name: tables[table_name],
+                        use_load_data=args.load_data, workers=args.workers)
+        finally:
+            connection.close()
+        print(f"已写入数据库，耗时 {time.perf_counter() - start:.3f} 秒")
+    elif args.target == 'excel':
+        path = args.output or os.path.join(db_directory, f"generated_{label}.xlsx")
+        write_excel(tables, path)
+        print(f"已写入 {path}，耗时 {time.perf_counter() - start:.3f} 秒，"
+              f"导入: python import_school_data.py --excel {path}")
+    else:
+        path = args.output or os.path.join(db_directory, f"snapshot_{label}")
+        write_snapshot(tables, path)
+        print(f"已写入 {path}（{snapshot_size(path) / 1024 / 1024:.1f} MB），耗时 {time.perf_counter() - start:.3f} 秒，"
+              f"导入: python import_school_data.py --source snapshot --snapshot {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import pandas as pd
 import mysql.connector
+from openpyxl import load_workbook
+
+from snapshot import Snapshot
 from mysql.connector import Error
 import numpy as np
-import os
 
 # 数据库连接配置
 db_config = {
@@ -15,10 +27,46 @@ db_config = {
 # Excel文件路径
 excel_file = os.path.join(os.path.dirname(__file__), 'school_management.xlsx')
 
-def create_connection():
+# 列式快照目录（由 export_school_data.py --format snapshot 生成）
+snapshot_directory = os.path.join(os.path.dirname(__file__), 'snapshot')
+
+# 各表的列（与工作表列名一致）、主键和引用的表
+# depends_on 补充数据库中没有建外键的引用（如 Teachers.subject_id），实际依赖还会合并 information_schema 中的外键
+TABLE_SPECS = {
+    'Subjects': {'columns': ['subject_id', 'subject_name'], 'key': ['subject_id'], 'depends_on': []},
+    'ExamTypes': {'columns': ['exam_type_id', 'exam_type_name'], 'key': ['exam_type_id'], 'depends_on': []},
+    'Classes': {'columns': ['class_id', 'class_name'], 'key': ['class_id'], 'depends_on': []},
+    'Students': {'columns': ['student_id', 'student_name', 'class_id', 'password'], 'key': ['student_id'],
+                 'depends_on': ['Classes']},
+    'Teachers': {'columns': ['teacher_id', 'teacher_name', 'subject_id', 'password'], 'key': ['teacher_id'],
+                 'depends_on': ['Subjects']},
+    'Scores': {'columns': ['score_id', 'student_id', 'subject_id', 'exam_type_id', 'score'], 'key': ['score_id'],
+               'depends_on': ['Students', 'Subjects', 'ExamTypes']},
+    'TeacherClasses': {'columns': ['teacher_id', 'class_id'], 'key': ['teacher_id', 'class_id'],
+                       'depends_on': ['Teachers', 'Classes']}
+}
+
+# 各列的类型：整数列用可空整数，避免含空值时被读成浮点数
+COLUMN_DTYPES = {
+    'class_id': 'Int64', 'subject_id': 'Int64', 'exam_type_id': 'Int64', 'teacher_id': 'Int64',
+    'score_id': 'Int64', 'score': 'Int64',
+    'student_id': 'string', 'class_name': 'string', 'subject_name': 'string', 'exam_type_name': 'string',
+    'student_name': 'string', 'teacher_name': 'string', 'password': 'string'
+}
+
+# 解析后的工作表缓存目录；工作簿内容或列类型不变时直接读取缓存
+PARSE_CACHE_DIR = os.path.join(os.path.dirname(__file__), '.import_cache')
+PARSE_CACHE_VERSION = 1
+
+# 批量导入：暂存表后缀、executemany 每批行数和并行装载的连接数
+STAGING_SUFFIX = '_staging'
+BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+
+def create_connection(**options):
     """创建数据库连接"""
     try:
-        connection = mysql.connector.connect(**db_config)
+        connection = mysql.connector.connect(**db_config, **options)
         if connection.is_connected():
             print("成功连接到MySQL数据库")
             return connection
@@ -44,11 +92,12 @@ def get_database_counts(connection):
     
     return table_counts
 
-def import_sheet_to_table(sheet_name, table_name, connection):
+def import_sheet_to_table(sheet_name, table_name, connection, df=None):
     """将工作表导入到数据库表中"""
     try:
         # 读取Excel工作表
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        if df is None:
+            df = pd.read_excel(excel_file, sheet_name=sheet_name)
         print(f"正在处理工作表: {sheet_name}，数据行数: {len(df)}")
         
         if df.empty:
@@ -113,48 +162,560 @@ def import_sheet_to_table(sheet_name, table_name, connection):
         traceback.print_exc()
         connection.rollback()
 
-def main():
-    # 检查Excel文件是否存在
-    if not os.path.exists(excel_file):
-        print(f"错误：找不到Excel文件 {excel_file}")
-        return
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _parse_cache_path(path):
+    """缓存键：文件内容哈希 + 缓存格式版本 + 列类型定义"""
+    stat = os.stat(path)
+    index_path = os.path.join(PARSE_CACHE_DIR, 'index.pkl')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            index = pickle.load(f)
+    # 路径、大小和修改时间都没变时沿用上次的哈希，不再读整个文件
+    file_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = index.get(file_key)
+    if digest is None:
+        digest = _file_digest(path)
+        index = {key: value for key, value in index.items() if key[0] != file_key[0]}
+        index[file_key] = digest
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        with open(index_path, 'wb') as f:
+            pickle.dump(index, f)
+    spec_digest = hashlib.sha256(repr((PARSE_CACHE_VERSION, sorted(COLUMN_DTYPES.items()),
+                                       [(table, spec['columns']) for table, spec in TABLE_SPECS.items()])).encode()).hexdigest()
+    return os.path.join(PARSE_CACHE_DIR, f"{digest[:32]}_{spec_digest[:12]}.pkl")
+
+def parse_workbook(path):
+    """只读模式打开工作簿一次，按行流式读取所有工作表，并按 COLUMN_DTYPES 转换列类型"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        frames = {}
+        for table_name in TABLE_SPECS:
+            if table_name not in workbook.sheetnames:
+                raise ValueError(f"工作簿缺少工作表: {table_name}")
+            rows = workbook[table_name].iter_rows(values_only=True)
+            header = next(rows, ())
+            columns = [str(column) for column in header if column is not None]
+            data = [row[:len(columns)] for row in rows if any(value is not None for value in row)]
+            df = pd.DataFrame(data, columns=columns)
+            frames[table_name] = df.astype({column: COLUMN_DTYPES[column] for column in columns if column in COLUMN_DTYPES})
+        return frames
+    finally:
+        workbook.close()
+
+def read_workbook(path=excel_file, use_cache=True):
+    """
+    读取整个工作簿
+
+    解析结果按文件内容哈希缓存到 PARSE_CACHE_DIR，文件未变化时跳过解析。
+
+    Returns:
+        dict: {工作表名: DataFrame}
+    """
+    start = time.perf_counter()
+    cache_path = _parse_cache_path(path) if use_cache else None
+    if cache_path and os.path.exists(cache_path):
+        frames = pd.read_pickle(cache_path)
+        print(f"使用已解析的工作表缓存 {os.path.basename(cache_path)}，耗时 {time.perf_counter() - start:.3f} 秒")
+        return frames
     
-    # 创建数据库连接
-    connection = create_connection()
-    if not connection:
+    frames = parse_workbook(path)
+    print(f"解析工作簿 {os.path.basename(path)} 耗时 {time.perf_counter() - start:.3f} 秒")
+    if cache_path:
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        # 先写临时文件再改名，避免中断时留下不完整的缓存
+        tmp_path = cache_path + '.tmp'
+        pd.to_pickle(frames, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return frames
+
+def dataframe_to_rows(df, columns):
+    """按列把 DataFrame 转为 Python 原生类型（NaN 转为 None），再拼成行元组，避免 iterrows 逐行构造 Series"""
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"工作表缺少列: {', '.join(missing)}")
+    values = []
+    for column in columns:
+        series = df[column]
+        values.append(series.astype(object).where(series.notna(), None).tolist())
+    return list(zip(*values))
+
+def _csv_field(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _load_data_infile(cursor, staging_table, columns, rows):
+    """写临时 CSV 后用 LOAD DATA LOCAL INFILE 装载，需要服务端开启 local_infile"""
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.csv', delete=False) as f:
+        for row in rows:
+            f.write(','.join(_csv_field(value) for value in row))
+            f.write('\n')
+        path = f.name
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {staging_table} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+        )
+    finally:
+        os.remove(path)
+
+def load_staging_table(table_name, rows, connection, use_load_data=False):
+    """
+    把行数据（按 TABLE_SPECS 中列顺序的元组）装入暂存表 <表名>_staging
+
+    暂存表用 CREATE TABLE ... LIKE 创建，不带外键，装载顺序不受依赖关系限制。
+
+    Returns:
+        dict: 行数、耗时和每秒行数
+    """
+    spec = TABLE_SPECS[table_name]
+    columns = spec['columns']
+    staging_table = table_name + STAGING_SUFFIX
+    start = time.perf_counter()
+    
+    cursor = connection.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+    cursor.execute(f"CREATE TABLE {staging_table} LIKE {table_name}")
+    
+    if rows:
+        if use_load_data:
+            _load_data_infile(cursor, staging_table, columns, rows)
+        else:
+            insert_query = f"INSERT INTO {staging_table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            # mysql.connector 会把 INSERT ... VALUES 的 executemany 改写为多行插入
+            for i in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(insert_query, rows[i:i + BATCH_SIZE])
+    connection.commit()
+    
+    elapsed = time.perf_counter() - start
+    return {'rows': len(rows), 'seconds': elapsed, 'rows_per_sec': len(rows) / elapsed if elapsed > 0 else 0}
+
+def get_foreign_key_dependencies(connection):
+    """从 information_schema 读取当前库的外键：{表: {被引用的表}}"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT TABLE_NAME, REFERENCED_TABLE_NAME
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+    """)
+    dependencies = {}
+    for table, referenced in cursor.fetchall():
+        dependencies.setdefault(table, set()).add(referenced)
+    return dependencies
+
+def build_dependency_graph(connection, table_names):
+    """合并外键和 TABLE_SPECS 中声明的引用，只保留本次导入的表"""
+    foreign_keys = get_foreign_key_dependencies(connection)
+    graph = {}
+    for table in table_names:
+        dependencies = set(TABLE_SPECS[table]['depends_on']) | foreign_keys.get(table, set())
+        graph[table] = {dependency for dependency in dependencies
+                        if dependency in table_names and dependency != table}
+    return graph
+
+def topological_order(graph):
+    """被引用的表在前；同一层按 TABLE_SPECS 中的顺序，存在循环依赖时报错"""
+    remaining = {table: set(dependencies) for table, dependencies in graph.items()}
+    order = []
+    while remaining:
+        ready = [table for table in TABLE_SPECS if table in remaining and not remaining[table]]
+        if not ready:
+            raise ValueError(f"表之间存在循环依赖: {', '.join(remaining)}")
+        for table in ready:
+            del remaining[table]
+            order.append(table)
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+    return order
+
+def run_in_dependency_order(graph, task, workers):
+    """
+    按依赖关系并行执行 task(table)
+
+    一个表的所有依赖完成后立即提交到线程池，互不依赖的表同时执行，
+    总耗时取决于最慢的一条依赖链。依赖失败的表不再执行。
+
+    Returns:
+        tuple: ({表: task 返回值}, {表: 异常或跳过原因})
+    """
+    results = {}
+    errors = {}
+    pending = {table: set(dependencies) for table, dependencies in graph.items()}
+    running = {}
+    total = len(graph)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for table in [table for table in TABLE_SPECS if table in pending]:
+                dependencies = pending[table]
+                failed = [dependency for dependency in dependencies if dependency in errors]
+                if failed:
+                    del pending[table]
+                    errors[table] = f"依赖的表导入失败: {', '.join(failed)}"
+                    print(f"[{len(results) + len(errors)}/{total}] 跳过 {table}: {errors[table]}")
+                elif dependencies <= set(results):
+                    del pending[table]
+                    print(f"开始导入 {table}")
+                    running[executor.submit(task, table)] = table
+            if not running:
+                continue
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                try:
+                    results[table] = future.result()
+                    item = results[table]
+                    print(f"[{len(results) + len(errors)}/{total}] {table} 完成: {item['rows']} 行，"
+                          f"{item['seconds']:.3f} 秒，{item['rows_per_sec']:.0f} 行/秒")
+                except Exception as e:
+                    errors[table] = e
+                    print(f"[{len(results) + len(errors)}/{total}] {table} 导入失败: {e}")
+    return results, errors
+
+def merge_staging_tables(order, connection):
+    """
+    在一个事务中用暂存表替换正式表的数据
+
+    order 为依赖顺序（被引用的表在前）。用 DELETE 而不是 TRUNCATE（TRUNCATE 会隐式提交），
+    失败时整体回滚，正式表保持原样。
+    """
+    cursor = connection.cursor()
+    start = time.perf_counter()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        connection.start_transaction()
+        for table in reversed(order):
+            cursor.execute(f"DELETE FROM {table}")
+        for table in order:
+            columns = ', '.join(TABLE_SPECS[table]['columns'])
+            cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}{STAGING_SUFFIX}")
+        refresh_exam_results_cache(cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        for table in order:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}{STAGING_SUFFIX}")
+    return time.perf_counter() - start
+
+# API 的 exam_results 物化表（见 api/apps/services/exam_result_service.py），导入成绩后需要随之重建；
+# 重建语句与 API 共用同一个文件
+EXAM_RESULTS_CACHE_REFRESH_FILE = os.path.join(os.path.dirname(__file__), '..', 'api', 'apps', 'services',
+                                               'exam_results_cache_refresh.sql')
+
+def refresh_exam_results_cache(cursor):
+    """在当前事务中重建 exam_results_cache（表不存在时由 API 首次使用时创建，这里跳过）"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'exam_results_cache'
+    """)
+    if not cursor.fetchone()[0]:
         return
+    cursor.execute("DELETE FROM exam_results_cache")
+    with open(EXAM_RESULTS_CACHE_REFRESH_FILE, encoding='utf-8') as f:
+        cursor.execute(f.read().format(where=''))
+
+def _normalize_value(value):
+    """统一 Excel/快照和数据库读出的值的类型，使同一数据得到相同哈希"""
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def row_digest(row):
+    return hashlib.blake2b(repr(tuple(_normalize_value(value) for value in row)).encode('utf-8'),
+                           digest_size=16).digest()
+
+def _key_getter(table_name):
+    spec = TABLE_SPECS[table_name]
+    positions = [spec['columns'].index(column) for column in spec['key']]
+    return lambda row: tuple(_normalize_value(row[position]) for position in positions)
+
+def fetch_table_digests(connection, table_name, chunk_size=BATCH_SIZE):
+    """用非缓冲游标分批读取当前表，返回 {主键: 行哈希}"""
+    columns = TABLE_SPECS[table_name]['columns']
+    key_of = _key_getter(table_name)
+    cursor = connection.cursor(buffered=False)
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table_name}")
+    digests = {}
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                digests[key_of(row)] = row_digest(row)
+    finally:
+        cursor.close()
+    return digests
+
+def diff_table(table_name, source_rows, current_digests):
+    """
+    比较源数据和当前表
+
+    Returns:
+        dict: insert/update 为需要写入的行，delete 为需要删除的主键，unchanged 为未变化行数
+    """
+    key_of = _key_getter(table_name)
+    source = {}
+    for row in source_rows:
+        key = key_of(row)
+        if key in source:
+            print(f"警告：{table_name} 中主键 {key} 重复，以最后一行为准")
+        source[key] = row
     
+    diff = {'insert': [], 'update': [], 'delete': [], 'unchanged': 0}
+    for key, row in source.items():
+        current = current_digests.get(key)
+        if current is None:
+            diff['insert'].append(row)
+        elif current != row_digest(row):
+            diff['update'].append(row)
+        else:
+            diff['unchanged'] += 1
+    diff['delete'] = [key for key in current_digests if key not in source]
+    return diff
+
+def apply_diffs(connection, order, diffs):
+    """
+    在一个事务中应用差异
+
+    先按依赖顺序写入新增/修改的行（被引用的表在前），再按相反顺序删除，
+    外键检查保持开启，任一步失败整体回滚。
+    """
+    cursor = connection.cursor()
+    connection.start_transaction()
     try:
-        # 先禁用外键检查以避免导入顺序问题
-        cursor = connection.cursor()
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
-        
-        # 清空现有数据
-        tables_to_truncate = ['TeacherClasses', 'Scores', 'Students', 'Teachers', 'Classes', 'ExamTypes', 'Subjects']
-        for table in tables_to_truncate:
-            try:
-                cursor.execute(f"TRUNCATE TABLE {table}")
-                print(f"已清空 {table} 表")
-            except Exception as e:
-                print(f"清空 {table} 表时出错: {e}")
+        for table in order:
+            spec = TABLE_SPECS[table]
+            rows = diffs[table]['insert'] + diffs[table]['update']
+            if not rows:
+                continue
+            columns = spec['columns']
+            values = [column for column in columns if column not in spec['key']]
+            placeholders = ', '.join(['%s'] * len(columns))
+            if values:
+                updates = ', '.join(f"{column}=VALUES({column})" for column in values)
+                query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE {updates}"
+            else:
+                query = f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            for i in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(query, rows[i:i + BATCH_SIZE])
         
-        # 映射工作表名称到数据库表名称（注意顺序，先导入主表）
-        sheet_to_table = [
-            ('Subjects', 'Subjects'),      # 先导入Subjects表
-            ('ExamTypes', 'ExamTypes'),    # 再导入ExamTypes表
-            ('Classes', 'Classes'),        # 再导入Classes表
-            ('Students', 'Students'),      # 再导入Students表
-            ('Teachers', 'Teachers'),      # 再导入Teachers表
-            ('Scores', 'Scores'),          # 最后导入Scores表
-            ('TeacherClasses', 'TeacherClasses')  # 最后导入TeacherClasses表
-        ]
+        for table in reversed(order):
+            keys = diffs[table]['delete']
+            key_columns = TABLE_SPECS[table]['key']
+            for i in range(0, len(keys), BATCH_SIZE):
+                batch = keys[i:i + BATCH_SIZE]
+                if len(key_columns) == 1:
+                    condition = f"{key_columns[0]} IN ({', '.join(['%s'] * len(batch))})"
+                else:
+                    tuple_placeholder = f"({', '.join(['%s'] * len(key_columns))})"
+                    condition = f"({', '.join(key_columns)}) IN ({', '.join([tuple_placeholder] * len(batch))})"
+                cursor.execute(f"DELETE FROM {table} WHERE {condition}", [value for key in batch for value in key])
         
-        # 导入每个工作表
-        for sheet_name, table_name in sheet_to_table:
-            import_sheet_to_table(sheet_name, table_name, connection)
+        if any(diffs[table]['insert'] or diffs[table]['update'] or diffs[table]['delete']
+               for table in ('Scores', 'Students', 'ExamTypes', 'Subjects')):
+            refresh_exam_results_cache(cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+def print_diff_report(diffs, sample_size=5):
+    print("\n增量导入差异:")
+    print("-" * 60)
+    print(f"{'表名':<15} {'新增':<10} {'修改':<10} {'删除':<10} {'未变化':<10}")
+    print("-" * 60)
+    for table, diff in diffs.items():
+        print(f"{table:<15} {len(diff['insert']):<10} {len(diff['update']):<10} {len(diff['delete']):<10} {diff['unchanged']:<10}")
+    print("-" * 60)
+    key_of = {table: _key_getter(table) for table in diffs}
+    for table, diff in diffs.items():
+        for action in ('insert', 'update'):
+            if diff[action]:
+                keys = [key_of[table](row) for row in diff[action][:sample_size]]
+                print(f"{table} {action}: {keys}{' ...' if len(diff[action]) > sample_size else ''}")
+        if diff['delete']:
+            print(f"{table} delete: {diff['delete'][:sample_size]}{' ...' if len(diff['delete']) > sample_size else ''}")
+
+def incremental_import(connection, read_rows, dry_run=False):
+    """
+    增量导入：按主键比较行哈希，只应用新增、修改和删除，不清空表
+
+    dry_run 时只输出差异报告，不修改数据库
+    """
+    start = time.perf_counter()
+    order = topological_order(build_dependency_graph(connection, list(TABLE_SPECS)))
+    diffs = {}
+    for table in order:
+        diffs[table] = diff_table(table, read_rows(table), fetch_table_digests(connection, table))
+    diff_seconds = time.perf_counter() - start
+    print_diff_report(diffs)
+    
+    changes = sum(len(diff['insert']) + len(diff['update']) + len(diff['delete']) for diff in diffs.values())
+    if dry_run:
+        print(f"试运行：共 {changes} 处差异，未修改数据库（比较耗时 {diff_seconds:.3f} 秒）")
+        return
+    if not changes:
+        print(f"数据没有变化（比较耗时 {diff_seconds:.3f} 秒）")
+        return
+    
+    apply_start = time.perf_counter()
+    apply_diffs(connection, order, diffs)
+    print(f"已应用 {changes} 处差异：比较耗时 {diff_seconds:.3f} 秒，写入耗时 {time.perf_counter() - apply_start:.3f} 秒")
+
+def print_load_report(stats, merge_seconds):
+    """打印每个工作表的装载速度"""
+    print("\n批量导入耗时:")
+    print("-" * 50)
+    print(f"{'表名':<15} {'行数':<10} {'耗时(秒)':<10} {'行/秒':<10}")
+    print("-" * 50)
+    for table, item in stats.items():
+        print(f"{table:<15} {item['rows']:<10} {item['seconds']:<10.3f} {item['rows_per_sec']:<10.0f}")
+    print("-" * 50)
+    print(f"合并到正式表耗时: {merge_seconds:.3f} 秒")
+
+def bulk_import(connection, read_rows, use_load_data=False, workers=DEFAULT_WORKERS):
+    """
+    批量导入：按外键依赖并行把各工作表装入暂存表，每个表使用独立连接；
+    全部成功后在一个事务中替换正式表，任一表失败则正式表保持不变
+
+    read_rows(table_name) 返回该表按 TABLE_SPECS 列顺序的行元组列表
+    """
+    graph = build_dependency_graph(connection, list(TABLE_SPECS))
+    order = topological_order(graph)
+    print(f"导入顺序（依赖）: {' -> '.join(order)}")
+    connect_options = {'allow_local_infile': True} if use_load_data else {}
+    print_lock = threading.Lock()
+    
+    def load(table_name):
+        rows = read_rows(table_name)
+        with print_lock:
+            print(f"正在处理工作表: {table_name}，数据行数: {len(rows)}")
+        table_connection = create_connection(**connect_options)
+        if not table_connection:
+            raise ConnectionError(f"无法为 {table_name} 创建数据库连接")
+        try:
+            return load_staging_table(table_name, rows, table_connection, use_load_data)
+        finally:
+            table_connection.close()
+    
+    start = time.perf_counter()
+    stats, errors = run_in_dependency_order(graph, load, workers)
+    load_seconds = time.perf_counter() - start
+    if errors:
+        cursor = connection.cursor()
+        for table in graph:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}{STAGING_SUFFIX}")
+        raise RuntimeError(f"以下表导入失败，正式表未修改: {', '.join(errors)}")
+    
+    merge_seconds = merge_staging_tables(order, connection)
+    print_load_report({table: stats[table] for table in order}, merge_seconds)
+    print(f"并行装载总耗时: {load_seconds:.3f} 秒（各表耗时之和 {sum(item['seconds'] for item in stats.values()):.3f} 秒）")
+
+def row_import(connection, frames):
+    """逐行导入（旧模式）：清空各表后逐行插入"""
+    # 先禁用外键检查以避免导入顺序问题
+    cursor = connection.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    
+    # 清空现有数据
+    tables_to_truncate = ['TeacherClasses', 'Scores', 'Students', 'Teachers', 'Classes', 'ExamTypes', 'Subjects']
+    for table in tables_to_truncate:
+        try:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+            print(f"已清空 {table} 表")
+        except Exception as e:
+            print(f"清空 {table} 表时出错: {e}")
+    
+    # 映射工作表名称到数据库表名称（注意顺序，先导入主表）
+    sheet_to_table = [
+        ('Subjects', 'Subjects'),      # 先导入Subjects表
+        ('ExamTypes', 'ExamTypes'),    # 再导入ExamTypes表
+        ('Classes', 'Classes'),        # 再导入Classes表
+        ('Students', 'Students'),      # 再导入Students表
+        ('Teachers', 'Teachers'),      # 再导入Teachers表
+        ('Scores', 'Scores'),          # 最后导入Scores表
+        ('TeacherClasses', 'TeacherClasses')  # 最后导入TeacherClasses表
+    ]
+    
+    # 导入每个工作表
+    for sheet_name, table_name in sheet_to_table:
+        import_sheet_to_table(sheet_name, table_name, connection, frames[sheet_name])
+    
+    # 重新启用外键检查
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='从 Excel 导入学校数据')
+    parser.add_argument('--mode', choices=['bulk', 'incremental', 'row'], default='bulk',
+                        help='bulk: 暂存表批量装载后整体替换（默认）；incremental: 只应用差异；row: 逐行导入')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='增量模式下只输出差异报告，不修改数据库')
+    parser.add_argument('--load-data', action='store_true',
+                        help='批量模式下用 LOAD DATA LOCAL INFILE 装载暂存表')
+    parser.add_argument('--source', choices=['excel', 'snapshot'], default='excel',
+                        help='数据来源：Excel 工作簿（默认）或列式快照（仅批量模式）')
+    parser.add_argument('--excel', default=excel_file,
+                        help='Excel 工作簿路径')
+    parser.add_argument('--snapshot', default=snapshot_directory,
+                        help='列式快照目录')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用已解析的工作表缓存，重新解析 Excel 文件')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'批量模式下并行装载的连接数（默认 {DEFAULT_WORKERS}）')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    
+    if args.source == 'snapshot':
+        if args.mode == 'row':
+            print("错误：从快照导入不支持逐行模式")
+            return
+        if not os.path.exists(os.path.join(args.snapshot, 'manifest.json')):
+            print(f"错误：找不到快照 {args.snapshot}")
+            return
+        # 列文件内存映射，按表读取时才加载
+        snapshot = Snapshot(args.snapshot)
+        read_rows = lambda table_name: snapshot.rows(table_name, TABLE_SPECS[table_name]['columns'])
+    else:
+        # 检查Excel文件是否存在
+        if not os.path.exists(args.excel):
+            print(f"错误：找不到Excel文件 {args.excel}")
+            return
         
-        # 重新启用外键检查
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        # 一次读取全部工作表
+        frames = read_workbook(args.excel, use_cache=not args.no_cache)
+        read_rows = lambda table_name: dataframe_to_rows(frames[table_name], TABLE_SPECS[table_name]['columns'])
+    
+    # 创建数据库连接
+    connection = create_connection(allow_local_infile=True) if args.load_data else create_connection()
+    if not connection:
+        return
+    
+    try:
+        if args.mode == 'bulk':
+            bulk_import(connection, read_rows, use_load_data=args.load_data, workers=args.workers)
+        elif args.mode == 'incremental':
+            incremental_import(connection, read_rows, dry_run=args.dry_run)
+        else:
+            row_import(connection, frames)
         
         # 显示导入后的数据库记录数
         print("\n数据导入完成，数据库中的记录数:")
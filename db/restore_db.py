@@ -0,0 +1,388 @@
+"""
+从 backup_db.py 生成的按表备份并行恢复数据库
+
+1. 按 schema/ 中的建表语句重建表，只保留主键，二级索引和外键约束推迟到数据装载之后
+2. 多个连接并行装载 data/ 中的表数据，关闭外键和唯一性检查，边读边校验 sha256
+3. 每个表一条 ALTER TABLE 补建二级索引和外键（各表并行），一次排序建索引比逐行维护快得多
+4. 依次重建存储过程/函数、视图（按 manifest 中的依赖顺序）和触发器
+5. 核对各表行数与 manifest 是否一致
+
+用法: python restore_db.py [备份目录名] [--latest] [--database 数据库名] [--workers 4] [--load-data] [--auto]
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import mysql.connector
+from mysql.connector import Error
+
+from backup_db import BACKUP_FORMAT_VERSION, MANIFEST_FILE, backup_directory, db_config
+
+# 并行装载的连接数和 executemany 每批行数
+DEFAULT_WORKERS = 4
+BATCH_SIZE = 5000
+
+# 建表语句中推迟到装载后再建的定义行
+DEFERRED_DEFINITION = re.compile(r'^\s*(UNIQUE KEY|KEY|FULLTEXT KEY|SPATIAL KEY|CONSTRAINT)\s')
+TSV_ESCAPE = re.compile(r'\\(.)')
+TSV_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+def create_connection(database, **options):
+    """创建数据库连接，database 为 None 时只连接服务器"""
+    config = dict(db_config, **options)
+    if database is None:
+        config.pop('database')
+    else:
+        config['database'] = database
+    try:
+        connection = mysql.connector.connect(**config)
+        if connection.is_connected():
+            return connection
+    except Error as e:
+        print(f"连接MySQL时出错: {e}")
+        return None
+
+def find_backup(name=None):
+    """返回备份目录；不指定名称时取最新的一个（按修改时间）"""
+    if name:
+        path = name if os.path.isabs(name) else os.path.join(backup_directory, name)
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise FileNotFoundError(f"备份 {path} 不存在或缺少 {MANIFEST_FILE}")
+        return os.path.abspath(path)
+    manifests = sorted(glob.glob(os.path.join(backup_directory, '*', MANIFEST_FILE)),
+                       key=os.path.getmtime)
+    if not manifests:
+        raise FileNotFoundError(f"{backup_directory} 中没有 backup_db.py 生成的备份")
+    return os.path.abspath(os.path.dirname(manifests[-1]))
+
+def load_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != BACKUP_FORMAT_VERSION:
+        raise ValueError(f"不支持的备份格式版本: {manifest.get('version')}")
+    return manifest
+
+def _read_sql(path, name_or_file):
+    with open(os.path.join(path, name_or_file), encoding='utf-8') as f:
+        return f.read().strip().rstrip(';')
+
+def split_create_table(statement):
+    """
+    拆分建表语句
+
+    Returns:
+        tuple: (只含列和主键的建表语句, 推迟执行的 ALTER TABLE 子句列表)
+    """
+    lines = statement.splitlines()
+    # 第一行是 CREATE TABLE，最后一行是 ") ENGINE=... " 表选项
+    body = [line.rstrip().rstrip(',') for line in lines[1:-1]]
+    # 自增列必须是某个索引的第一列，以它开头的二级索引不能推迟
+    auto_increment = [line.split('`')[1] for line in body
+                      if line.strip().startswith('`') and ' AUTO_INCREMENT' in line]
+
+    def is_deferred(line):
+        if not DEFERRED_DEFINITION.match(line):
+            return False
+        return 'FOREIGN KEY' in line or not any(f"(`{column}`" in line for column in auto_increment)
+
+    kept = [line for line in body if not is_deferred(line)]
+    deferred = ['ADD ' + line.strip() for line in body if is_deferred(line)]
+    return '\n'.join([lines[0], ',\n'.join(kept), lines[-1]]), deferred
+
+def _unescape(field):
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    return TSV_ESCAPE.sub(lambda match: TSV_ESCAPES.get(match.group(1), match.group(1)), field)
+
+def read_table_rows(path, item):
+    """
+    逐行读取表数据文件，同时计算 sha256，读完后与 manifest 比对
+
+    Yields:
+        tuple: 一行的字段值，空值为 None
+    """
+    digest = hashlib.sha256()
+    with gzip.open(os.path.join(path, item['file']), 'rb') as f:
+        for line in f:
+            digest.update(line)
+            yield tuple(_unescape(field) for field in line.decode('utf-8').rstrip('\n').split('\t'))
+    if digest.hexdigest() != item['sha256']:
+        raise ValueError(f"{item['file']} 校验失败，备份文件可能已损坏")
+
+def _session_for_bulk_load(cursor):
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    cursor.execute("SET UNIQUE_CHECKS = 0")
+
+def load_table(table, item, path, database, use_load_data=False):
+    """
+    在独立连接上装载一个表
+
+    Returns:
+        dict: 行数、耗时和每秒行数
+    """
+    start = time.perf_counter()
+    connection = create_connection(database, allow_local_infile=use_load_data)
+    if not connection:
+        raise RuntimeError("无法连接数据库")
+    try:
+        cursor = connection.cursor()
+        _session_for_bulk_load(cursor)
+        columns = ', '.join(f"`{column}`" for column in item['columns'])
+        count = 0
+        if use_load_data:
+            # 数据文件已经是 LOAD DATA 的默认格式，解压并校验后直接装载
+            digest = hashlib.sha256()
+            with tempfile.NamedTemporaryFile('wb', suffix='.tsv', delete=False) as tmp:
+                with gzip.open(os.path.join(path, item['file']), 'rb') as f:
+                    for line in f:
+                        digest.update(line)
+                        tmp.write(line)
+                        count += 1
+                tmp_path = tmp.name
+            try:
+                if digest.hexdigest() != item['sha256']:
+                    raise ValueError(f"{item['file']} 校验失败，备份文件可能已损坏")
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE '{tmp_path}' INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})"
+                )
+            finally:
+                os.remove(tmp_path)
+        else:
+            query = (f"INSERT INTO `{table}` ({columns}) "
+                     f"VALUES ({', '.join(['%s'] * len(item['columns']))})")
+            batch = []
+            for row in read_table_rows(path, item):
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(query, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(query, batch)
+                count += len(batch)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    seconds = time.perf_counter() - start
+    return {'rows': count, 'seconds': seconds, 'rows_per_sec': count / seconds if seconds else 0}
+
+def build_deferred(table, clauses, database):
+    """一条 ALTER TABLE 补建一个表的全部二级索引和外键；外键检查已关闭，不会逐行校验已有数据"""
+    start = time.perf_counter()
+    connection = create_connection(database)
+    if not connection:
+        raise RuntimeError("无法连接数据库")
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute(f"ALTER TABLE `{table}` {', '.join(clauses)}")
+    finally:
+        connection.close()
+    return {'indexes': len(clauses), 'seconds': time.perf_counter() - start}
+
+def run_parallel(items, task, workers, label):
+    """
+    并行执行 task(名称, 参数)
+
+    Returns:
+        tuple: ({名称: 返回值}, {名称: 异常})
+    """
+    results = {}
+    errors = {}
+    if not items:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        futures = {executor.submit(task, name, argument): name for name, argument in items.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                print(f"[{len(results) + len(errors)}/{len(items)}] {name} {label}完成，"
+                      f"{results[name]['seconds']:.3f} 秒")
+            except Exception as e:
+                errors[name] = e
+                print(f"[{len(results) + len(errors)}/{len(items)}] {name} {label}失败: {e}")
+    return results, errors
+
+def prepare_database(path, manifest, database):
+    """
+    删除备份中包含的对象并按精简后的建表语句重建表
+
+    Returns:
+        dict: {表: 推迟执行的 ALTER TABLE 子句}
+    """
+    connection = create_connection(None)
+    if not connection:
+        raise RuntimeError("无法连接 MySQL 服务器")
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+        cursor.execute(f"USE `{database}`")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for view in reversed(manifest['views']):
+            cursor.execute(f"DROP VIEW IF EXISTS `{view}`")
+        for routine in manifest['routines']:
+            cursor.execute(f"DROP {routine['type']} IF EXISTS `{routine['name']}`")
+        deferred = {}
+        for table in manifest['tables']:
+            cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+            statement, clauses = split_create_table(_read_sql(path, os.path.join('schema', f"{table}.sql")))
+            cursor.execute(statement)
+            if clauses:
+                deferred[table] = clauses
+        return deferred
+    finally:
+        connection.close()
+
+def create_objects(path, manifest, database):
+    """重建存储过程/函数、视图和触发器；视图定义中引用的源库名替换为目标库名"""
+    source_prefix = f"`{manifest['database']}`."
+    target_prefix = f"`{database}`."
+    connection = create_connection(database)
+    if not connection:
+        raise RuntimeError("无法连接数据库")
+    try:
+        cursor = connection.cursor()
+        for routine in manifest['routines']:
+            cursor.execute(_read_sql(path, os.path.join('routines', f"{routine['name']}.sql")))
+        for view in manifest['views']:
+            statement = _read_sql(path, os.path.join('views', f"{view}.sql"))
+            cursor.execute(statement.replace(source_prefix, target_prefix))
+        for trigger in manifest['triggers']:
+            cursor.execute(_read_sql(path, os.path.join('triggers', f"{trigger['name']}.sql")))
+    finally:
+        connection.close()
+
+def verify_counts(manifest, database):
+    """核对各表行数，返回 {表: (备份行数, 恢复后行数)}"""
+    connection = create_connection(database)
+    if not connection:
+        raise RuntimeError("无法连接数据库")
+    try:
+        cursor = connection.cursor()
+        counts = {}
+        for table, item in manifest['tables'].items():
+            cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+            counts[table] = (item['rows'], cursor.fetchone()[0])
+        return counts
+    finally:
+        connection.close()
+
+def restore(path, database, workers=DEFAULT_WORKERS, use_load_data=False):
+    """
+    恢复备份到 database
+
+    Returns:
+        tuple: (各阶段耗时, 装载结果, 行数核对结果)
+    """
+    manifest = load_manifest(path)
+    timings = {}
+
+    start = time.perf_counter()
+    deferred = prepare_database(path, manifest, database)
+    timings['建表'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded, errors = run_parallel(
+        manifest['tables'],
+        lambda table, item: load_table(table, item, path, database, use_load_data),
+        workers, '装载')
+    timings['装载数据'] = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f"{len(errors)} 个表装载失败: {', '.join(errors)}")
+
+    start = time.perf_counter()
+    _, errors = run_parallel(deferred, lambda table, clauses: build_deferred(table, clauses, database),
+                             workers, '建索引')
+    timings['建索引和外键'] = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f"{len(errors)} 个表建索引失败: {', '.join(errors)}")
+
+    start = time.perf_counter()
+    create_objects(path, manifest, database)
+    timings['重建视图等对象'] = time.perf_counter() - start
+
+    counts = verify_counts(manifest, database)
+    return timings, loaded, counts
+
+def print_restore_report(timings, loaded, counts):
+    print("\n恢复报告:")
+    print("-" * 66)
+    print(f"{'表名':<20}{'备份行数':>10}{'恢复行数':>10}{'耗时(秒)':>12}{'行/秒':>10}  状态")
+    print("-" * 66)
+    for table, (expected, actual) in counts.items():
+        item = loaded[table]
+        status = "✓" if expected == actual else "✗"
+        print(f"{table:<20}{expected:>10}{actual:>10}{item['seconds']:>12.3f}{item['rows_per_sec']:>10.0f}  {status}")
+    print("-" * 66)
+    for stage, seconds in timings.items():
+        print(f"{stage}: {seconds:.3f} 秒")
+    print(f"总耗时: {sum(timings.values()):.3f} 秒")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='从按表备份并行恢复数据库')
+    parser.add_argument('name', nargs='?', help='备份目录名（db/backup/ 下）或绝对路径')
+    parser.add_argument('--latest', action='store_true', help='使用最新的备份')
+    parser.add_argument('--database', default=db_config['database'],
+                        help=f"目标数据库（默认 {db_config['database']}，不存在时创建）")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'并行装载的连接数（默认 {DEFAULT_WORKERS}）')
+    parser.add_argument('--load-data', action='store_true',
+                        help='用 LOAD DATA LOCAL INFILE 装载（需要 MySQL 开启 local_infile）')
+    parser.add_argument('--auto', action='store_true', help='不询问确认，直接恢复')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not args.name and not args.latest:
+        print("请指定备份目录名或使用 --latest")
+        sys.exit(1)
+    try:
+        path = find_backup(None if args.latest else args.name)
+        manifest = load_manifest(path)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+    print("将要恢复的备份信息:")
+    print(f"备份目录: {path}")
+    print(f"备份时间: {manifest['created_at']}")
+    print(f"表: {len(manifest['tables'])} 个，共 {sum(item['rows'] for item in manifest['tables'].values())} 行")
+    print(f"视图: {len(manifest['views'])} 个")
+    print(f"目标数据库: {args.database}")
+    if not args.auto:
+        confirm = input("确定要恢复这个备份吗？这将覆盖数据库中的同名表和视图！(y/N): ")
+        if confirm.lower() != 'y':
+            print("操作已取消")
+            return
+
+    print(f"正在恢复数据库 {args.database}...")
+    try:
+        timings, loaded, counts = restore(path, args.database, args.workers, args.load_data)
+    except Exception as e:
+        print(f"数据库恢复失败: {e}")
+        sys.exit(1)
+    print_restore_report(timings, loaded, counts)
+    mismatched = [table for table, (expected, actual) in counts.items() if expected != actual]
+    if mismatched:
+        print(f"数据库恢复失败: 行数与备份不一致的表: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("数据库恢复成功完成!")
+
+if __name__ == "__main__":
+    main()
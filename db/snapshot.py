@@ -0,0 +1,385 @@
+"""
+列式快照
+
+每个表/视图的每一列保存为独立的 .npy 文件，加载时可以直接内存映射：
+- 整数列按取值范围选用最小的整数类型，空值记录在 <列>.null.npy 掩码中
+- 浮点/Decimal 列保存为 float64，空值为 NaN
+- 字符串列（以及日期等其他类型，按字符串保存）做字典编码：
+  <列>.codes.npy 为编码（-1 表示空值），<列>.dict.bin/<列>.dict.offsets.npy 为 UTF-8 字典
+
+manifest.json 记录格式版本、各表的行数、列名和列类型。
+"""
+import json
+import os
+import shutil
+import time
+from decimal import Decimal
+
+import numpy as np
+
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+# 写入临时文件、转换和复制列数据时每批处理的元素数
+COPY_CHUNK = 1 << 20
+# Snapshot.rows 迭代时每批转换的行数
+ROW_CHUNK = 50000
+_KIND_RANK = {'int': 0, 'float': 1, 'string': 2}
+
+
+def _smallest_int_dtype(low, high):
+    if low is None:
+        return np.int8
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    raise OverflowError(f"整数超出 int64 范围: {low}..{high}")
+
+
+def _column_kind(values):
+    """一批值的类型，全部为空时返回 None"""
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+            return 'string'
+        if isinstance(value, (float, Decimal)):
+            kind = 'float'
+        elif kind is None:
+            kind = 'int'
+    return kind
+
+
+def _text(value):
+    if isinstance(value, str):
+        return value
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class ColumnBuilder:
+    """
+    分批追加一列的值，写出时再决定列类型
+
+    值按当前类型（int64 / float64 / 字符串编码 int64）追加到临时文件，空值掩码单独追加，
+    内存中只保留当前批次和字符串字典；出现更宽的类型时把已写入的部分按批转换。
+    write() 再按批复制到最终的 .npy 文件，整数列此时才选定最小的类型。
+    """
+
+    _STORAGE = {'int': np.int64, 'float': np.float64, 'string': np.int64}
+
+    def __init__(self, name, directory, prefix):
+        self.name = name
+        self.base = os.path.join(directory, f"{prefix}.{name}")
+        self.values_path = self.base + '.values.tmp'
+        self.nulls_path = self.base + '.nulls.tmp'
+        self.kind = 'int'
+        self.count = 0
+        self.has_nulls = False
+        self.low = None
+        self.high = None
+        self.dictionary = {}
+        self._last_dictionary = None
+        self._mapping = None
+        for path in (self.values_path, self.nulls_path):
+            open(path, 'wb').close()
+
+    def _append(self, data, nulls):
+        with open(self.values_path, 'ab') as f:
+            f.write(np.ascontiguousarray(data, dtype=self._STORAGE[self.kind]).tobytes())
+        with open(self.nulls_path, 'ab') as f:
+            f.write(np.ascontiguousarray(nulls, dtype=bool).tobytes())
+        if len(data):
+            self.has_nulls = self.has_nulls or bool(nulls.any())
+        self.count += len(data)
+
+    def _stored(self, path, dtype):
+        if not self.count:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(self.count,))
+
+    def _widen(self, kind):
+        """把已写入的值转换为更宽的类型（int -> float -> string）"""
+        if _KIND_RANK[kind] <= _KIND_RANK[self.kind]:
+            return
+        old = self._stored(self.values_path, self._STORAGE[self.kind])
+        nulls = self._stored(self.nulls_path, bool)
+        converted_path = self.base + '.converted.tmp'
+        with open(converted_path, 'wb') as f:
+            for start in range(0, self.count, COPY_CHUNK):
+                chunk = old[start:start + COPY_CHUNK]
+                chunk_nulls = nulls[start:start + COPY_CHUNK]
+                if kind == 'float':
+                    data = chunk.astype(np.float64)
+                    data[chunk_nulls] = np.nan
+                else:
+                    data = np.array([-1 if null else self.dictionary.setdefault(str(value), len(self.dictionary))
+                                     for value, null in zip(chunk.tolist(), chunk_nulls.tolist())], dtype=np.int64)
+                f.write(data.tobytes())
+        del old
+        os.replace(converted_path, self.values_path)
+        self.kind = kind
+
+    def extend(self, values):
+        """追加一批 Python 值"""
+        values = list(values)
+        if not values:
+            return
+        kind = _column_kind(values)
+        if kind is not None:
+            self._widen(kind)
+        nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        if self.kind == 'int':
+            data = np.fromiter((0 if value is None else value for value in values), dtype=np.int64, count=len(values))
+            self._track_range(data, nulls)
+        elif self.kind == 'float':
+            data = np.fromiter((np.nan if value is None else float(value) for value in values),
+                               dtype=np.float64, count=len(values))
+        else:
+            data = np.fromiter((-1 if value is None else self.dictionary.setdefault(_text(value), len(self.dictionary))
+                                for value in values), dtype=np.int64, count=len(values))
+        self._append(data, nulls)
+
+    def _track_range(self, data, nulls):
+        present = data[~nulls]
+        if present.size:
+            low, high = int(present.min()), int(present.max())
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+
+    def extend_array(self, data):
+        """追加一批整数或浮点数组（没有空值），不经过 Python 对象"""
+        data = np.asarray(data)
+        self._widen('float' if data.dtype.kind == 'f' else 'int')
+        nulls = np.zeros(len(data), dtype=bool)
+        if self.kind == 'float':
+            data = data.astype(np.float64)
+        elif self.kind == 'int':
+            data = data.astype(np.int64)
+            self._track_range(data, nulls)
+        else:
+            raise TypeError(f"列 {self.name} 已是字符串列，不能追加数值数组")
+        self._append(data, nulls)
+
+    def extend_codes(self, codes, dictionary):
+        """追加一批字典编码的字符串：codes 为 dictionary 中的下标，-1 表示空值"""
+        self._widen('string')
+        # 各批通常共用同一个字典，只在字典变化时重建映射
+        if self._last_dictionary is not dictionary:
+            self._mapping = np.array([self.dictionary.setdefault(text, len(self.dictionary)) for text in dictionary]
+                                     + [-1], dtype=np.int64)
+            self._last_dictionary = dictionary
+        mapping = self._mapping
+        codes = np.asarray(codes)
+        # -1 取到 mapping 末尾的 -1
+        self._append(mapping[codes], codes < 0)
+
+    def _copy_to_npy(self, path, source, dtype):
+        if not self.count:
+            np.save(path, np.empty(0, dtype=dtype))
+            return
+        target = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(self.count,))
+        for start in range(0, self.count, COPY_CHUNK):
+            target[start:start + COPY_CHUNK] = source[start:start + COPY_CHUNK]
+        target.flush()
+        del target
+
+    def write(self):
+        try:
+            return self._write()
+        finally:
+            for path in (self.values_path, self.nulls_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _write(self):
+        base = self.base
+        values = self._stored(self.values_path, self._STORAGE[self.kind])
+        if self.kind == 'int':
+            dtype = _smallest_int_dtype(self.low, self.high)
+            self._copy_to_npy(base + '.npy', values, dtype)
+            if self.has_nulls:
+                self._copy_to_npy(base + '.null.npy', self._stored(self.nulls_path, bool), bool)
+            return {'name': self.name, 'type': 'int', 'dtype': np.dtype(dtype).name, 'nullable': self.has_nulls}
+        if self.kind == 'float':
+            self._copy_to_npy(base + '.npy', values, np.float64)
+            return {'name': self.name, 'type': 'float', 'dtype': 'float64', 'nullable': True}
+
+        encoded = [text.encode('utf-8') for text in self.dictionary]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(item) for item in encoded], dtype=np.int64)
+        code_dtype = _smallest_int_dtype(-1, len(self.dictionary))
+        self._copy_to_npy(base + '.codes.npy', values, code_dtype)
+        np.save(base + '.dict.offsets.npy', offsets)
+        with open(base + '.dict.bin', 'wb') as f:
+            f.write(b''.join(encoded))
+        return {'name': self.name, 'type': 'string', 'dtype': np.dtype(code_dtype).name,
+                'nullable': self.has_nulls, 'dictionary_size': len(self.dictionary)}
+
+
+class SnapshotWriter:
+    """
+    写快照：先写到临时目录，全部完成后替换旧快照，中途失败不会破坏已有快照
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.tmp_path = self.path + '.tmp'
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self.manifest = {'version': SNAPSHOT_VERSION, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'tables': {}}
+
+    def write_table(self, name, columns, row_chunks, kind='table'):
+        """
+        写入一个表，每批行写入后即可释放
+
+        Args:
+            name (str): 表名
+            columns (list): 列名
+            row_chunks (iterable): 行元组的分批迭代器
+            kind (str): table 或 view
+
+        Returns:
+            int: 行数
+        """
+        builders = [ColumnBuilder(column, self.tmp_path, name) for column in columns]
+        for rows in row_chunks:
+            if not rows:
+                continue
+            for builder, values in zip(builders, zip(*rows)):
+                builder.extend(values)
+        return self._finish_table(name, kind, builders)
+
+    def write_arrays(self, name, columns, column_chunks, kind='table'):
+        """
+        按列数组写入一个表，不构造行元组
+
+        Args:
+            column_chunks (iterable): 每批为与 columns 对应的列表，数值列为 numpy 数组，
+                字符串列为 (编码数组, 字典) 两项（与 Snapshot.column 的返回格式相同）
+        """
+        builders = [ColumnBuilder(column, self.tmp_path, name) for column in columns]
+        for chunk in column_chunks:
+            for builder, data in zip(builders, chunk):
+                if isinstance(data, tuple):
+                    builder.extend_codes(*data)
+                else:
+                    builder.extend_array(data)
+        return self._finish_table(name, kind, builders)
+
+    def _finish_table(self, name, kind, builders):
+        count = builders[0].count if builders else 0
+        self.manifest['tables'][name] = {
+            'kind': kind,
+            'rows': count,
+            'columns': [builder.write() for builder in builders]
+        }
+        return count
+
+    def commit(self):
+        with open(os.path.join(self.tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        old_path = self.path + '.old'
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(self.tmp_path, self.path)
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+
+    def abort(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+class Snapshot:
+    """读快照：列文件按需内存映射，不会一次读入整个快照"""
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, MANIFEST_FILE), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的快照版本: {self.manifest.get('version')}")
+
+    @property
+    def tables(self):
+        return self.manifest['tables']
+
+    def _load(self, name, column, suffix):
+        return np.load(os.path.join(self.path, f"{name}.{column}{suffix}"), mmap_mode=self.mmap_mode)
+
+    def column(self, name, column):
+        """返回列的 numpy 数组；字符串列返回 (编码, 字典) 两项"""
+        spec = next(item for item in self.tables[name]['columns'] if item['name'] == column)
+        if spec['type'] != 'string':
+            return self._load(name, column, '.npy')
+        codes = self._load(name, column, '.codes.npy')
+        offsets = self._load(name, column, '.dict.offsets.npy')
+        with open(os.path.join(self.path, f"{name}.{column}.dict.bin"), 'rb') as f:
+            blob = f.read()
+        dictionary = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+        return codes, dictionary
+
+    def _decoder(self, name, column):
+        """返回 decode(start, stop)：把列的一段转换为 Python 原生值列表，空值为 None"""
+        spec = next(item for item in self.tables[name]['columns'] if item['name'] == column)
+        if spec['type'] == 'string':
+            codes, dictionary = self.column(name, column)
+            lookup = dictionary + [None]
+            # 编码 -1 取到 lookup 末尾的 None
+            return lambda start, stop: [lookup[code] for code in codes[start:stop].tolist()]
+        data = self.column(name, column)
+        if spec['type'] == 'int' and spec['nullable']:
+            nulls = self._load(name, column, '.null.npy')
+            return lambda start, stop: [None if null else value for value, null in
+                                        zip(data[start:stop].tolist(), nulls[start:stop].tolist())]
+        if spec['type'] == 'float':
+            return lambda start, stop: [None if value != value else value for value in data[start:stop].tolist()]
+        return lambda start, stop: data[start:stop].tolist()
+
+    def rows(self, name, columns=None):
+        """按行读取表，columns 指定列及顺序；返回 SnapshotRows，只在切片或迭代时转换用到的部分"""
+        columns = columns or [item['name'] for item in self.tables[name]['columns']]
+        return SnapshotRows(self.tables[name]['rows'], [self._decoder(name, column) for column in columns])
+
+
+class SnapshotRows:
+    """
+    快照表的行
+
+    支持 len()、切片和迭代（每批 ROW_CHUNK 行），只把用到的行段从内存映射的列转换为行元组，
+    可以直接交给 import_school_data.py 的 load_staging_table
+    """
+
+    def __init__(self, count, decoders):
+        self.count = count
+        self.decoders = decoders
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step != 1:
+                raise ValueError("SnapshotRows 只支持步长为 1 的切片")
+            return list(zip(*(decode(start, stop) for decode in self.decoders)))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self[index:index + 1][0]
+
+    def __iter__(self):
+        for start in range(0, self.count, ROW_CHUNK):
+            yield from self[start:start + ROW_CHUNK]
+
+
+def snapshot_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
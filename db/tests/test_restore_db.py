@@ -0,0 +1,87 @@
+import glob
+import os
+import re
+
+import pytest
+
+"""
+restore_db.split_create_table 的单元测试
+
+建表语句取自 backup/ 中 backup_db.sh 生成的 SQL 备份，不需要数据库连接；在 db/ 目录下运行 python -m pytest tests/
+"""
+
+# restore_db 在模块级导入 mysql.connector，未安装驱动时跳过而不是报错
+pytest.importorskip('mysql.connector')
+from restore_db import split_create_table  # noqa: E402
+
+
+BACKUP_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backup")
+
+
+def load_create_table(table):
+    """返回最新 SQL 备份中 table 的建表语句（不含结尾的分号），与 _read_sql 读到的形式一致"""
+    dumps = sorted(glob.glob(os.path.join(BACKUP_DIRECTORY, "*.sql")))
+    if not dumps:
+        pytest.skip(f"{BACKUP_DIRECTORY} 中没有 SQL 备份")
+    with open(dumps[-1], encoding='utf-8') as f:
+        content = f.read()
+    match = re.search(rf"^CREATE TABLE `{table}` \(.*?^\).*?;$", content, re.M | re.S)
+    assert match, f"备份中没有 {table} 的建表语句"
+    return match.group(0).rstrip(';')
+
+
+class TestSplitCreateTable:
+    """拆分建表语句：只保留列和主键，二级索引和外键推迟到装载之后"""
+
+    def test_scores_keeps_primary_key_and_defers_indexes(self):
+        """Scores: 保留自增主键，三个二级索引和两个外键都推迟"""
+        statement = load_create_table('Scores')
+        create, deferred = split_create_table(statement)
+
+        assert create.startswith('CREATE TABLE `Scores` (\n')
+        assert '  PRIMARY KEY (`score_id`)\n) ENGINE=InnoDB AUTO_INCREMENT=' in create
+        assert '`score_id` int NOT NULL AUTO_INCREMENT,' in create
+        assert 'KEY `student_id`' not in create
+        assert 'CONSTRAINT' not in create
+        assert deferred == [
+            'ADD KEY `student_id` (`student_id`)',
+            'ADD KEY `subject_id` (`subject_id`)',
+            'ADD KEY `exam_type_id` (`exam_type_id`)',
+            'ADD CONSTRAINT `Scores_ibfk_1` FOREIGN KEY (`student_id`) REFERENCES `Students` (`student_id`)',
+            'ADD CONSTRAINT `Scores_ibfk_3` FOREIGN KEY (`exam_type_id`) REFERENCES `ExamTypes` (`exam_type_id`)',
+        ]
+
+    def test_students_defers_foreign_key_and_its_index(self):
+        """Students: 非自增主键保留，外键及其索引推迟"""
+        statement = load_create_table('Students')
+        create, deferred = split_create_table(statement)
+
+        assert create == '\n'.join([
+            'CREATE TABLE `Students` (',
+            '  `student_id` varchar(255) NOT NULL,',
+            '  `student_name` varchar(255) DEFAULT NULL,',
+            '  `class_id` int DEFAULT NULL,',
+            '  `password` varchar(255) DEFAULT NULL,',
+            '  PRIMARY KEY (`student_id`)',
+            ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci',
+        ])
+        assert deferred == [
+            'ADD KEY `fk_students_class_id` (`class_id`)',
+            'ADD CONSTRAINT `fk_students_class_id` FOREIGN KEY (`class_id`) REFERENCES `Classes` (`class_id`)',
+        ]
+
+    def test_index_leading_with_auto_increment_column_is_kept(self):
+        """
+        自增列不在主键第一列时，以它开头的二级索引必须随表一起创建（否则建表失败），
+        其余索引和外键照常推迟
+        """
+        statement = load_create_table('Scores').replace(
+            'PRIMARY KEY (`score_id`),',
+            'PRIMARY KEY (`student_id`,`score_id`),\n  KEY `score_id` (`score_id`,`score`),'
+        )
+        create, deferred = split_create_table(statement)
+
+        assert '  PRIMARY KEY (`student_id`,`score_id`),\n  KEY `score_id` (`score_id`,`score`)\n)' in create
+        assert 'ADD KEY `score_id` (`score_id`,`score`)' not in deferred
+        assert deferred[0] == 'ADD KEY `student_id` (`student_id`)'
+        assert len(deferred) == 5